@@ -0,0 +1,70 @@
+"""
+Пропускная способность главной страницы с кешем и без него.
+
+Несколько процессов-воркеров запрашивают первые страницы ленты через
+тестовый клиент Django (полный стек middleware и шаблонов, без сети).
+
+    python -m benchmarks.cache_tier --workers 4 --requests 300
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from benchmarks import utils
+
+
+def hit_index(requests, pages, seed):
+    from django.test import Client
+
+    client = Client()
+    rng = random.Random(seed)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get('/', {'page': rng.randint(1, pages)})
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+    return latencies
+
+
+def run(workers, requests, pages):
+    from django.test import override_settings
+
+    scenarios = (
+        ('off', utils.DUMMY_CACHES),
+        ('on', utils.local_caches(tempfile.mkdtemp())),
+    )
+    results = {}
+    for name, caches in scenarios:
+        with override_settings(CACHES=caches):
+            batches, elapsed = utils.run_workers(
+                hit_index, workers, requests, pages, 0
+            )
+        latencies = [value for batch in batches for value in batch]
+        results[name] = utils.summary(latencies, elapsed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=300,
+                        help='запросов на воркер')
+    parser.add_argument('--posts', type=int, default=2000)
+    parser.add_argument('--pages', type=int, default=5)
+    args = parser.parse_args()
+
+    utils.setup()
+    from benchmarks import data
+    data.generate(posts=args.posts)
+
+    results = run(args.workers, args.requests, args.pages)
+    print(f'{"кеш":<6}{"rps":>10}{"p50, мс":>10}{"p95, мс":>10}')
+    for name, result in results.items():
+        print(f'{name:<6}{result["rps"]:>10.1f}{result["p50_ms"]:>10.2f}'
+              f'{result["p95_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Сравнение двух результатов `benchmarks.load`:
+
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import json
+
+COLUMNS = ('rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def delta(before, after):
+    if not before:
+        return ''
+    return f'{(after - before) / before * 100:+.0f}%'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('before')
+    parser.add_argument('after')
+    args = parser.parse_args()
+    before, after = load(args.before), load(args.after)
+    print(f'{before["meta"]["commit"]} -> {after["meta"]["commit"]}')
+    print(f'{"сценарий":<14}' + ''.join(f'{name:>22}' for name in COLUMNS))
+    rows = [
+        (name, before['scenarios'][name], after['scenarios'][name])
+        for name in after['scenarios'] if name in before['scenarios']
+    ]
+    rows.append(('всего', before['total'], after['total']))
+    for name, old, new in rows:
+        cells = ''.join(
+            f'{old[column]:>8.1f} {new[column]:>7.1f} '
+            f'{delta(old[column], new[column]):>5}'
+            for column in COLUMNS
+        )
+        print(f'{name:<14}{cells}')
+
+
+if __name__ == '__main__':
+    main()
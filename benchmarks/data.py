@@ -0,0 +1,100 @@
+"""
+Генератор синтетических данных для бенчмарков.
+"""
+import itertools
+import random
+
+
+def power_law_weights(count, alpha, rng):
+    """
+    Накопленные веса 1/rank^alpha в случайном порядке: несколько
+    «звёзд» получают большую часть подписчиков и комментариев.
+    """
+    weights = [1 / rank ** alpha for rank in range(1, count + 1)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def generate(users=100, groups=10, posts=2000, follows=20, comments=3,
+             alpha=1.2, seed=0):
+    """
+    Наполняет пустую базу через bulk_create и пересчитывает производные
+    данные (счётчики, входящие лент, поисковый индекс).
+
+    `follows` — среднее число подписок на пользователя, `comments` —
+    среднее число комментариев на пост. И авторы для подписок, и посты
+    для комментариев выбираются по степенному закону с показателем
+    `alpha`.
+    """
+    from django.contrib.auth import get_user_model
+    from posts import counters, feed, search
+    from posts.models import Comment, Follow, Group, Post
+
+    User = get_user_model()
+    rng = random.Random(seed)
+
+    User.objects.bulk_create(
+        [User(username=f'user{number}', password='!')
+         for number in range(users)],
+    )
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {number}', slug=f'group-{number}',
+               description='Описание группы')
+         for number in range(groups)],
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    group_ids = list(Group.objects.values_list('id', flat=True)) + [None]
+    # Популярные авторы и пишут больше.
+    author_weights = power_law_weights(len(user_ids), alpha, rng)
+    Post.objects.bulk_create(
+        [Post(
+            text=text(rng),
+            author_id=author_id,
+            group_id=rng.choice(group_ids),
+        ) for author_id in rng.choices(
+            user_ids, cum_weights=author_weights, k=posts)],
+    )
+
+    pairs = set()
+    for user_id in user_ids:
+        count = min(int(rng.expovariate(1 / follows)) if follows else 0,
+                    len(user_ids) - 1)
+        for author_id in rng.choices(
+                user_ids, cum_weights=author_weights, k=count):
+            if author_id != user_id:
+                pairs.add((user_id, author_id))
+    Follow.objects.bulk_create(
+        [Follow(user_id=user_id, author_id=author_id)
+         for user_id, author_id in sorted(pairs)],
+    )
+
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    if post_ids and comments:
+        post_weights = power_law_weights(len(post_ids), alpha, rng)
+        Comment.objects.bulk_create(
+            [Comment(
+                post_id=post_id,
+                author_id=rng.choice(user_ids),
+                text=text(rng, 3, 20),
+            ) for post_id in rng.choices(
+                post_ids, cum_weights=post_weights,
+                k=comments * len(post_ids))],
+        )
+
+    counters.recount_posts()
+    counters.recount_profiles()
+    feed.rebuild()
+    search.rebuild()
+
+
+def text(rng, shortest=5, longest=60):
+    return ' '.join(
+        rng.choice(WORDS) for _ in range(rng.randint(shortest, longest))
+    )
+
+
+WORDS = (
+    'сегодня', 'город', 'утро', 'книга', 'друг', 'дорога', 'вечер', 'море',
+    'дом', 'работа', 'кофе', 'лес', 'музыка', 'снег', 'окно', 'письмо',
+    'песня', 'небо', 'поезд', 'история', 'python', 'django', 'yatube',
+)
@@ -0,0 +1,140 @@
+"""
+Сколько байт картинок загружает браузер на первой странице ленты.
+
+«До» — одно превью 960x339 в JPEG на карточку, как было с
+sorl.thumbnail. «После» — вариант из srcset в WebP, который выбрал бы
+браузер при данной ширине окна и плотности пикселей.
+
+    python -m benchmarks.image_bytes --posts 10
+"""
+import argparse
+import re
+import tempfile
+from io import BytesIO
+
+from benchmarks import utils
+
+VIEWPORTS = (
+    ('телефон 360@1x', 360, 1),
+    ('телефон 360@2x', 360, 2),
+    ('телефон 414@3x', 414, 3),
+    ('планшет 768@2x', 768, 2),
+    ('ноутбук 1366@1x', 1366, 1),
+    ('монитор 1920@1x', 1920, 1),
+)
+
+SOURCE = re.compile(r'<source type="image/webp" srcset="([^"]+)"')
+
+
+def photo(rng, size=(2400, 1600)):
+    """
+    Синтетическое «фото»: градиент с шумом, чтобы JPEG не сжимался в ноль.
+    """
+    from PIL import Image, ImageChops, ImageFilter
+
+    gradient = Image.merge('RGB', [
+        Image.linear_gradient('L').rotate(rng.randint(0, 359)).resize(size)
+        for _ in range(3)
+    ])
+    noise = Image.effect_noise(size, rng.randint(20, 60)).filter(
+        ImageFilter.GaussianBlur(2)).convert('RGB')
+    image = ImageChops.blend(gradient, noise, 0.3)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def legacy_size(post):
+    """
+    Размер превью, которое отдавал `{% thumbnail "960x339" %}`.
+    """
+    from PIL import Image, ImageOps
+
+    with post.image.open('rb') as file, Image.open(file) as source:
+        image = ImageOps.fit(source.convert('RGB'), (960, 339),
+                             Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=85)
+    return len(buffer.getvalue())
+
+
+def pick(srcset, needed):
+    """
+    Вариант из srcset, который выберет браузер: самый узкий не уже
+    `needed` пикселей, иначе самый широкий.
+    """
+    candidates = sorted(
+        (int(width[:-1]), url)
+        for url, width in (item.split() for item in srcset.split(', '))
+    )
+    for width, url in candidates:
+        if width >= needed:
+            return url
+    return candidates[-1][1]
+
+
+def slot_width(viewport):
+    # Как в POST_THUMBNAIL_SIZES_ATTR.
+    return viewport if viewport <= 1200 else 1110
+
+
+def run(posts):
+    import random
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.files.storage import default_storage
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.test import Client
+
+    from posts.models import Post
+
+    rng = random.Random(0)
+    author = get_user_model().objects.create_user(username='author')
+    for number in range(posts):
+        Post.objects.create(
+            text=f'Пост {number}', author=author,
+            image=SimpleUploadedFile(f'photo{number}.jpg', photo(rng)),
+        )
+
+    response = Client().get('/')
+    page = response.context['page']
+    html = response.content.decode()
+    srcsets = SOURCE.findall(html)
+    assert len(srcsets) == len(page), 'не у всех карточек есть WebP'
+    before = sum(legacy_size(post) for post in page)
+
+    results = []
+    for name, viewport, density in VIEWPORTS:
+        needed = slot_width(viewport) * density
+        after = sum(
+            default_storage.size(
+                pick(srcset, needed)[len(settings.MEDIA_URL):]
+            )
+            for srcset in srcsets
+        )
+        results.append((name, before, after))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=10,
+                        help='постов с картинками (одна страница ленты)')
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    settings.MEDIA_ROOT = tempfile.mkdtemp()
+    settings.THUMBNAIL_ASYNC = False
+    settings.CACHES = utils.DUMMY_CACHES
+
+    results = run(args.posts)
+    print(f'{"окно":<18}{"до, КБ":>10}{"после, КБ":>12}{"экономия":>10}')
+    for name, before, after in results:
+        print(f'{name:<18}{before / 1024:>10.1f}{after / 1024:>12.1f}'
+              f'{1 - after / before:>10.0%}')
+
+
+if __name__ == '__main__':
+    main()
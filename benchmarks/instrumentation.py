@@ -0,0 +1,83 @@
+"""
+Накладные расходы инструментовки: одни и те же страницы с
+InstrumentationMiddleware и замером шаблонов и без них.
+
+    python -m benchmarks.instrumentation --requests 300
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from benchmarks import utils
+
+# Допустимая доля накладных расходов от времени запроса.
+BUDGET = 0.05
+
+
+def measure(urls, requests):
+    from django.test import Client
+
+    client = Client()
+    for url in urls:
+        client.get(url)
+    timings = []
+    for number in range(requests):
+        started = time.perf_counter()
+        client.get(urls[number % len(urls)])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    from django.test import override_settings
+    from benchmarks import data
+    from posts.models import Post
+
+    data.generate(users=50, posts=500)
+    post = Post.objects.select_related('author').first()
+    urls = ['/', f'/{post.author.username}/', f'/{post.author.username}/'
+            f'{post.id}/']
+
+    middleware = [
+        name for name in settings.MIDDLEWARE
+        if name != 'yatube.instrumentation.InstrumentationMiddleware'
+    ]
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['BACKEND'] = (
+        'django.template.backends.django.DjangoTemplates'
+    )
+    plain = override_settings(
+        MIDDLEWARE=middleware, TEMPLATES=templates,
+        CACHES=utils.DUMMY_CACHES,
+    )
+    instrumented = override_settings(
+        CACHES=utils.DUMMY_CACHES,
+        INSTRUMENTATION=dict(settings.INSTRUMENTATION, METRICS_DIR=None,
+                             PROFILE_SAMPLE_RATE=0, SERVER_TIMING=True),
+    )
+    results = {'plain': [], 'instrumented': []}
+    for _ in range(args.rounds):
+        for name, overrides in (('plain', plain),
+                                ('instrumented', instrumented)):
+            with overrides:
+                results[name].append(measure(urls, args.requests))
+    base = min(results['plain'])
+    measured = min(results['instrumented'])
+    overhead = (measured - base) / base
+    print(f'без инструментовки: {base * 1000:.2f} мс на запрос')
+    print(f'с инструментовкой:  {measured * 1000:.2f} мс на запрос')
+    print(f'накладные расходы:  {(measured - base) * 1e6:.0f} мкс '
+          f'({overhead:+.1%}), бюджет {BUDGET:.0%}: '
+          f'{"в пределах" if overhead <= BUDGET else "ПРЕВЫШЕН"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+"""
+Нагрузочный тест Yatube по HTTP.
+
+Поднимает WSGI-сервер с `yatube.wsgi.application` на синтетических
+данных (или использует уже запущенный, `--url`) и гоняет по нему
+воркеров со смесью чтения и записи из SCENARIOS. Печатает p50/p95/p99 и
+запросы в секунду по каждому сценарию и сохраняет результат в JSON для
+сравнения между коммитами (`python -m benchmarks.compare`).
+
+    python -m benchmarks.load --workers 4 --duration 20
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import secrets
+import subprocess
+import time
+from socketserver import ThreadingMixIn
+from urllib.parse import urlencode, urlsplit
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from benchmarks import utils
+from benchmarks.data import WORDS, generate, text
+
+# Сценарий: (вес, нужен ли вход, метод).
+SCENARIOS = {
+    'index': (30, False, 'GET'),
+    'index_page': (5, False, 'GET'),
+    'group': (10, False, 'GET'),
+    'profile': (12, False, 'GET'),
+    'post': (15, False, 'GET'),
+    'comments': (3, False, 'GET'),
+    'follow_index': (10, True, 'GET'),
+    'search': (5, False, 'GET'),
+    'new_post': (3, True, 'POST'),
+    'add_comment': (5, True, 'POST'),
+    'follow': (2, True, 'GET'),
+}
+
+RESULTS_DIR = os.path.join(utils.BASE_DIR, 'benchmarks', 'results')
+
+
+def make_sessions(count):
+    """
+    Сессии для `count` пользователей без входа через форму; возвращает
+    список session key.
+    """
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY,
+        get_user_model,
+    )
+    from django.contrib.sessions.backends.db import SessionStore
+
+    keys = []
+    for user in get_user_model().objects.order_by('id')[:count]:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = (
+            'django.contrib.auth.backends.ModelBackend'
+        )
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        keys.append(session.session_key)
+    return keys
+
+
+def targets():
+    """
+    Что есть в базе: имена авторов, слаги групп, пары (автор, пост).
+    """
+    from django.contrib.auth import get_user_model
+    from posts.models import Group, Post
+
+    return {
+        'usernames': list(
+            get_user_model().objects.values_list('username', flat=True)),
+        'groups': list(Group.objects.values_list('slug', flat=True)),
+        'posts': list(Post.objects.values_list('author__username', 'id')),
+    }
+
+
+def _follow(rng, data, username, post_id):
+    author = rng.choice(data['usernames'])
+    return 'GET', f'/{author}/{rng.choice(("follow", "unfollow"))}/', None
+
+
+# Сценарий -> (метод, путь, тело формы); пост для сценария выбирается
+# заранее.
+REQUESTS = {
+    'index': lambda rng, data, username, post_id: ('GET', '/', None),
+    'index_page': lambda rng, data, username, post_id: (
+        'GET', f'/?page={rng.randint(2, 10)}', None),
+    'group': lambda rng, data, username, post_id: (
+        'GET', f'/group/{rng.choice(data["groups"])}/', None),
+    'profile': lambda rng, data, username, post_id: (
+        'GET', f'/{username}/', None),
+    'post': lambda rng, data, username, post_id: (
+        'GET', f'/{username}/{post_id}/', None),
+    'comments': lambda rng, data, username, post_id: (
+        'GET', f'/{username}/{post_id}/comments/', None),
+    'follow_index': lambda rng, data, username, post_id: (
+        'GET', '/follow/', None),
+    'search': lambda rng, data, username, post_id: (
+        'GET', '/posts/search/?' + urlencode({'q': rng.choice(WORDS)}), None),
+    'new_post': lambda rng, data, username, post_id: (
+        'POST', '/new/', {'text': text(rng)}),
+    'add_comment': lambda rng, data, username, post_id: (
+        'POST', f'/{username}/{post_id}/comment/', {'text': 'Класс!'}),
+    'follow': _follow,
+}
+
+
+def request_for(name, rng, data):
+    """
+    (метод, путь, тело формы) для сценария `name`.
+    """
+    username, post_id = rng.choice(data['posts'])
+    return REQUESTS[name](rng, data, username, post_id)
+
+
+def drive(url, duration, sessions, data, seed):
+    """
+    Воркер: в течение `duration` секунд выбирает сценарии по весам и
+    выполняет их через одно keep-alive соединение.
+    """
+    rng = random.Random(seed)
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name][0] for name in names]
+    csrf = secrets.token_hex(32)
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        method, path, form = request_for(name, rng, data)
+        cookies = [f'csrftoken={csrf}']
+        if SCENARIOS[name][1]:
+            cookies.append(f'sessionid={rng.choice(sessions)}')
+        headers = {'Cookie': '; '.join(cookies)}
+        body = None
+        if form is not None:
+            body = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-CSRFToken'] = csrf
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            ok = response.status < 400
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            ok = False
+        latencies[name].append(time.perf_counter() - started)
+        if not ok:
+            errors[name] += 1
+    connection.close()
+    return latencies, errors
+
+
+class _ThreadingServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _serve_forever(port):
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+
+    connections.close_all()
+    server = make_server('127.0.0.1', port, get_wsgi_application(),
+                         server_class=_ThreadingServer,
+                         handler_class=_QuietHandler)
+    server.serve_forever()
+
+
+def serve(port):
+    """
+    Запускает встроенный многопоточный WSGI-сервер в дочернем процессе
+    (fork наследует настроенный Django) и ждёт, пока он начнёт отвечать.
+    """
+    process = multiprocessing.get_context('fork').Process(
+        target=_serve_forever, args=(port,), daemon=True,
+    )
+    process.start()
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port,
+                                                    timeout=1)
+            connection.request('HEAD', '/about/author/')
+            connection.getresponse()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('Сервер не запустился')
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=utils.BASE_DIR, stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def report(batches, elapsed):
+    merged = {name: [] for name in SCENARIOS}
+    errors = {name: 0 for name in SCENARIOS}
+    for latencies, worker_errors in batches:
+        for name in SCENARIOS:
+            merged[name].extend(latencies[name])
+            errors[name] += worker_errors[name]
+    scenarios = {}
+    for name, latencies in merged.items():
+        if latencies:
+            scenarios[name] = dict(
+                utils.summary(latencies, elapsed), errors=errors[name]
+            )
+    everything = [value for values in merged.values() for value in values]
+    total = dict(utils.summary(everything, elapsed),
+                 errors=sum(errors.values()))
+    return {'total': total, 'scenarios': scenarios}
+
+
+def print_report(result):
+    print(f'{"сценарий":<14}{"запросов":>10}{"rps":>9}{"p50, мс":>10}'
+          f'{"p95, мс":>10}{"p99, мс":>10}{"ошибок":>8}')
+    rows = list(result['scenarios'].items()) + [('всего', result['total'])]
+    for name, row in rows:
+        print(f'{name:<14}{row["requests"]:>10}{row["rps"]:>9.1f}'
+              f'{row["p50_ms"]:>10.1f}{row["p95_ms"]:>10.1f}'
+              f'{row["p99_ms"]:>10.1f}{row["errors"]:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', help='уже запущенный сервер, например '
+                                      'http://127.0.0.1:8000 (база должна '
+                                      'быть наполнена тем же --db)')
+    parser.add_argument('--db', help='файл базы (по умолчанию временный)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--posts', type=int, default=10000)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--output', help='файл JSON с результатом (по '
+                                         'умолчанию benchmarks/results/)')
+    args = parser.parse_args()
+
+    existing = args.db and os.path.exists(args.db)
+    utils.setup(args.db)
+    if not existing:
+        generate(users=args.users, posts=args.posts,
+                 groups=max(args.users // 50, 1))
+    sessions = make_sessions(args.sessions)
+    data = targets()
+
+    process = None
+    url = args.url
+    if url is None:
+        process = serve(args.port)
+        url = f'http://127.0.0.1:{args.port}'
+    try:
+        batches, elapsed = utils.run_workers(
+            _drive_worker, args.workers, url, args.duration, sessions, data,
+        )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+    result = report(batches, elapsed)
+    result['meta'] = {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'workers': args.workers,
+        'duration': args.duration,
+        'users': args.users,
+        'posts': args.posts,
+        'url': args.url or 'builtin',
+    }
+    print_report(result)
+    output = args.output or os.path.join(
+        RESULTS_DIR,
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{result["meta"]["commit"]}.json',
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(result, file, ensure_ascii=False, indent=2)
+    print(f'Результат: {output}')
+
+
+def _drive_worker(url, duration, sessions, data):
+    # У каждого воркера своя последовательность сценариев.
+    return drive(url, duration, sessions, data, seed=os.getpid())
+
+
+if __name__ == '__main__':
+    main()
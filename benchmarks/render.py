@@ -0,0 +1,105 @@
+"""
+Время рендеринга лент `index.html`, `profile.html` и `group.html`:
+
+* `before` — шаблоны читаются с диска при каждом рендеринге, кеша нет;
+* `cached_loader` — кеширующий загрузчик шаблонов, кеша нет;
+* `post_cards` — кеширующий загрузчик и кеш: лента перед каждым запросом
+  сброшена (как после нового поста), карточки постов берутся из кеша.
+
+Время шаблонов — часть `template` заголовка Server-Timing, SQL и обращения
+к кешу в неё не входят (см. yatube.instrumentation).
+
+    python -m benchmarks.render --requests 100
+"""
+import argparse
+import copy
+import re
+import statistics
+import tempfile
+import time
+
+from benchmarks import utils
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', PLAIN_LOADERS)]
+
+SERVER_TIMING = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+def measure(pages, requests):
+    """
+    Медианы (всего, шаблоны) в мс по каждой странице `pages` —
+    списку (имя, url, область поколения).
+    """
+    from django.test import Client
+    from posts import generations
+
+    client = Client()
+    results = {}
+    for name, url, scope in pages:
+        client.get(url)
+        totals, templates = [], []
+        for _ in range(requests):
+            generations.bump(scope)
+            started = time.perf_counter()
+            response = client.get(url)
+            totals.append((time.perf_counter() - started) * 1000)
+            parts = dict(SERVER_TIMING.findall(response['Server-Timing']))
+            templates.append(float(parts.get('template', 0)))
+        results[name] = (statistics.median(totals),
+                         statistics.median(templates))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=100)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.conf import settings
+    from django.test import override_settings
+    from benchmarks import data
+    from posts.models import Group, Post
+
+    # Анонимным клиентам Server-Timing отдаётся только с этим флагом.
+    settings.INSTRUMENTATION = dict(settings.INSTRUMENTATION,
+                                    SERVER_TIMING=True)
+    data.generate(users=50, posts=1000)
+    author = Post.objects.values_list(
+        'author__username', 'author_id').first()
+    group = Group.objects.first()
+    pages = [
+        ('index.html', '/', 'index'),
+        ('profile.html', f'/{author[0]}/', f'profile:{author[1]}'),
+        ('group.html', f'/group/{group.slug}/', f'group:{group.id}'),
+    ]
+
+    def templates(loaders):
+        value = copy.deepcopy(settings.TEMPLATES)
+        value[0]['APP_DIRS'] = False
+        value[0]['OPTIONS']['loaders'] = loaders
+        return value
+
+    modes = (
+        ('before', override_settings(
+            TEMPLATES=templates(PLAIN_LOADERS), CACHES=utils.DUMMY_CACHES)),
+        ('cached_loader', override_settings(
+            TEMPLATES=templates(CACHED_LOADERS), CACHES=utils.DUMMY_CACHES)),
+        ('post_cards', override_settings(
+            TEMPLATES=templates(CACHED_LOADERS),
+            CACHES=utils.local_caches(tempfile.mkdtemp()))),
+    )
+    print(f'{"режим":<15}{"страница":<15}{"всего, мс":>12}{"шаблоны, мс":>14}')
+    for mode, overrides in modes:
+        with overrides:
+            for page, (total, template) in measure(
+                    pages, args.requests).items():
+                print(f'{mode:<15}{page:<15}{total:>12.2f}{template:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Задержка полнотекстового поиска (FTS5) против LIKE на большом корпусе.
+
+Корпус — синтетические посты из слов со ципфовским распределением
+частот; вставляется напрямую в таблицу, минуя сигналы, после чего
+индекс строится одной командой.
+
+    python -m benchmarks.search --posts 1000000 --queries 200
+
+Ранжирование требует оценить все совпадения, поэтому слова из
+верхушки распределения (есть в каждом десятом посте) заметно медленнее
+редких; LIKE же читает таблицу целиком на любом слове.
+"""
+import argparse
+import itertools
+import random
+import time
+
+from benchmarks import utils
+
+SYLLABLES = (
+    'ба', 'ве', 'го', 'да', 'ек', 'жи', 'зо', 'ил', 'ка', 'ло', 'ми', 'но',
+    'ор', 'па', 'ре', 'со', 'ту', 'уф', 'ха', 'це', 'чу', 'ша', 'эр', 'юл',
+)
+
+
+def vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(
+            rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))
+        ))
+    return sorted(words)
+
+
+def fill(posts, words, rng, users=1000, chunk=50000):
+    """
+    Вставляет `posts` постов пачками по `chunk` строк.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from posts.models import Post
+
+    User = get_user_model()
+    User.objects.bulk_create(
+        [User(username=f'user{number}', password='!')
+         for number in range(users)],
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, len(words) + 1)
+    ))
+    now = timezone.now()
+    sql = (f'INSERT INTO {Post._meta.db_table} '
+           f'(text, pub_date, updated, author_id, image, comments_count) '
+           f'VALUES (%s, %s, %s, %s, %s, 0)')
+    for start in range(0, posts, chunk):
+        rows = [
+            (' '.join(rng.choices(words, cum_weights=weights,
+                                  k=rng.randint(5, 60))),
+             now, now, rng.choice(user_ids), '')
+            for _ in range(min(chunk, posts - start))
+        ]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+
+def measure(queries, func):
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        begin = time.perf_counter()
+        func(query)
+        latencies.append(time.perf_counter() - begin)
+    return utils.summary(latencies, time.perf_counter() - started)
+
+
+def run(posts, queries, like_queries, seed=0):
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from posts import search
+    from posts.models import Post
+
+    rng = random.Random(seed)
+    words = vocabulary(20000, rng)
+    started = time.perf_counter()
+    fill(posts, words, rng)
+    filled = time.perf_counter() - started
+    started = time.perf_counter()
+    search.rebuild()
+    indexed = time.perf_counter() - started
+    print(f'Корпус: {posts} постов за {filled:.1f} с, '
+          f'индекс за {indexed:.1f} с.')
+
+    # Частые, средние и редкие слова, по одному и парами.
+    samples = {
+        'частое слово': words[:20],
+        'среднее слово': words[200:2000],
+        'редкое слово': words[10000:],
+    }
+    author = get_user_model().objects.first()
+    results = {}
+    for name, pool in samples.items():
+        batch = [rng.choice(pool) for _ in range(queries)]
+        results[f'fts: {name}'] = measure(
+            batch,
+            lambda query: search.SearchPaginator(
+                query, settings.POST_ON_PAGE).get_page(),
+        )
+    pairs = [f'{rng.choice(words[:200])} {rng.choice(words[200:2000])}'
+             for _ in range(queries)]
+    results['fts: два слова'] = measure(
+        pairs,
+        lambda query: search.SearchPaginator(
+            query, settings.POST_ON_PAGE).get_page(),
+    )
+    results['fts: два слова + автор'] = measure(
+        pairs,
+        lambda query: search.SearchPaginator(
+            query, settings.POST_ON_PAGE, author=author).get_page(),
+    )
+    results['like: редкое слово'] = measure(
+        [rng.choice(samples['редкое слово']) for _ in range(like_queries)],
+        lambda query: list(Post.objects.filter(
+            text__icontains=query).order_by('-pub_date')[
+            :settings.POST_ON_PAGE]),
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--like-queries', type=int, default=5,
+                        help='запросов через LIKE (каждый читает всю '
+                             'таблицу)')
+    parser.add_argument('--db', help='файл базы (по умолчанию временный)')
+    args = parser.parse_args()
+
+    utils.setup(args.db)
+    results = run(args.posts, args.queries, args.like_queries)
+    print(f'{"запрос":<26}{"p50, мс":>10}{"p95, мс":>10}{"p99, мс":>10}')
+    for name, result in results.items():
+        print(f'{name:<26}{result["p50_ms"]:>10.2f}'
+              f'{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
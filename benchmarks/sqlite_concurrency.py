@@ -0,0 +1,156 @@
+"""
+Параллельная запись и чтение в SQLite из нескольких процессов.
+
+Каждый воркер имитирует запросы сервера: перед «запросом» и после него
+вызывает close_old_connections(), как это делают обработчики Django, и
+выполняет ту же работу, что представления — новые посты, комментарии,
+подписки и чтение лент. Сравнивает стандартный бэкенд
+(journal_mode=delete, новое соединение на каждый запрос) с
+yatube.sqlite3 из настроек проекта: доля ошибок `database is locked`
+и запросов в секунду.
+
+    python -m benchmarks.sqlite_concurrency --workers 8 --duration 10
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import utils
+
+MODES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {},
+    },
+    # Настройки из yatube/settings.py.
+    'tuned': {},
+}
+
+WRITE_SHARE = 0.3
+
+
+def _write(rng, users, posts):
+    from posts.models import Comment, Follow, Post
+
+    user = rng.choice(users)
+    kind = rng.random()
+    if kind < 0.3:
+        Post.objects.create(author_id=user, text='Новый пост')
+    elif kind < 0.8:
+        Comment.objects.create(author_id=user, post_id=rng.choice(posts),
+                               text='Класс!')
+    else:
+        author = rng.choice(users)
+        follow = Follow.objects.filter(user_id=user, author_id=author)
+        if follow.exists():
+            follow.delete()
+        elif author != user:
+            Follow.objects.create(user_id=user, author_id=author)
+
+
+def _read(rng, users, posts):
+    from django.contrib.auth import get_user_model
+    from posts import feed, queries
+    from posts.models import Post
+
+    kind = rng.random()
+    if kind < 0.5:
+        list(queries.index_posts()[:10])
+    elif kind < 0.8:
+        post = Post.objects.get(id=rng.choice(posts))
+        list(queries.post_comments(post)[:20])
+    else:
+        user = get_user_model().objects.get(id=rng.choice(users))
+        list(feed.follow_feed(user)[:10])
+
+
+def drive(duration, users, posts):
+    from django.db import OperationalError, close_old_connections
+
+    rng = random.Random(os.getpid())
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        action = _write if rng.random() < WRITE_SHARE else _read
+        started = time.perf_counter()
+        close_old_connections()
+        try:
+            action(rng, users, posts)
+        except OperationalError:
+            errors += 1
+        finally:
+            close_old_connections()
+        latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def run_mode(mode, args):
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+    utils.setup(db_path, **MODES[mode])
+    from django.db import connection
+    if mode == 'default':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode = delete')
+
+    from benchmarks import data
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from posts.models import Post
+
+    data.generate(users=args.users, posts=args.posts)
+    users = list(get_user_model().objects.values_list('id', flat=True))
+    posts = list(Post.objects.values_list('id', flat=True))
+    # Без кеша, чтобы чтение каждый раз шло в базу.
+    with override_settings(CACHES=utils.DUMMY_CACHES):
+        results, elapsed = utils.run_workers(
+            drive, args.workers, args.duration, users, posts,
+        )
+    latencies = [value for batch, _ in results for value in batch]
+    errors = sum(errors for _, errors in results)
+    return dict(
+        utils.summary(latencies, elapsed),
+        errors=errors,
+        error_rate=errors / len(latencies) if latencies else 0.0,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--mode', choices=MODES,
+                        help='только один режим, вывод в JSON')
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    print(f'{"режим":<10}{"запросов":>10}{"rps":>9}{"p50, мс":>10}'
+          f'{"p99, мс":>10}{"ошибок":>9}')
+    for mode in MODES:
+        # Каждый режим в отдельном процессе: Django настраивается один раз.
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'benchmarks.sqlite_concurrency',
+             '--mode', mode, '--workers', str(args.workers),
+             '--duration', str(args.duration), '--users', str(args.users),
+             '--posts', str(args.posts)],
+            cwd=utils.BASE_DIR,
+        )
+        row = json.loads(output.decode().splitlines()[-1])
+        print(f'{mode:<10}{row["requests"]:>10}{row["rps"]:>9.1f}'
+              f'{row["p50_ms"]:>10.1f}{row["p99_ms"]:>10.1f}'
+              f'{row["error_rate"]:>8.1%}')
+
+
+if __name__ == '__main__':
+    main()
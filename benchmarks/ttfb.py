@@ -0,0 +1,88 @@
+"""
+Время до первого байта (TTFB) и до конца ответа для `index`, `profile` и
+`post` с обычной и потоковой отдачей (settings.STREAMING_FEEDS).
+
+Сервер — тот же многопоточный WSGI-сервер, что и в нагрузочном тесте,
+кеш выключен, чтобы каждая страница рендерилась заново.
+
+    python -m benchmarks.ttfb --per-page 50 --requests 30
+"""
+import argparse
+import http.client
+import statistics
+import time
+
+from benchmarks import load, utils
+
+MODES = {
+    'buffered': (),
+    'streaming': ('index', 'profile', 'post'),
+}
+
+
+def fetch(port, path):
+    """
+    (TTFB, полное время) запроса `path` в мс.
+    """
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    started = time.perf_counter()
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read1(1)
+    first_byte = time.perf_counter() - started
+    response.read()
+    total = time.perf_counter() - started
+    connection.close()
+    return first_byte * 1000, total * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--per-page', type=int, default=50)
+    parser.add_argument('--comments', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=30)
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.db.models import Count
+    from django.test import override_settings
+    from benchmarks import data
+    from posts.models import Post
+
+    data.generate(users=20, posts=2000, comments=args.comments)
+    post = Post.objects.annotate(total=Count('comments')).order_by(
+        '-total').select_related('author').first()
+    username = post.author.username
+    pages = {
+        'index': '/',
+        'profile': f'/{username}/',
+        'post': f'/{username}/{post.id}/',
+    }
+
+    print(f'{"режим":<12}{"страница":<10}{"TTFB, мс":>10}{"всего, мс":>11}')
+    for number, (mode, feeds) in enumerate(MODES.items()):
+        overrides = override_settings(
+            STREAMING_FEEDS=feeds,
+            CACHES=utils.DUMMY_CACHES,
+            POST_ON_PAGE=args.per_page,
+            COMMENTS_ON_PAGE=args.comments,
+        )
+        overrides.enable()
+        port = args.port + number
+        process = load.serve(port)
+        try:
+            for page, path in pages.items():
+                fetch(port, path)
+                timings = [fetch(port, path) for _ in range(args.requests)]
+                first_byte = statistics.median(t[0] for t in timings)
+                total = statistics.median(t[1] for t in timings)
+                print(f'{mode:<12}{page:<10}{first_byte:>10.1f}'
+                      f'{total:>11.1f}')
+        finally:
+            process.kill()
+            overrides.disable()
+
+
+if __name__ == '__main__':
+    main()
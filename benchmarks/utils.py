@@ -0,0 +1,110 @@
+"""
+Общие помощники бенчмарков: Django на отдельной базе SQLite, запуск
+воркеров в нескольких процессах и перцентили.
+"""
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup(db_path=None, **database):
+    """
+    Настраивает Django на базу `db_path` (по умолчанию — временный файл)
+    и применяет миграции. `database` переопределяет остальные ключи
+    DATABASES['default'], например ENGINE. Возвращает путь к базе.
+    """
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default'].update(database, NAME=db_path)
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def local_caches(location):
+    """
+    Настройка CACHES с двухуровневым кешем в каталоге `location`.
+    """
+    return {
+        'default': {
+            'BACKEND': 'yatube.cache_backends.TieredCache',
+            'OPTIONS': {
+                'SHARED': {
+                    'BACKEND': 'yatube.cache_backends.FileBasedCache',
+                    'LOCATION': os.path.join(location, 'default'),
+                    'OPTIONS': {'MAX_ENTRIES': 10000},
+                },
+            },
+        },
+        'generations': {
+            'BACKEND': 'yatube.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(location, 'generations.sqlite3'),
+            'TIMEOUT': None,
+        },
+    }
+
+
+DUMMY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+def _worker(args):
+    func, worker_args = args
+    from django.db import connections
+    connections.close_all()
+    return func(*worker_args)
+
+
+def run_workers(func, workers, *args):
+    """
+    Запускает `func(*args)` в `workers` процессах (fork, чтобы воркеры
+    унаследовали настроенный Django). Возвращает (результаты, время).
+    """
+    from django.db import connections
+    connections.close_all()
+    context = multiprocessing.get_context('fork')
+    started = time.perf_counter()
+    with context.Pool(workers) as pool:
+        results = pool.map(_worker, [(func, args)] * workers)
+    return results, time.perf_counter() - started
+
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * len(values))))
+    return values[index]
+
+
+def summary(latencies, elapsed):
+    """
+    Сводка по списку задержек в секундах.
+    """
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
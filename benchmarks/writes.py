@@ -0,0 +1,106 @@
+"""
+Записи в секунду при конкуренции: воркеры подписываются, отписываются и
+комментируют одни и те же несколько пар пользователей. Сравнивает прежний
+путь представлений (exists() + create(), загрузка поста целиком) с
+posts.services.
+
+    python -m benchmarks.writes --workers 8 --duration 10
+"""
+import argparse
+import os
+import random
+import time
+
+from benchmarks import utils
+
+
+def legacy(user_id, author_id, post_id, action):
+    from posts.models import Comment, Follow, Post
+
+    if action == 'follow':
+        if not Follow.objects.filter(user_id=user_id,
+                                     author_id=author_id).exists():
+            Follow.objects.create(user_id=user_id, author_id=author_id)
+    elif action == 'unfollow':
+        follow = Follow.objects.filter(user_id=user_id,
+                                       author_id=author_id).first()
+        if follow is not None:
+            follow.delete()
+    else:
+        post = Post.objects.get(pk=post_id)
+        Comment.objects.create(post=post, author_id=user_id, text='Класс!')
+
+
+def service(user_id, author_id, post_id, action):
+    from posts import services
+
+    if action == 'follow':
+        services.follow(user_id, author_id)
+    elif action == 'unfollow':
+        services.unfollow(user_id, author_id)
+    else:
+        services.add_comment(post_id, user_id, 'Класс!')
+
+
+MODES = {'legacy': legacy, 'services': service}
+
+
+def drive(mode, duration, users, posts):
+    from django.db import DatabaseError, IntegrityError
+
+    rng = random.Random(os.getpid())
+    write = MODES[mode]
+    latencies = []
+    conflicts = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        user_id, author_id = rng.sample(users, 2)
+        action = rng.choice(('follow', 'unfollow', 'comment'))
+        started = time.perf_counter()
+        try:
+            write(user_id, author_id, rng.choice(posts), action)
+        except IntegrityError:
+            conflicts += 1
+        except DatabaseError:
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    return latencies, conflicts, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--hot-users', type=int, default=4,
+                        help='сколько пользователей делят все записи')
+    args = parser.parse_args()
+
+    utils.setup()
+    from django.contrib.auth import get_user_model
+    from django.test import override_settings
+    from benchmarks import data
+    from posts.models import Post
+
+    data.generate(users=100, posts=2000)
+    users = list(get_user_model().objects.order_by('id').values_list(
+        'id', flat=True)[:args.hot_users])
+    posts = list(Post.objects.filter(author_id__in=users).values_list(
+        'id', flat=True)) or [Post.objects.values_list('id', flat=True)[0]]
+
+    print(f'{"режим":<10}{"записей/с":>11}{"p50, мс":>10}{"p99, мс":>10}'
+          f'{"конфликтов":>12}{"ошибок":>8}')
+    with override_settings(CACHES=utils.DUMMY_CACHES):
+        for mode in MODES:
+            results, elapsed = utils.run_workers(
+                drive, args.workers, mode, args.duration, users, posts,
+            )
+            latencies = [value for batch, _, _ in results for value in batch]
+            row = utils.summary(latencies, elapsed)
+            conflicts = sum(result[1] for result in results)
+            errors = sum(result[2] for result in results)
+            print(f'{mode:<10}{row["rps"]:>11.1f}{row["p50_ms"]:>10.1f}'
+                  f'{row["p99_ms"]:>10.1f}{conflicts:>12}{errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
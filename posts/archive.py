@@ -0,0 +1,125 @@
+"""
+Архив автора: его посты и комментарии в NDJSON (формат `export_yatube`)
+и, для zip, картинки постов. Архив собирается на лету: базу читаем
+пачками через iterator(), а наружу отдаём куски по мере готовности,
+поэтому память не растёт с числом постов, а первые байты уходят сразу.
+"""
+import zipfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+
+from . import transfer
+from .models import Comment, Post
+
+NDJSON = 'ndjson'
+ZIP = 'zip'
+FORMATS = (ZIP, NDJSON)
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    ZIP: 'application/zip',
+}
+
+# Сколько байт копить перед отдачей очередного куска.
+CHUNK = 64 * 1024
+
+
+def rows(user, chunk_size=2000):
+    yield from transfer.export_rows(
+        Post, chunk_size, Post.objects.filter(author=user)
+    )
+    yield from transfer.export_rows(
+        Comment, chunk_size, Comment.objects.filter(author=user)
+    )
+
+
+def ndjson(user, chunk_size=2000):
+    """
+    Архив в NDJSON кусками примерно по CHUNK байт.
+    """
+    buffer = []
+    size = 0
+    for row in rows(user, chunk_size):
+        line = transfer.ndjson_line(row).encode()
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+class _Pipe:
+    """
+    Файл только для записи: ZipFile пишет в него, а генератор забирает
+    накопленное. Позицию ZipFile узнаёт через tell(); seek() не нужен —
+    для таких потоков zipfile пишет размеры после данных.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks, self.size = [], 0
+        return data
+
+
+def images(user, chunk_size=2000):
+    return Post.objects.filter(author=user).exclude(image='').order_by(
+        'pk').values_list('image', flat=True).iterator(chunk_size=chunk_size)
+
+
+def zip_archive(user, chunk_size=2000):
+    """
+    Zip с `posts.ndjson` и каталогом `images/`. Картинки уже сжаты,
+    поэтому кладутся без компрессии.
+    """
+    pipe = _Pipe()
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.ndjson', 'w', force_zip64=True) as entry:
+            # Заголовок записи уходит сразу, не дожидаясь сжатых данных.
+            yield pipe.take()
+            for chunk in ndjson(user, chunk_size):
+                entry.write(chunk)
+                if pipe.size >= CHUNK:
+                    yield pipe.take()
+        for name in images(user, chunk_size):
+            try:
+                source = default_storage.open(name, 'rb')
+            except (OSError, SuspiciousFileOperation):
+                continue
+            info = zipfile.ZipInfo(f'images/{name}')
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(CHUNK), b''):
+                    entry.write(chunk)
+                    yield pipe.take()
+    if pipe.size:
+        yield pipe.take()
+
+
+def stream(user, format=ZIP, chunk_size=2000):
+    if format == NDJSON:
+        return ndjson(user, chunk_size)
+    return zip_archive(user, chunk_size)
+
+
+def filename(user, format=ZIP):
+    return f'{user.username}.{format}'
@@ -0,0 +1,92 @@
+"""
+Бюджеты представлений: сколько SQL-запросов и миллисекунд может занять
+один запрос к странице. Бюджеты задаются в settings.VIEW_BUDGETS по имени
+URL; превышение пишет в лог QueryBudgetMiddleware, а в тестах проверяет
+BudgetTestMixin (posts/tests/test_budgets.py).
+"""
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+class Usage:
+    def __init__(self):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.ms = 0.0
+
+    def __repr__(self):
+        return (f'<Usage {self.queries} queries, {self.ms:.1f} ms '
+                f'({self.db_ms:.1f} ms in db)>')
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка для connection.execute_wrapper.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+
+@contextmanager
+def track(usage=None):
+    """
+    Считает запросы ко всем базам и время выполнения блока; с `usage`
+    прибавляет их к уже посчитанным.
+    """
+    if usage is None:
+        usage = Usage()
+    started = time.perf_counter()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(usage))
+        try:
+            yield usage
+        finally:
+            usage.ms += (time.perf_counter() - started) * 1000
+
+
+def track_stream(content, usage, finish):
+    """
+    Тело потокового ответа `content`, чтение которого досчитывается в
+    `usage`: карточки рендерятся уже после выхода из представления.
+    Ожидание клиента между кусками не считается. Когда тело прочитано
+    (или ответ закрыт раньше), вызывает `finish()`.
+    """
+    iterator = iter(content)
+    try:
+        while True:
+            with track(usage):
+                chunk = next(iterator, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        finish()
+
+
+def budget_for(url_name):
+    return getattr(settings, 'VIEW_BUDGETS', {}).get(url_name)
+
+
+def exceeded(url_name, usage):
+    """
+    Список нарушений бюджета `url_name`, пустой — если бюджета нет или он
+    соблюдён.
+    """
+    budget = budget_for(url_name)
+    if not budget:
+        return []
+    problems = []
+    if 'queries' in budget and usage.queries > budget['queries']:
+        problems.append(
+            f'{usage.queries} SQL-запросов при бюджете {budget["queries"]}'
+        )
+    if 'ms' in budget and usage.ms > budget['ms']:
+        problems.append(
+            f'{usage.ms:.0f} мс при бюджете {budget["ms"]} мс'
+        )
+    return problems
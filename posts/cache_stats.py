@@ -0,0 +1,90 @@
+"""
+Попадания и промахи по закешированным фрагментам лент.
+
+Счётчики копятся в памяти процесса и не чаще раза в
+CACHE_STATS_FLUSH_SECONDS добавляются к общим в кеше поколений, так что
+рендер фрагмента не ходит в кеш ради статистики. read() и reset() сначала
+сбрасывают счётчики своего процесса.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .generations import get_cache
+
+KEY_PREFIX = 'cache_stats'
+NAMES_KEY = f'{KEY_PREFIX}:names'
+
+_lock = threading.Lock()
+_pending = Counter()
+_flushed = time.monotonic()
+
+
+def _key(name, kind):
+    return f'{KEY_PREFIX}:{name}:{kind}'
+
+
+def record(name, hit):
+    """
+    Учитывает попадание (`hit=True`) или промах по фрагменту `name`.
+    """
+    global _flushed
+    with _lock:
+        _pending[name, 'hits' if hit else 'misses'] += 1
+        now = time.monotonic()
+        if now - _flushed < settings.CACHE_STATS_FLUSH_SECONDS:
+            return
+        _flushed = now
+    flush()
+
+
+def flush():
+    """
+    Добавляет накопленные в процессе счётчики к общим.
+    """
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return
+    cache = get_cache()
+    names = cache.get(NAMES_KEY, set())
+    new_names = {name for name, kind in pending} - names
+    if new_names:
+        cache.set(NAMES_KEY, names | new_names, timeout=None)
+    for (name, kind), count in pending.items():
+        key = _key(name, kind)
+        if not cache.add(key, count, timeout=None):
+            try:
+                cache.incr(key, count)
+            except ValueError:
+                cache.set(key, count, timeout=None)
+
+
+def read():
+    """
+    Статистика по фрагментам: {имя: (попадания, промахи)}.
+    """
+    flush()
+    cache = get_cache()
+    names = sorted(cache.get(NAMES_KEY, set()))
+    keys = [_key(name, kind) for name in names for kind in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    return {
+        name: (values.get(_key(name, 'hits'), 0),
+               values.get(_key(name, 'misses'), 0))
+        for name in names
+    }
+
+
+def reset():
+    with _lock:
+        _pending.clear()
+    cache = get_cache()
+    names = cache.get(NAMES_KEY, set())
+    cache.delete_many(
+        [_key(name, kind) for name in names for kind in ('hits', 'misses')]
+        + [NAMES_KEY]
+    )
@@ -0,0 +1,91 @@
+"""
+Готовый HTML карточек постов.
+
+Карточка лежит в кеше под ключом из id поста вместе с версией — временем
+изменения поста, числом комментариев и группой. Лента достаёт карточки
+всей страницы одним `get_many`; устаревшие и отсутствующие рендерит
+заново и записывает одним `set_many`. Карточка обычной ленты
+заготавливается сразу при сохранении поста.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import loaders
+
+POST_CARD = 'mini_templates/post_post.html'
+GROUP_CARD = 'mini_templates/group_post.html'
+
+# Короткие имена шаблонов для ключей кеша.
+TEMPLATES = {POST_CARD: 'post', GROUP_CARD: 'group'}
+
+
+def _key(template_name, post_id, is_owner):
+    return f'post_card:{TEMPLATES[template_name]}:{post_id}:{int(is_owner)}'
+
+
+def version(post):
+    """
+    Версия карточки: время изменения поста (правка, новые превью, новое
+    имя автора или группы), число комментариев и группа.
+    """
+    return f'{post.updated.isoformat()}:{post.comments_count}:{post.group_id}'
+
+
+def _render(post, template_name, is_owner):
+    return render_to_string(
+        template_name, {'post': post, 'is_owner': is_owner}
+    )
+
+
+def render_many(posts, template_name=POST_CARD, is_owner=False):
+    """
+    HTML карточек `posts` подряд. `is_owner` — показывать ли кнопку
+    «Редактировать».
+    """
+    posts = list(posts)
+    keys = [_key(template_name, post.id, is_owner) for post in posts]
+    found = cache.get_many(keys)
+    chunks = []
+    missing = {}
+    for post, key in zip(posts, keys):
+        entry = found.get(key)
+        if entry is not None and entry[0] == version(post):
+            chunks.append(entry[1])
+            continue
+        html = _render(post, template_name, is_owner)
+        missing[key] = (version(post), html)
+        chunks.append(html)
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return mark_safe(''.join(chunks))
+
+
+def stream(posts, template_name=POST_CARD, is_owner=False):
+    """
+    Карточки страницы `posts` пачками по мере чтения постов.
+    """
+    for chunk in loaders.iterate(posts, settings.STREAMING_CHUNK_SIZE):
+        yield render_many(chunk, template_name, is_owner)
+
+
+def fill(post):
+    """
+    Заготавливает карточки только что сохранённого поста.
+    """
+    templates = [POST_CARD] + ([GROUP_CARD] if post.group_id else [])
+    cache.set_many({
+        _key(template_name, post.id, False): (
+            version(post), _render(post, template_name, False)
+        )
+        for template_name in templates
+    }, settings.POST_CARD_CACHE_TIMEOUT)
+
+
+def forget(post_id):
+    cache.delete_many([
+        _key(template_name, post_id, is_owner)
+        for template_name in TEMPLATES
+        for is_owner in (False, True)
+    ])
@@ -0,0 +1,92 @@
+"""
+Условные GET-запросы для лент и страницы поста.
+
+ETag собирается из поколений кеша (posts/generations.py) тех областей, из
+которых состоит страница, и из того, кто её смотрит (пользователь, его
+сессия и cookie CSRF). Поколения меняются
+при любом изменении, которое видно на странице, поэтому совпавший
+If-None-Match можно подтвердить ответом 304 до запросов к лентам и
+рендеринга шаблона — это стоит одного обращения к кешу.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import quote_etag
+
+from . import generations, replicas
+
+
+def etag(request, *scopes):
+    csrf = session_key = ''
+    if request.user.is_authenticated:
+        # На страницах пользователя формы с токеном CSRF, а токен меняется
+        # при входе: страница со старым токеном не должна подтверждаться
+        # ответом 304. get_token() заводит cookie, если её ещё нет, чтобы
+        # ETag первого ответа совпал со следующими.
+        get_token(request)
+        csrf = request.META.get('CSRF_COOKIE', '')
+        session_key = request.session.session_key or ''
+    parts = [
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        str(request.user.pk or ''),
+        csrf,
+        session_key,
+        generations.get(*scopes),
+    ]
+    if replicas.read_alias() != 'default':
+        # Реплика может отставать от поколения: такой ETag живёт не дольше
+        # REPLICA_PIN_SECONDS, потом страница отрисуется заново.
+        parts.append(str(int(time.time() // settings.REPLICA_PIN_SECONDS)))
+    digest = hashlib.md5('\n'.join(parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def viewer_scopes(request):
+    """
+    Области, от которых страница зависит из-за того, кто её смотрит:
+    кнопки подписки зависят от его подписок.
+    """
+    if request.user.is_authenticated:
+        return [f'follow:{request.user.pk}']
+    return []
+
+
+def check(request, *scopes):
+    """
+    (ETag, ответ 304 или None). Если ответ есть — его и нужно вернуть.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None, None
+    tag = etag(request, *scopes, *viewer_scopes(request))
+    response = get_conditional_response(request, etag=tag)
+    if response is not None:
+        response = finish(request, response, tag)
+    return tag, response
+
+
+def finish(request, response, tag):
+    """
+    Добавляет ETag и заголовки кеширования к отрисованной странице.
+
+    Анонимные страницы может держать обратный прокси (s-maxage), браузер
+    же каждый раз переспрашивает сервер и получает дешёвый 304.
+    Страницы пользователя — только в его браузере.
+    """
+    if tag is None:
+        return response
+    response['ETag'] = tag
+    patch_vary_headers(response, ('Cookie',))
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=0,
+            s_maxage=settings.PROXY_CACHE_SECONDS,
+        )
+    return response
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Profile
+
+from .models import Comment, Follow, Post
+
+User = get_user_model()
+
+
+def _count(queryset, field, outer='pk'):
+    """
+    Подзапрос COUNT(*) по строкам `queryset`, у которых `field` совпадает
+    с полем `outer` обновляемой строки.
+    """
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef(outer)}).order_by().values(
+            field).annotate(total=Count('pk')).values('total'),
+        output_field=IntegerField(),
+    ), 0)
+
+
+def _change(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_comments(post_id, delta):
+    _change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def change_profile(user_id, field, delta):
+    profiles = Profile.objects.filter(user_id=user_id)
+    if not _change(profiles, field, delta) and (
+            delta > 0 or profiles.exists()):
+        # Профиля ещё нет (например, пользователь загружен bulk_create):
+        # создаём его сразу с точными значениями. При уменьшении профиль
+        # не создаётся — его мог только что удалить каскад вместе с
+        # пользователем.
+        recount_profiles([user_id])
+
+
+def profile_for(user):
+    """
+    Профиль пользователя; отсутствующий создаётся с пересчитанными
+    счётчиками.
+    """
+    try:
+        return user.profile
+    except Profile.DoesNotExist:
+        recount_profiles([user.pk])
+        user.profile = Profile.objects.get(user=user)
+        return user.profile
+
+
+def recount_posts(post_ids=None):
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    return posts.update(comments_count=_count(Comment.objects, 'post'))
+
+
+def recount_profiles(user_ids=None):
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    Profile.objects.bulk_create(
+        [
+            Profile(user_id=user_id)
+            for user_id in users.filter(profile__isnull=True).values_list(
+                'pk', flat=True)
+        ],
+        ignore_conflicts=True,
+    )
+    profiles = Profile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    return profiles.update(
+        posts_count=_count(Post.objects, 'author', 'user_id'),
+        followers_count=_count(Follow.objects, 'author', 'user_id'),
+        following_count=_count(Follow.objects, 'user', 'user_id'),
+    )
@@ -0,0 +1,180 @@
+from django.conf import settings
+from django.db.models import F, Q
+
+from users.models import Profile
+
+from . import follow_graph, generations
+from .models import FeedEntry, Follow, Post
+
+PULL = 'pull'
+PUSH = 'push'
+
+BATCH_SIZE = 500
+
+
+def _mode():
+    return getattr(settings, 'FOLLOW_FEED_MODE', PULL)
+
+
+def _fanout_limit():
+    return getattr(settings, 'FOLLOW_FEED_FANOUT_LIMIT', None)
+
+
+def _bulk_insert(entries):
+    total = 0
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+def heavy_author_ids(user):
+    """
+    Авторы из подписок `user`, чьи посты не раскладываются по входящим
+    (см. is_heavy) и читаются при запросе.
+    """
+    limit = _fanout_limit()
+    if limit is None:
+        return []
+    return list(
+        Profile.objects.filter(
+            Q(feed_pull=True) | Q(followers_count__gt=limit),
+            user__following__user=user,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def is_heavy(author_id):
+    """
+    Подписчиков у автора больше FOLLOW_FEED_FANOUT_LIMIT — или было
+    больше когда-то: такой автор остаётся «тяжёлым», иначе посты, не
+    разложенные по входящим, пропали бы из лент, когда подписчиков
+    станет меньше.
+    """
+    limit = _fanout_limit()
+    if limit is None:
+        return False
+    profile = Profile.objects.filter(user_id=author_id).values_list(
+        'followers_count', 'feed_pull').first()
+    if profile is None:
+        return False
+    followers_count, feed_pull = profile
+    if feed_pull:
+        return True
+    if followers_count > limit:
+        Profile.objects.filter(user_id=author_id).update(feed_pull=True)
+        return True
+    return False
+
+
+def fan_out(post):
+    """
+    Раскладывает новый пост по входящим всех подписчиков автора.
+    """
+    if _mode() != PUSH or is_heavy(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True).iterator()
+    _bulk_insert(
+        FeedEntry(
+            user_id=user_id,
+            post_id=post.id,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids
+    )
+
+
+def generation(user):
+    """
+    Поколение закешированной ленты подписок `user`: его собственное
+    (подписки, отписки) и поколения авторов, на которых он подписан, —
+    изменение поста сбрасывает одно поколение автора, а не ленты всех
+    его подписчиков.
+    """
+    return generations.get(f'follow:{user.id}', *(
+        f'author:{author_id}'
+        for author_id in follow_graph.following(user.id)
+    ))
+
+
+def backfill(user_id, author_id):
+    """
+    Добавляет во входящие `user_id` уже опубликованные посты `author_id`.
+    """
+    if _mode() != PUSH or is_heavy(author_id):
+        return 0
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'id', 'author_id', 'pub_date'
+    ).iterator()
+    return _bulk_insert(
+        FeedEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=post_author_id,
+            pub_date=pub_date,
+        )
+        for post_id, post_author_id, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    """
+    Убирает из входящих `user_id` посты автора, от которого он отписался.
+    """
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def rebuild(user_ids=None):
+    """
+    Пересобирает входящие с нуля (для всех или только для `user_ids`).
+    Возвращает число добавленных записей.
+    """
+    entries = FeedEntry.objects.all()
+    follows = Follow.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+        follows = follows.filter(user_id__in=user_ids)
+    entries.delete()
+    if _mode() != PUSH:
+        return 0
+    return sum(
+        backfill(user_id, author_id)
+        for user_id, author_id in follows.values_list(
+            'user_id', 'author_id').iterator()
+    )
+
+
+def follow_feed(user, heavy=None):
+    """
+    Посты авторов, на которых подписан `user`.
+
+    В режиме push читаются из входящих; посты «тяжёлых» авторов
+    (`heavy`, по умолчанию heavy_author_ids(user)) подмешиваются при
+    чтении (гибридный режим).
+    """
+    if _mode() != PUSH:
+        return Post.objects.filter(author__following__user=user)
+    if heavy is None:
+        heavy = heavy_author_ids(user)
+    if not heavy:
+        # Оба ключа — столбцы входящих, чтобы сортировку дал индекс
+        # (user, pub_date, post); строка '-feed_entries__post' подставила бы
+        # сортировку модели Post.
+        return Post.objects.filter(feed_entries__user=user).order_by(
+            F('feed_entries__pub_date').desc(),
+            F('feed_entries__post_id').desc(),
+        )
+    return Post.objects.filter(
+        Q(id__in=FeedEntry.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=heavy)
+    )
@@ -0,0 +1,123 @@
+"""
+Граф подписок: для каждого пользователя отсортированные массивы id тех,
+на кого он подписан, и его подписчиков.
+
+Массивы (array('i'), 4 байта на id) загружаются из базы при первом
+обращении и лежат в кеше поколений — общем для всех процессов и без
+локального уровня. Подписка и отписка вставляют или удаляют один id в
+закешированных массивах обоих пользователей (бинарным поиском), так что
+массив популярного автора не перечитывается из базы целиком.
+
+Если массива в кеше нет (его, возможно, прямо сейчас читает из базы
+другой процесс) или его уже меняет другой процесс, начинается новое
+поколение владельца массива: оно входит в ключ, и массив, прочитанный до
+подписки, остаётся под старым ключом. Изменение повторяется после
+фиксации транзакции, а ключи живут не дольше FOLLOW_GRAPH_TIMEOUT.
+"""
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+
+from . import generations
+from .models import Follow
+
+KEY_PREFIX = 'follow_graph'
+
+# Сколько секунд держится блокировка изменения одного массива.
+LOCK_TIMEOUT = 5
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+# Направление -> (поле, по которому ищем, поле с результатом).
+_FIELDS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _scope(direction, user_id):
+    return f'{KEY_PREFIX}:{direction}:{user_id}'
+
+
+def _key(direction, user_id):
+    # Поколение GLOBAL сбрасывает граф после массовой загрузки данных.
+    generation = generations.get(_scope(direction, user_id))
+    return f'{KEY_PREFIX}:{generation}:{direction}:{user_id}'
+
+
+def _load(direction, user_id):
+    field, other = _FIELDS[direction]
+    return array('i', Follow.objects.filter(**{field: user_id}).order_by(
+        other).values_list(other, flat=True))
+
+
+def ids(direction, user_id):
+    """
+    Отсортированный массив id для `user_id` в направлении `direction`.
+    """
+    cache = generations.get_cache()
+    key = _key(direction, user_id)
+    value = cache.get(key)
+    if value is None:
+        value = _load(direction, user_id)
+        cache.set(key, value, timeout=settings.FOLLOW_GRAPH_TIMEOUT)
+    return value
+
+
+def following(user_id):
+    return ids(FOLLOWING, user_id)
+
+
+def followers(user_id):
+    return ids(FOLLOWERS, user_id)
+
+
+def _contains(values, value):
+    index = bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+def follows(user_id, author_id):
+    if not user_id:
+        return False
+    return _contains(following(user_id), author_id)
+
+
+def _update(direction, user_id, other_id, added):
+    cache = generations.get_cache()
+    key = _key(direction, user_id)
+    lock = f'{key}:lock'
+    if cache.add(lock, 1, timeout=LOCK_TIMEOUT):
+        try:
+            values = cache.get(key)
+            if values is not None:
+                index = bisect_left(values, other_id)
+                present = (index < len(values)
+                           and values[index] == other_id)
+                if added and not present:
+                    values.insert(index, other_id)
+                elif not added and present:
+                    del values[index]
+                cache.set(key, values, timeout=settings.FOLLOW_GRAPH_TIMEOUT)
+                return
+        finally:
+            cache.delete(lock)
+    generations.bump(_scope(direction, user_id))
+
+
+def changed(user_id, author_id, added):
+    """
+    Подписка (`added=True`) или отписка `user_id` от `author_id`:
+    обновляет массивы обоих.
+    """
+    def apply():
+        _update(FOLLOWING, user_id, author_id, added)
+        _update(FOLLOWERS, author_id, user_id, added)
+
+    apply()
+    if transaction.get_connection().in_atomic_block:
+        # Массив мог загрузить из базы процесс, ещё не видевший подписку.
+        transaction.on_commit(apply)
@@ -1,5 +1,10 @@
 from django import forms
-from .models import Post, Comment
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import Group, Post, Comment
+
+User = get_user_model()
 
 
 class PostForm(forms.ModelForm):
@@ -7,8 +12,43 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ['group', 'text', 'image']
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # У только что загруженного файла ImageField оставляет открытую
+        # картинку: размеры известны из заголовка, без распаковки.
+        size = getattr(getattr(image, 'image', None), 'size', None)
+        if size and size[0] * size[1] > settings.POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Слишком большое изображение: не больше %(limit)d '
+                'мегапикселей.',
+                code='too_many_pixels',
+                params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+            )
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ['text']
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Найти', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        label='Группа',
+        to_field_name='slug',
+        required=False,
+        empty_label='Все группы',
+    )
+    author = forms.CharField(label='Автор', max_length=150, required=False)
+
+    def clean_author(self):
+        username = self.cleaned_data['author']
+        if not username:
+            return None
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            raise forms.ValidationError('Нет такого пользователя.')
+        return author
@@ -0,0 +1,61 @@
+import time
+
+from django.core.cache import InvalidCacheBackendError, caches
+
+KEY_PREFIX = 'generation'
+# Входит в каждое поколение: позволяет сбросить весь кеш лент разом,
+# например после массовой загрузки данных.
+GLOBAL = 'all'
+
+
+def get_cache():
+    """
+    Кеш для поколений и служебных счётчиков: алиас `generations`, если он
+    настроен (без локального уровня, общий для всех процессов), иначе
+    `default`.
+    """
+    try:
+        return caches['generations']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def _key(scope):
+    return f'{KEY_PREFIX}:{scope}'
+
+
+def _token():
+    return str(time.time_ns())
+
+
+def get(*scopes):
+    """
+    Поколения областей `scopes`, склеенные в одну строку для ключа кеша.
+    Ключи без поколения получают новое, поэтому после вытеснения из кеша
+    старые фрагменты просто перестают находиться.
+    """
+    cache = get_cache()
+    keys = [_key(scope) for scope in (GLOBAL, *scopes)]
+    tokens = cache.get_many(keys)
+    missing = {key: _token() for key in keys if key not in tokens}
+    for key, token in missing.items():
+        if not cache.add(key, token, timeout=None):
+            token = cache.get(key, token)
+        tokens[key] = token
+    return '.'.join(tokens[key] for key in keys)
+
+
+def bump(*scopes):
+    """
+    Начинает новое поколение для `scopes`: всё, что было закешировано под
+    старым поколением, становится недостижимым.
+    """
+    if scopes:
+        token = _token()
+        get_cache().set_many(
+            {_key(scope): token for scope in scopes}, timeout=None
+        )
+
+
+def bump_all():
+    bump(GLOBAL)
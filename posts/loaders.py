@@ -0,0 +1,100 @@
+"""
+Загрузка страницы ленты пачками.
+
+Страница собирает id всего, что нужно карточкам, и достаёт каждый вид
+одним запросом: авторы и группы приходят в запросе постов (JOIN), превью —
+одним запросом на посты страницы с картинками. Число комментариев хранится
+в самом посте (Post.comments_count).
+
+Загрузка ленивая: если лента целиком взята из кеша фрагментов, шаблон не
+обращается к постам и ни одного запроса не выполняется.
+"""
+import itertools
+import logging
+
+from django.db.models import QuerySet, prefetch_related_objects
+
+from . import budgets
+
+logger = logging.getLogger(__name__)
+
+
+def hydrate(posts):
+    """
+    Подгружает превью постов `posts` с картинками одним запросом.
+    """
+    with_images = [
+        post for post in posts
+        if post.image and 'thumbnails' not in getattr(
+            post, '_prefetched_objects_cache', {})
+    ]
+    if with_images:
+        prefetch_related_objects(with_images, 'thumbnails')
+
+
+def iterate(posts, chunk_size):
+    """
+    Посты страницы `posts` пачками по `chunk_size`, с превью. Ещё не
+    прочитанная страница читается курсором (QuerySet.iterator), а не
+    целиком.
+    """
+    loader = getattr(posts, 'loader', None)
+    if loader is not None:
+        posts = loader.posts if loader._loaded is None else loader._loaded
+    if isinstance(posts, QuerySet):
+        posts = posts.iterator(chunk_size=chunk_size)
+    posts = iter(posts)
+    while True:
+        chunk = list(itertools.islice(posts, chunk_size))
+        if not chunk:
+            return
+        hydrate(chunk)
+        yield chunk
+
+
+class PageLoader:
+    """
+    Посты страницы ленты `feed`, загружаемые при первом обращении.
+    После загрузки `queries` — сколько SQL-запросов на неё ушло.
+    """
+
+    def __init__(self, posts, feed):
+        self.posts = posts
+        self.feed = feed
+        self.queries = None
+        self._loaded = None
+
+    def __repr__(self):
+        return f'<PageLoader {self.feed}>'
+
+    def load(self):
+        if self._loaded is None:
+            with budgets.track() as usage:
+                posts = list(self.posts)
+                hydrate(posts)
+            self._loaded = posts
+            self.queries = usage.queries
+            logger.debug(
+                'Страница ленты %s: %d постов, %d SQL-запросов',
+                self.feed, len(posts), usage.queries,
+                extra={'feed': self.feed, 'queries': usage.queries},
+            )
+        return self._loaded
+
+    def __len__(self):
+        return len(self.load())
+
+    def __iter__(self):
+        return iter(self.load())
+
+    def __getitem__(self, index):
+        return self.load()[index]
+
+
+def load_page(page, feed):
+    """
+    Подменяет посты страницы `page` на ленивый PageLoader; он же остаётся
+    в `page.loader`, когда Page заменит его списком.
+    """
+    page.loader = page.object_list = PageLoader(page.object_list, feed)
+    return page
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from posts import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша фрагментов лент.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить статистику после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        stats = cache_stats.read()
+        if not stats:
+            self.stdout.write('Статистики пока нет.')
+        else:
+            self.stdout.write(
+                f'{"фрагмент":<20}{"попадания":>12}{"промахи":>12}'
+                f'{"доля":>8}'
+            )
+        for name, (hits, misses) in stats.items():
+            total = hits + misses
+            ratio = hits / total if total else 0
+            self.stdout.write(
+                f'{name:<20}{hits:>12}{misses:>12}{ratio:>8.1%}'
+            )
+        if options['reset']:
+            cache_stats.reset()
+            self.stdout.write(self.style.SUCCESS('Статистика сброшена.'))
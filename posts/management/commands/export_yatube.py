@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и подписки '
+            'в NDJSON или CSV, читая базу пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON (- для вывода в stdout) или каталог для CSV.',
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        # Если данные идут в stdout, ход выгрузки пишем в stderr.
+        log = self.stderr if path == '-' else self.stdout
+        progress = transfer.Progress(log.write)
+        if options['format'] == 'csv':
+            self._export(transfer.write_csv(
+                path, chunk_size=options['chunk_size']), progress)
+        elif path == '-':
+            self._export(transfer.write_ndjson(
+                sys.stdout, chunk_size=options['chunk_size']), progress)
+        else:
+            with open(path, 'w', encoding='utf-8') as stream:
+                self._export(transfer.write_ndjson(
+                    stream, chunk_size=options['chunk_size']), progress)
+        log.write(self.style.SUCCESS(
+            f'Выгружено строк: {progress.total()}, '
+            f'{progress.rate():.0f} строк/с.'
+        ))
+
+    def _export(self, rows, progress):
+        for label in rows:
+            progress.add(label)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Готовит превью картинок для постов, у которых их ещё нет.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать превью и для постов, где они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['force']:
+            posts = posts.filter(thumbnails__isnull=True)
+        total = 0
+        for post in posts.iterator():
+            total += thumbnails.generate(post)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, создано превью: {total}.'
+        ))
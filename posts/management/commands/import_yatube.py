@@ -0,0 +1,79 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает выгрузку export_yatube (NDJSON или CSV) через '
+            'bulk_create и пересчитывает производные данные.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON (- для чтения из stdin), каталог с CSV или '
+                 'JSON-массив в формате dumpdata.',
+        )
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv', 'json'),
+            help='По умолчанию определяется по пути.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--ignore-conflicts', action='store_true',
+            help='Пропускать строки, которые уже есть в базе.',
+        )
+        parser.add_argument(
+            '--no-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поисковый индекс.',
+        )
+
+    def _format(self, path, chosen):
+        if chosen:
+            return chosen
+        if os.path.isdir(path):
+            return 'csv'
+        if path.endswith('.json'):
+            return 'json'
+        return 'ndjson'
+
+    def handle(self, *args, **options):
+        path = options['path']
+        source_format = self._format(path, options['format'])
+        if path != '-' and not os.path.exists(path):
+            raise CommandError(f'Нет такого файла: {path}')
+        progress = transfer.Progress(self.stdout.write)
+        if source_format == 'csv':
+            loaded = self._load(transfer.read_csv(path), options, progress)
+        elif path == '-':
+            loaded = self._load(
+                self._read(sys.stdin, source_format), options, progress)
+        else:
+            with open(path, encoding='utf-8') as stream:
+                loaded = self._load(
+                    self._read(stream, source_format), options, progress)
+        for label, count in loaded.items():
+            self.stdout.write(f'{label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {progress.total()}, '
+            f'{progress.rate():.0f} строк/с.'
+        ))
+        if not options['no_rebuild']:
+            self.stdout.write('Пересчёт счётчиков, лент и поиска...')
+            transfer.rebuild()
+            self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def _read(self, stream, source_format):
+        if source_format == 'json':
+            return transfer.read_json(stream)
+        return transfer.read_ndjson(stream)
+
+    def _load(self, rows, options, progress):
+        return transfer.load(
+            rows,
+            batch_size=options['batch_size'],
+            ignore_conflicts=options['ignore_conflicts'],
+            progress=progress,
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс постов.'
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError(
+                'Полнотекстовый индекс поддерживается только на SQLite.'
+            )
+        total = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, постов в индексе: {total}.'
+        ))
@@ -0,0 +1,78 @@
+import logging
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from . import budgets, replicas
+
+logger = logging.getLogger('posts.budgets')
+
+
+class QueryBudgetMiddleware:
+    """
+    Пишет в лог `posts.budgets` запросы к страницам, превысившие бюджет из
+    settings.VIEW_BUDGETS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with budgets.track() as usage:
+            response = self.get_response(request)
+        if getattr(response, 'streaming', False):
+            # Бюджет проверяется, когда тело ответа будет прочитано.
+            response.streaming_content = budgets.track_stream(
+                response.streaming_content, usage,
+                lambda: self.check(request, usage),
+            )
+        else:
+            self.check(request, usage)
+        return response
+
+    def check(self, request, usage):
+        match = request.resolver_match
+        if match is not None and match.url_name:
+            problems = budgets.exceeded(match.url_name, usage)
+            if problems:
+                logger.warning(
+                    'Превышен бюджет %s (%s): %s',
+                    match.url_name, request.path, '; '.join(problems),
+                    extra={'url_name': match.url_name, 'usage': usage},
+                )
+
+
+class ReplicaMiddleware:
+    """
+    Отправляет чтение страниц из settings.REPLICA_VIEWS на реплики, а
+    после запросов на запись прикрепляет пользователя к основной базе
+    (см. posts/replicas.py).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def use_replicas(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.COOKIES.get(settings.REPLICA_PIN_COOKIE):
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.url_name in settings.REPLICA_VIEWS
+
+    def __call__(self, request):
+        if not replicas.replicas():
+            return self.get_response(request)
+        if self.use_replicas(request):
+            with replicas.reading_from_replicas():
+                return self.get_response(request)
+        response = self.get_response(request)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+            )
+        return response
@@ -1,5 +1,7 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
@@ -48,14 +50,92 @@ class Post(models.Model):
         null=True,
         help_text='Загрузите картинку.'
     )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+    # Меняется при каждом сохранении и при смене превью: входит в ключ
+    # закешированной карточки поста.
+    updated = models.DateTimeField('Изменён', auto_now=True)
 
     def __str__(self):
         return self.text[:15]
 
+    @cached_property
+    def card_image(self):
+        """
+        Картинка для карточки в ленте: `src` и `srcset` для <img> в
+        запасном формате (последний в POST_THUMBNAIL_FORMATS) и `sources` —
+        те же размеры в остальных форматах для <source> в <picture>.
+        Превью берутся из `prefetch_related('thumbnails')`; пока их нет —
+        исходная картинка без srcset.
+        """
+        if not self.image:
+            return None
+        by_format = {}
+        for thumbnail in self.thumbnails.all():
+            if thumbnail.name == 'card':
+                by_format.setdefault(thumbnail.format, []).append(thumbnail)
+        *formats, fallback = settings.POST_THUMBNAIL_FORMATS
+        if fallback not in by_format:
+            return {
+                'src': self.image.url, 'srcset': '', 'sizes': '',
+                'sources': [],
+            }
+
+        def srcset(thumbnails):
+            return ', '.join(
+                f'{thumbnail.image.url} {thumbnail.width}w'
+                for thumbnail in sorted(thumbnails, key=lambda t: t.width)
+            )
+
+        return {
+            'src': max(by_format[fallback], key=lambda t: t.width).image.url,
+            'srcset': srcset(by_format[fallback]),
+            'sizes': settings.POST_THUMBNAIL_SIZES_ATTR,
+            'sources': [
+                {'type': f'image/{name}', 'srcset': srcset(by_format[name])}
+                for name in formats if name in by_format
+            ],
+        }
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            # Ленты группы и профиля: фильтр по внешнему ключу и сортировка
+            # по (pub_date, id) — одним проходом по индексу, без сортировки.
+            models.Index(fields=['group', '-pub_date', '-id']),
+            models.Index(fields=['author', '-pub_date', '-id']),
+        ]
+
+
+class Thumbnail(models.Model):
+    """
+    Превью картинки поста, подготовленное заранее (см. posts.thumbnails).
+    """
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='thumbnails',
+    )
+    name = models.CharField(max_length=20)
+    format = models.CharField(max_length=10, default='jpeg')
+    image = models.ImageField(upload_to='posts/thumbs/')
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.post_id}: {self.name}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'name', 'format', 'width'],
+                name='unique_thumbnail'),
+        ]
 
 
 class Comment(models.Model):
@@ -75,6 +155,10 @@ class Comment(models.Model):
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            # Страницы комментариев поста по ключу (created, id).
+            models.Index(fields=['post', 'created']),
+        ]
 
 
 class Follow(models.Model):
@@ -95,3 +179,42 @@ class Follow(models.Model):
                 fields=['user', 'author'],
                 name='unique_follow'),
         ]
+        indexes = [
+            # Подписчики автора (раскладка постов, счётчики).
+            models.Index(fields=['author', 'user']),
+        ]
+
+
+class FeedEntry(models.Model):
+    """
+    Запись во «входящих» пользователя: пост автора, на которого он подписан.
+    Заполняется при публикации (fan-out on write), чтобы лента подписок
+    читалась одним проходом по индексу (user, pub_date).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post']),
+            models.Index(fields=['user', 'author']),
+        ]
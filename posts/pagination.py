@@ -0,0 +1,190 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+CLASSIC = 'classic'
+KEYSET = 'keyset'
+
+
+def encode_cursor(values):
+    """
+    Превращает значения ключа сортировки в непрозрачный токен для URL.
+    """
+    parts = []
+    for value in values:
+        if isinstance(value, datetime):
+            if timezone.is_naive(value):
+                value = timezone.make_aware(value, timezone.utc)
+            value = 'd{}'.format((value - EPOCH) // MICROSECOND)
+        elif isinstance(value, float):
+            value = 'f{!r}'.format(value)
+        else:
+            value = 'i{}'.format(value)
+        parts.append(value)
+    raw = ':'.join(parts).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Разбирает токен из `encode_cursor`, для битого токена возвращает None.
+    """
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = []
+        for part in raw.decode().split(':'):
+            kind, value = part[:1], part[1:]
+            if kind == 'd':
+                value = EPOCH + int(value) * MICROSECOND
+                if not settings.USE_TZ:
+                    value = timezone.make_naive(value, timezone.utc)
+            elif kind == 'i':
+                value = int(value)
+            elif kind == 'f':
+                value = float(value)
+            else:
+                return None
+            values.append(value)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError):
+        return None
+    return values
+
+
+class KeysetPage:
+    """
+    Страница курсорной пагинации: знает только соседей, но не общее число
+    страниц, поэтому обходится без COUNT(*) и OFFSET.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor,
+                 cursor=''):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        # Откуда открыта страница, например `after:<токен>`; годится как
+        # часть ключа кеша вместо номера страницы.
+        self.cursor = cursor
+
+    def __repr__(self):
+        return '<KeysetPage of {} objects>'.format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Пагинация по ключу `ordering` (по умолчанию `(-pub_date, -id)`).
+
+    `?after=` ведёт к следующим по порядку записям, `?before=` — к
+    предыдущим. Последнее поле ключа должно быть уникальным.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def _seek(self, values, forward):
+        """
+        Условие «строго после `values`» (или «строго до» при forward=False)
+        для составного ключа сортировки.
+        """
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith('-') == forward
+            lookup = '{}__{}'.format(self.fields[position],
+                                     'lt' if descending else 'gt')
+            step = Q(**{lookup: values[position]})
+            for previous in range(position):
+                step &= Q(**{self.fields[previous]: values[previous]})
+            condition |= step
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, name) for name in self.fields]
+
+    def get_page(self, after=None, before=None):
+        after_token, before_token = after, before
+        after = decode_cursor(after_token)
+        before = None if after else decode_cursor(before_token)
+        queryset = self.object_list
+        if after and len(after) == len(self.fields):
+            queryset = queryset.filter(self._seek(after, forward=True))
+        elif before and len(before) == len(self.fields):
+            reverse = [
+                name[1:] if name.startswith('-') else '-' + name
+                for name in self.ordering
+            ]
+            queryset = queryset.filter(self._seek(before, forward=False))
+            rows = list(queryset.order_by(*reverse)[:self.per_page + 1])
+            has_more = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(
+                rows,
+                self,
+                next_cursor=encode_cursor(self._key(rows[-1]))
+                if rows else None,
+                previous_cursor=encode_cursor(self._key(rows[0]))
+                if rows and has_more else None,
+                cursor='before:' + before_token,
+            )
+        else:
+            after = None
+
+        rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            self,
+            next_cursor=encode_cursor(self._key(rows[-1]))
+            if rows and has_more else None,
+            previous_cursor=encode_cursor(self._key(rows[0]))
+            if rows and after else None,
+            cursor='after:' + after_token if after else '',
+        )
+
+
+def paginate(request, queryset, feed):
+    """
+    Возвращает страницу ленты `feed` в режиме, заданном в
+    `settings.FEED_PAGINATION` (classic по умолчанию).
+    """
+    mode = getattr(settings, 'FEED_PAGINATION', {}).get(feed, CLASSIC)
+    if mode == KEYSET:
+        paginator = KeysetPaginator(queryset, settings.POST_ON_PAGE)
+        return paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    paginator = Paginator(queryset, settings.POST_ON_PAGE)
+    return paginator.get_page(request.GET.get('page'))
@@ -0,0 +1,27 @@
+"""
+Запросы лент, общие для представлений и проверки планов запросов
+(posts/tests/test_query_plans.py). Сортировку и срез добавляет пагинатор,
+превью подгружает posts.loaders.
+"""
+from . import feed
+from .models import Post
+
+
+def index_posts():
+    return Post.objects.select_related('author', 'group')
+
+
+def group_posts(group):
+    return group.posts.select_related('author')
+
+
+def profile_posts(author):
+    return author.posts.all()
+
+
+def follow_posts(user, heavy=None):
+    return feed.follow_feed(user, heavy).select_related('author', 'group')
+
+
+def post_comments(post):
+    return post.comments.select_related('author')
@@ -0,0 +1,88 @@
+"""
+Чтение лент с реплик базы.
+
+Реплики перечислены в settings.DATABASE_REPLICAS (алиасы из DATABASES).
+Читать с реплики можно только внутри `reading_from_replicas()` — его
+включает ReplicaMiddleware для GET-запросов к страницам из
+settings.REPLICA_VIEWS. Всё остальное, в том числе любая запись, идёт в
+`default`.
+
+Реплика отстаёт от основной базы, поэтому после POST пользователь на
+REPLICA_PIN_SECONDS секунд «прикрепляется» к основной базе cookie
+REPLICA_PIN_COOKIE и сразу видит свой пост или комментарий.
+"""
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def reading_from_replicas():
+    """
+    Чтение внутри блока уходит на случайную реплику, одну на весь блок.
+    """
+    previous = getattr(_state, 'alias', None)
+    aliases = replicas()
+    _state.alias = random.choice(aliases) if aliases else None
+    try:
+        yield _state.alias
+    finally:
+        _state.alias = previous
+
+
+def read_alias():
+    return getattr(_state, 'alias', None) or DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # На репликах те же данные, что и в основной базе.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему вместе с данными при копировании.
+        return db not in replicas()
+
+
+def copy(name, using=DEFAULT_DB_ALIAS):
+    """
+    Копирует базу `using` в файл SQLite `name` через backup API: копия
+    согласованна, даже если в основную базу в это время пишут.
+    """
+    source = connections[using]
+    if source.vendor != 'sqlite':
+        raise ValueError('Копирование реплик поддерживается только '
+                         'для SQLite.')
+    source.ensure_connection()
+    target = sqlite3.connect(name)
+    try:
+        source.connection.backup(target)
+    finally:
+        target.close()
+
+
+def feed_cache_timeout():
+    """
+    Срок кеширования фрагмента ленты. Отрендеренное по данным реплики
+    может отставать от уже сброшенного поколения кеша, поэтому такой
+    фрагмент живёт не дольше REPLICA_PIN_SECONDS.
+    """
+    if read_alias() == DEFAULT_DB_ALIAS:
+        return settings.FEED_CACHE_TIMEOUT
+    return min(settings.FEED_CACHE_TIMEOUT, settings.REPLICA_PIN_SECONDS)
@@ -0,0 +1,189 @@
+"""
+Полнотекстовый поиск по постам.
+
+На SQLite используется виртуальная таблица FTS5 `posts_search`
+(rowid = id поста), которую сигналы обновляют при сохранении и удалении
+постов. На других базах — медленный запасной вариант через `icontains`.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .models import Post
+from .pagination import (
+    KeysetPage, KeysetPaginator, decode_cursor, encode_cursor,
+)
+
+TABLE = 'posts_search'
+
+TOKEN = re.compile(r'\w+')
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def terms(query):
+    return TOKEN.findall(query.lower())
+
+
+def match_expression(query):
+    """
+    Превращает пользовательский запрос в выражение FTS5: все слова
+    обязательны, каждое ищется как префикс («город» найдёт «города»).
+    Синтаксис FTS5 в запросе не интерпретируется.
+    """
+    return ' '.join(f'"{term}"*' for term in terms(query))
+
+
+def index(post):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)',
+            [post.pk, post.text],
+        )
+
+
+def remove(post_id):
+    if not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild():
+    """
+    Пересобирает индекс по всем постам. Возвращает число постов в индексе.
+    """
+    if not is_available():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, text) '
+            f'SELECT id, text FROM {Post._meta.db_table}'
+        )
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def matching_ids(query):
+    """
+    SQL и параметры для `id__in=RawSQL(...)`: id постов, подходящих под
+    запрос.
+    """
+    return (
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+        [match_expression(query)],
+    )
+
+
+class SearchPaginator:
+    """
+    Результаты поиска по релевантности (bm25) с курсорной пагинацией по
+    ключу (rank, id). Интерфейс как у KeysetPaginator.
+    """
+
+    def __init__(self, query, per_page, group=None, author=None):
+        self.expression = match_expression(query)
+        self.per_page = int(per_page)
+        self.group = group
+        self.author = author
+
+    def _ids(self, seek, forward):
+        sql = [f'SELECT s.rowid, s.rank FROM {TABLE} s']
+        where = [f'{TABLE} MATCH %s']
+        params = [self.expression]
+        if self.group is not None or self.author is not None:
+            sql.append(f'JOIN {Post._meta.db_table} p ON p.id = s.rowid')
+            for column, value in (('group_id', self.group),
+                                  ('author_id', self.author)):
+                if value is not None:
+                    where.append(f'p.{column} = %s')
+                    params.append(value.pk)
+        compare, direction = ('>', 'ASC') if forward else ('<', 'DESC')
+        if seek:
+            rank, post_id = seek
+            where.append(
+                f'(s.rank {compare} %s OR (s.rank = %s AND s.rowid '
+                f'{compare} %s))'
+            )
+            params.extend([rank, rank, post_id])
+        sql.append('WHERE ' + ' AND '.join(where))
+        sql.append(f'ORDER BY s.rank {direction}, s.rowid {direction} '
+                   f'LIMIT %s')
+        params.append(self.per_page + 1)
+        with connection.cursor() as cursor:
+            cursor.execute(' '.join(sql), params)
+            return cursor.fetchall()
+
+    def get_page(self, after=None, before=None):
+        after_token, before_token = after, before
+        after = decode_cursor(after_token)
+        before = None if after else decode_cursor(before_token)
+        if after and len(after) != 2:
+            after = None
+        if before and len(before) != 2:
+            before = None
+        if not self.expression:
+            rows = []
+        elif before:
+            rows = self._ids(before, forward=False)
+        else:
+            rows = self._ids(after, forward=True)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if before:
+            rows.reverse()
+        posts = Post.objects.select_related(
+            'author', 'group').prefetch_related('thumbnails').in_bulk(
+            [post_id for post_id, _ in rows])
+        object_list = []
+        for post_id, rank in rows:
+            # Пост могли удалить, а индекс ещё не обновить.
+            if post_id in posts:
+                posts[post_id].rank = rank
+                object_list.append(posts[post_id])
+        first = encode_cursor(rows[0][::-1]) if rows else None
+        last = encode_cursor(rows[-1][::-1]) if rows else None
+        if before:
+            return KeysetPage(
+                object_list, self,
+                next_cursor=last,
+                previous_cursor=first if has_more else None,
+                cursor='before:' + before_token,
+            )
+        return KeysetPage(
+            object_list, self,
+            next_cursor=last if has_more else None,
+            previous_cursor=first if after else None,
+            cursor='after:' + after_token if after else '',
+        )
+
+
+def paginator(query, group=None, author=None):
+    """
+    Пагинатор результатов поиска `query`, при необходимости — только в
+    группе `group` и у автора `author`.
+    """
+    if is_available():
+        return SearchPaginator(
+            query, settings.POST_ON_PAGE, group=group, author=author
+        )
+    posts = Post.objects.select_related(
+        'author', 'group').prefetch_related('thumbnails')
+    words = terms(query)
+    if not words:
+        posts = posts.none()
+    for term in words:
+        posts = posts.filter(text__icontains=term)
+    if group is not None:
+        posts = posts.filter(group=group)
+    if author is not None:
+        posts = posts.filter(author=author)
+    return KeysetPaginator(posts, settings.POST_ON_PAGE)
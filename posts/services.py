@@ -0,0 +1,70 @@
+"""
+Операции записи по id — без загрузки моделей целиком. Повторный вызов
+безопасен: подписка на того, на кого уже подписан, и отписка от того, на
+кого не подписан, ничего не меняют. Используются представлениями и годятся
+для будущего JSON API.
+"""
+from django.db import connections, router
+from django.db.models.signals import post_save
+
+from .models import Comment, Follow, Post
+
+
+def follow(user_id, author_id):
+    """
+    Подписывает `user_id` на `author_id` одним INSERT ... ON CONFLICT DO
+    NOTHING, без проверки существования и гонки с unique_follow.
+    Возвращает True, если подписка появилась.
+    """
+    if user_id == author_id:
+        return False
+    using = router.db_for_write(Follow)
+    connection = connections[using]
+    opts = Follow._meta
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(opts.get_field(name).column) for name in ('user', 'author')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(opts.db_table)} ({columns}) '
+            f'VALUES (%s, %s) ON CONFLICT DO NOTHING',
+            [user_id, author_id],
+        )
+        if not cursor.rowcount:
+            return False
+        pk = connection.ops.last_insert_id(
+            cursor, opts.db_table, opts.pk.column
+        )
+    # Запрос в обход save(): счётчики, ленты и граф подписок обновляют
+    # обработчики post_save, поэтому сигнал отправляем сами.
+    instance = Follow(pk=pk, user_id=user_id, author_id=author_id)
+    instance._state.adding = False
+    instance._state.db = using
+    post_save.send(
+        sender=Follow, instance=instance, created=True, update_fields=None,
+        raw=False, using=using,
+    )
+    return True
+
+
+def unfollow(user_id, author_id):
+    """
+    Отписывает `user_id` от `author_id`. Возвращает True, если подписка
+    была.
+    """
+    deleted, _ = Follow.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+    return bool(deleted)
+
+
+def add_comment(post_id, author_id, text):
+    """
+    Комментарий к посту `post_id`; если поста нет — Post.DoesNotExist.
+    """
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Post.DoesNotExist(f'Пост {post_id} не найден.')
+    return Comment.objects.create(
+        post_id=post_id, author_id=author_id, text=text
+    )
@@ -0,0 +1,205 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import (
+    cards, counters, feed, follow_graph, generations, search, thumbnails,
+)
+from .models import Comment, Follow, Group, Post, Thumbnail
+
+User = get_user_model()
+
+# Поля автора и группы, которые видны на карточках постов и в лентах.
+USER_CARD_FIELDS = ('username', 'first_name', 'last_name')
+GROUP_CARD_FIELDS = ('title', 'slug')
+
+
+def _post_scopes(post_id, author_id, *group_ids):
+    """
+    Области кеша, в которых показывается пост. author:<id> входит в
+    поколение ленты подписок каждого подписчика автора.
+    """
+    scopes = [
+        'index', f'profile:{author_id}', f'author:{author_id}',
+        f'post:{post_id}',
+    ]
+    scopes.extend(
+        f'group:{group_id}' for group_id in set(group_ids) if group_id
+    )
+    return scopes
+
+
+def _touch_post(post_id):
+    """
+    Сбрасывает кеш всех лент, где видна карточка поста `post_id`.
+    """
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group_id').first()
+    if post is not None:
+        author_id, group_id = post
+        generations.bump(*_post_scopes(post_id, author_id, group_id))
+
+
+def _touch_posts(posts):
+    """
+    Сбрасывает карточки постов `posts` — новое время изменения меняет их
+    версию — и кеш лент, где они видны.
+    """
+    rows = set(posts.order_by().values_list('author_id', 'group_id'))
+    if not rows:
+        return
+    posts.update(updated=timezone.now())
+    scopes = {'index'}
+    for author_id, group_id in rows:
+        scopes.update((
+            f'profile:{author_id}', f'author:{author_id}', f'user:{author_id}',
+        ))
+        if group_id:
+            scopes.add(f'group:{group_id}')
+    generations.bump(*scopes)
+
+
+def _remember(instance, fields, update_fields):
+    """
+    Запоминает прежние значения `fields` перед сохранением `instance`.
+    """
+    instance._previous_card_fields = None
+    if instance._state.adding or update_fields is not None and not (
+            set(update_fields) & set(fields)):
+        return
+    instance._previous_card_fields = type(instance).objects.filter(
+        pk=instance.pk).values_list(*fields).first()
+
+
+def _card_fields_changed(instance, fields):
+    previous = instance.__dict__.pop('_previous_card_fields', None)
+    return previous is not None and previous != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_pre_save(sender, instance, **kwargs):
+    if not instance._state.adding:
+        # Пост могли перенести в другую группу — старую тоже нужно сбросить.
+        previous = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image').first() or (None, None)
+        instance._previous_group_id, instance._previous_image = previous
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_profile(instance.author_id, 'posts_count', 1)
+        feed.fan_out(instance)
+    if created and instance.image or (
+            not created
+            and instance.image.name != getattr(
+                instance, '_previous_image', instance.image.name)):
+        thumbnails.schedule(instance)
+    search.index(instance)
+    cards.fill(instance)
+    generations.bump(*_post_scopes(
+        instance.pk,
+        instance.author_id,
+        instance.group_id,
+        getattr(instance, '_previous_group_id', None),
+    ))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.change_profile(instance.author_id, 'posts_count', -1)
+    search.remove(instance.pk)
+    cards.forget(instance.pk)
+    generations.bump(*_post_scopes(
+        instance.pk, instance.author_id, instance.group_id))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change_comments(instance.post_id, 1)
+        _touch_post(instance.post_id)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change_comments(instance.post_id, -1)
+    _touch_post(instance.post_id)
+
+
+@receiver(thumbnails.thumbnails_changed)
+def thumbnails_changed(sender, post_id, **kwargs):
+    # В закешированных карточках остались адреса прежних картинок:
+    # новое время изменения меняет ключ карточки.
+    Post.objects.filter(pk=post_id).update(updated=timezone.now())
+    _touch_post(post_id)
+
+
+@receiver(post_delete, sender=Thumbnail)
+def thumbnail_deleted(sender, instance, **kwargs):
+    instance.image.delete(save=False)
+
+
+@receiver(pre_save, sender=Group)
+def group_pre_save(sender, instance, update_fields=None, **kwargs):
+    _remember(instance, GROUP_CARD_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    if _card_fields_changed(instance, GROUP_CARD_FIELDS):
+        _touch_posts(Post.objects.filter(group_id=instance.pk))
+    generations.bump(f'group:{instance.pk}')
+
+
+@receiver(pre_delete, sender=Group)
+def group_pre_delete(sender, instance, **kwargs):
+    # Посты группы переходят в group=NULL через UPDATE без сигналов.
+    _touch_posts(Post.objects.filter(group_id=instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def user_pre_save(sender, instance, update_fields=None, **kwargs):
+    # Вход сохраняет только last_login — тогда база не читается.
+    _remember(instance, USER_CARD_FIELDS, update_fields)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    if _card_fields_changed(instance, USER_CARD_FIELDS):
+        _touch_posts(Post.objects.filter(author_id=instance.pk))
+
+
+def _follow_scopes(follow):
+    # follow:<id> — лента подписок и кнопки подписки читателя, user:<id> —
+    # счётчики подписок на карточках обоих пользователей.
+    return [
+        f'follow:{follow.user_id}',
+        f'user:{follow.user_id}',
+        f'user:{follow.author_id}',
+    ]
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        follow_graph.changed(instance.user_id, instance.author_id, True)
+        counters.change_profile(instance.author_id, 'followers_count', 1)
+        counters.change_profile(instance.user_id, 'following_count', 1)
+        feed.backfill(instance.user_id, instance.author_id)
+        generations.bump(*_follow_scopes(instance))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    follow_graph.changed(instance.user_id, instance.author_id, False)
+    counters.change_profile(instance.author_id, 'followers_count', -1)
+    counters.change_profile(instance.user_id, 'following_count', -1)
+    feed.prune(instance.user_id, instance.author_id)
+    generations.bump(*_follow_scopes(instance))
@@ -0,0 +1,67 @@
+"""
+Потоковая отдача страниц из settings.STREAMING_FEEDS.
+
+Страница рендерится как обычно, но тяжёлые части — карточки постов
+(`{% post_cards %}`) и блоки `{% streamed %}` — оставляют на своём месте
+метку и откладываются. Ответ сразу отдаёт всё до первой метки (head и
+навигацию), а затем по очереди отложенные части и разметку между ними.
+
+Отложенные части рендерятся уже после выхода из представления и
+middleware: на реплике они не читают (см. ReplicaMiddleware), а время
+их рендеринга не попадает в инструментовку.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render as render_page
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+MARKER = '<!--stream:{}-->'
+
+# Ключ контекста со списком отложенных частей.
+CONTEXT_KEY = 'stream_parts'
+
+
+def is_enabled(view_name):
+    return view_name in getattr(settings, 'STREAMING_FEEDS', ())
+
+
+def defer(context, parts):
+    """
+    В потоковом режиме откладывает `parts` — функцию, возвращающую куски
+    HTML, — и возвращает метку для её места; иначе возвращает None.
+    """
+    deferred = context.get(CONTEXT_KEY)
+    if deferred is None:
+        return None
+    deferred.append(parts)
+    return mark_safe(MARKER.format(len(deferred) - 1))
+
+
+def _chunks(html, deferred):
+    for number, parts in enumerate(deferred):
+        head, html = html.split(MARKER.format(number), 1)
+        yield head
+        yield from parts()
+    yield html
+
+
+def render(request, template_name, context, view_name):
+    """
+    `render()` для страницы `view_name`: потоком, если она есть в
+    settings.STREAMING_FEEDS.
+    """
+    if not is_enabled(view_name):
+        return render_page(request, template_name, context)
+    # Cookie с токеном CSRF должна уйти в заголовках, а форма может
+    # оказаться в отложенной части.
+    get_token(request)
+    deferred = []
+    html = render_to_string(template_name, dict(
+        context,
+        # Фрагмент ленты с метками вместо карточек кешировать нельзя.
+        cache_timeout=0,
+        **{CONTEXT_KEY: deferred},
+    ), request)
+    return StreamingHttpResponse(_chunks(html, deferred))
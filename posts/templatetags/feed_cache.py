@@ -0,0 +1,68 @@
+from django import template
+from django.templatetags.cache import CacheNode
+
+from .. import cache_stats
+
+register = template.Library()
+
+
+class MissNode(template.Node):
+    """
+    Отмечает в render_context, что фрагмент пришлось рендерить заново.
+    """
+
+    def __init__(self, cache_node, nodelist):
+        self.cache_node = cache_node
+        self.nodelist = nodelist
+
+    def render(self, context):
+        context.render_context[self.cache_node] = True
+        return self.nodelist.render(context)
+
+
+class FeedCacheNode(CacheNode):
+    def __init__(self, nodelist, *args):
+        super().__init__(
+            template.NodeList([MissNode(self, nodelist)]), *args
+        )
+
+    def render(self, context):
+        context.render_context[self] = False
+        value = super().render(context)
+        cache_stats.record(
+            self.fragment_name, hit=not context.render_context[self]
+        )
+        return value
+
+
+@register.tag('feedcache')
+def do_feedcache(parser, token):
+    """
+    Тот же `{% cache %}`, но с учётом попаданий и промахов по имени
+    фрагмента (см. команду `cache_stats`).
+
+    Usage::
+
+        {% load feed_cache %}
+        {% feedcache [expire_time] [fragment_name] [var1] [var2] .. %}
+            .. some expensive processing ..
+        {% endfeedcache %}
+    """
+    nodelist = parser.parse(('endfeedcache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            "'%r' tag requires at least 2 arguments." % tokens[0]
+        )
+    if len(tokens) > 3 and tokens[-1].startswith('using='):
+        cache_name = parser.compile_filter(tokens[-1][len('using='):])
+        tokens = tokens[:-1]
+    else:
+        cache_name = None
+    return FeedCacheNode(
+        nodelist, parser.compile_filter(tokens[1]),
+        tokens[2],
+        [parser.compile_filter(t) for t in tokens[3:]],
+        cache_name,
+    )
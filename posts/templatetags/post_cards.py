@@ -0,0 +1,62 @@
+from copy import copy
+
+from django import template
+
+from .. import cards, streaming
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, template_name=cards.POST_CARD):
+    """
+    Карточки постов из кеша (см. posts.cards). На потоковой странице
+    отдаются по мере рендеринга (см. posts.streaming).
+
+    Usage::
+
+        {% load post_cards %}
+        {% post_cards page %}
+        {% post_cards posts 'mini_templates/group_post.html' %}
+    """
+    is_owner = bool(context.get('is_owner'))
+    marker = streaming.defer(
+        context, lambda: cards.stream(posts, template_name, is_owner)
+    )
+    if marker is not None:
+        return marker
+    return cards.render_many(posts, template_name, is_owner)
+
+
+class StreamedNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        # Копия: к моменту отложенного рендеринга шаблон уже отрисован и
+        # его контекст разобран.
+        deferred_context = copy(context)
+        marker = streaming.defer(
+            context, lambda: [self.nodelist.render(deferred_context)]
+        )
+        if marker is not None:
+            return marker
+        return self.nodelist.render(context)
+
+
+@register.tag('streamed')
+def do_streamed(parser, token):
+    """
+    На потоковой странице блок рендерится и отдаётся после того, что
+    выше него; на обычной ничего не меняет.
+
+    Usage::
+
+        {% load post_cards %}
+        {% streamed %}
+            .. some expensive processing ..
+        {% endstreamed %}
+    """
+    nodelist = parser.parse(('endstreamed',))
+    parser.delete_first_token()
+    return StreamedNode(nodelist)
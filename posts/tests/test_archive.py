@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import archive
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False,
+                   POST_THUMBNAIL_WIDTHS=())
+class ArchiveTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        other = User.objects.create_user(username='other')
+        self.post = Post.objects.create(
+            text='with image', author=self.author,
+            image=SimpleUploadedFile('image.gif', b'GIF89a', 'image/gif'),
+        )
+        Post.objects.create(text='plain', author=self.author)
+        Post.objects.create(text='not mine', author=other)
+        Comment.objects.create(post=self.post, author=self.author, text='c1')
+        Comment.objects.create(post=self.post, author=other, text='c2')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('profile_export', kwargs={'username': 'author'})
+
+    def read_rows(self, data):
+        return [json.loads(line) for line in data.decode().splitlines()]
+
+    def test_ndjson(self):
+        response = self.client.get(self.url, {'format': 'ndjson'})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = self.read_rows(b''.join(response.streaming_content))
+        self.assertEqual(
+            [(row['model'], row['fields']['text']) for row in rows],
+            [('posts.post', 'with image'), ('posts.post', 'plain'),
+             ('posts.comment', 'c1')],
+        )
+
+    def test_zip(self):
+        response = self.client.get(self.url)
+        self.assertIn('author.zip', response['Content-Disposition'])
+        data = b''.join(response.streaming_content)
+        with zipfile.ZipFile(BytesIO(data)) as result:
+            self.assertEqual(
+                result.namelist(),
+                ['posts.ndjson', f'images/{self.post.image.name}'],
+            )
+            self.assertEqual(len(self.read_rows(result.read(
+                'posts.ndjson'))), 3)
+            self.assertEqual(
+                result.read(f'images/{self.post.image.name}'), b'GIF89a'
+            )
+
+    def test_streams_in_chunks(self):
+        Post.objects.bulk_create(
+            Post(text='x' * 1000, author=self.author) for _ in range(200)
+        )
+        chunks = list(archive.ndjson(self.author, chunk_size=50))
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(len(self.read_rows(b''.join(chunks))), 203)
+
+    def test_only_own_archive(self):
+        other = reverse('profile_export', kwargs={'username': 'other'})
+        self.assertEqual(self.client.get(other).status_code, 403)
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_command(self):
+        path = os.path.join(TEMP_MEDIA_ROOT, 'author.ndjson')
+        call_command('export_user', 'author', path, format='ndjson',
+                     stdout=StringIO())
+        with open(path, 'rb') as file:
+            self.assertEqual(len(self.read_rows(file.read())), 3)
@@ -0,0 +1,166 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.http import StreamingHttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from posts import budgets, counters, feed
+from posts.middleware import QueryBudgetMiddleware
+from posts.models import Comment, Follow, Group, Post, Thumbnail
+
+User = get_user_model()
+
+# Без кеша: бюджет проверяется на холодной отрисовке страницы.
+NO_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+}
+
+
+class BudgetTestMixin:
+    """
+    assertWithinBudget(url) открывает страницу и проверяет, что она
+    уложилась в бюджет своего имени URL из settings.VIEW_BUDGETS.
+    """
+
+    def assertWithinBudget(self, url, params=None):
+        url_name = resolve(url).url_name
+        self.assertIsNotNone(
+            budgets.budget_for(url_name), f'Нет бюджета для {url_name}'
+        )
+        with budgets.track() as usage:
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        problems = budgets.exceeded(url_name, usage)
+        self.assertEqual(problems, [], f'{url}: {"; ".join(problems)}')
+        return usage
+
+
+def seed(users=30, groups=3, posts=300, comments_per_post=3):
+    """
+    Набор данных, на котором N+1 сразу заметен: полные страницы лент,
+    картинки с превью, комментарии и подписки.
+    """
+    User.objects.bulk_create(
+        User(username=f'user{number}') for number in range(users)
+    )
+    authors = list(User.objects.order_by('id'))
+    Group.objects.bulk_create(
+        Group(title=f'Group {number}', slug=f'group-{number}')
+        for number in range(groups)
+    )
+    group_list = list(Group.objects.all())
+    Post.objects.bulk_create(
+        Post(
+            text=f'post {number}',
+            author=authors[number % users],
+            group=group_list[number % groups],
+            image=f'posts/{number}.jpg' if number % 2 else '',
+        )
+        for number in range(posts)
+    )
+    Thumbnail.objects.bulk_create(
+        Thumbnail(
+            post=post, name='card', format=image_format, width=width,
+            height=round(339 * width / 960),
+            image=f'posts/thumbs/{post.id}_{width}.{image_format}',
+        )
+        for post in Post.objects.exclude(image='')
+        for image_format in ('webp', 'jpeg')
+        for width in (360, 960)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author=authors[number % users], text='comment')
+        for post in Post.objects.all()
+        for number in range(comments_per_post)
+    )
+    Follow.objects.bulk_create(
+        Follow(user=authors[0], author=author) for author in authors[1:]
+    )
+    counters.recount_posts()
+    counters.recount_profiles()
+    feed.rebuild()
+    return authors[0]
+
+
+@override_settings(CACHES=NO_CACHE)
+class ViewBudgetTests(BudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = seed()
+        cls.author = User.objects.get(username='user1')
+        cls.post = cls.author.posts.exclude(image='').first()
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_feeds_within_budget(self):
+        for url in (
+            reverse('index'),
+            reverse('group', kwargs={'slug': 'group-1'}),
+            reverse('profile', kwargs={'username': self.author.username}),
+            reverse('post', kwargs={
+                'username': self.author.username, 'post_id': self.post.id,
+            }),
+            reverse('follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertWithinBudget(url)
+                # Дальние страницы не дороже первой.
+                self.assertWithinBudget(url, {'page': 3})
+
+    @override_settings(STREAMING_FEEDS=('index', 'profile', 'post'))
+    def test_streamed_feeds_within_budget(self):
+        for url in (
+            reverse('index'),
+            reverse('profile', kwargs={'username': self.author.username}),
+        ):
+            with self.subTest(url=url):
+                self.assertGreater(self.assertWithinBudget(url).queries, 1)
+
+    @override_settings(VIEW_BUDGETS={'index': {'queries': 1}})
+    def test_exceeded_budget_fails(self):
+        with self.assertRaises(AssertionError):
+            self.assertWithinBudget(reverse('index'))
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+    @override_settings(VIEW_BUDGETS={'index': {'queries': 0, 'ms': 10000}})
+    def test_logs_exceeded_budget(self):
+        request = RequestFactory().get(reverse('index'))
+
+        def view(request):
+            request.resolver_match = resolve(request.path)
+            list(Post.objects.all())
+            return None
+
+        with self.assertLogs('posts.budgets', logging.WARNING) as logs:
+            QueryBudgetMiddleware(view)(request)
+        self.assertIn('1 SQL-запросов при бюджете 0', logs.output[0])
+
+    @override_settings(VIEW_BUDGETS={'index': {'queries': 0, 'ms': 10000}})
+    def test_streamed_body_counts(self):
+        request = RequestFactory().get(reverse('index'))
+
+        def view(request):
+            request.resolver_match = resolve(request.path)
+            return StreamingHttpResponse(
+                str(post) for post in Post.objects.all()
+            )
+
+        response = QueryBudgetMiddleware(view)(request)
+        with self.assertLogs('posts.budgets', logging.WARNING) as logs:
+            b''.join(response.streaming_content)
+        self.assertIn('1 SQL-запросов при бюджете 0', logs.output[0])
+
+    @override_settings(VIEW_BUDGETS={})
+    def test_silent_without_budget(self):
+        logger = logging.getLogger('posts.budgets')
+        with self.assertRaises(AssertionError):
+            with self.assertLogs(logger, logging.WARNING):
+                self.client.get(reverse('index'))
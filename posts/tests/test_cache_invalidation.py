@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import cache_stats, thumbnails
+from posts.models import Comment, Group, Post, Thumbnail
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class CacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='First', slug='first')
+        self.other_group = Group.objects.create(title='Second', slug='second')
+        self.post = Post.objects.create(
+            text='grouped post', author=self.author, group=self.group
+        )
+        self.client = Client()
+
+    def get(self, name, **kwargs):
+        return self.client.get(reverse(name, kwargs=kwargs)).content.decode()
+
+    def test_pages_stay_cached_without_events(self):
+        pages = (
+            ('index', {}),
+            ('group', {'slug': 'first'}),
+            ('profile', {'username': 'author'}),
+        )
+        for name, kwargs in pages:
+            self.get(name, **kwargs)
+        Post.objects.update(text='silent edit')
+        for name, kwargs in pages:
+            with self.subTest(name=name):
+                self.assertNotIn('silent edit', self.get(name, **kwargs))
+
+    def test_post_edit_invalidates_index_group_and_profile(self):
+        for name, kwargs in (
+            ('index', {}),
+            ('group', {'slug': 'first'}),
+            ('profile', {'username': 'author'}),
+        ):
+            self.get(name, **kwargs)
+        self.post.text = 'edited post'
+        self.post.save()
+        self.assertIn('edited post', self.get('index'))
+        self.assertIn('edited post', self.get('group', slug='first'))
+        self.assertIn('edited post', self.get('profile', username='author'))
+
+    def test_moving_post_invalidates_both_groups(self):
+        self.get('group', slug='first')
+        self.get('group', slug='second')
+        self.post.group = self.other_group
+        self.post.save()
+        self.assertNotIn('grouped post', self.get('group', slug='first'))
+        self.assertIn('grouped post', self.get('group', slug='second'))
+
+    def test_comment_invalidates_index(self):
+        self.get('index')
+        Comment.objects.create(post=self.post, author=self.author, text='a')
+        self.assertIn('Комментариев: 1', self.get('index'))
+
+    def test_post_delete_invalidates_index(self):
+        self.get('index')
+        self.post.delete()
+        self.assertNotIn('grouped post', self.get('index'))
+
+    def test_hit_and_miss_statistics(self):
+        cache_stats.reset()
+        self.get('index')
+        self.get('index')
+        self.get('index')
+        self.assertEqual(cache_stats.read()['index_page'], (2, 1))
+
+        out = StringIO()
+        call_command('cache_stats', '--reset', stdout=out)
+        self.assertIn('index_page', out.getvalue())
+        self.assertEqual(cache_stats.read(), {})
+
+    @override_settings(CACHE_STATS_FLUSH_SECONDS=60)
+    def test_statistics_are_flushed_in_batches(self):
+        cache_stats.reset()
+        cache_stats.flush()
+        for hit in (True, True, False):
+            cache_stats.record('feed', hit)
+        self.assertIsNone(cache.get(cache_stats._key('feed', 'hits')))
+        self.assertEqual(cache_stats.read()['feed'], (2, 1))
+        self.assertEqual(cache.get(cache_stats._key('feed', 'hits')), 2)
+
+    def test_post_card_survives_feed_invalidation(self):
+        self.get('index')
+        Post.objects.update(text='silent edit')
+        Post.objects.create(text='new post', author=self.author)
+        page = self.get('index')
+        # Лента отрендерена заново, но карточка старого поста взята из кеша.
+        self.assertIn('new post', page)
+        self.assertIn('grouped post', page)
+
+    def test_thumbnails_change_post_card(self):
+        updated = self.post.updated
+        thumbnails.thumbnails_changed.send(
+            sender=Thumbnail, post_id=self.post.pk
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
+
+    def test_edit_link_only_for_owner(self):
+        owner = Client()
+        owner.force_login(self.author)
+        url = reverse('profile', kwargs={'username': 'author'})
+        self.assertContains(owner.get(url), 'Редактировать')
+        self.assertNotContains(self.client.get(url), 'Редактировать')
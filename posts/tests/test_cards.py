@@ -0,0 +1,125 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import cards
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class PostCardsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.post = Post.objects.create(
+            text='first\nline', author=self.author, group=self.group
+        )
+
+    def test_save_fills_cards(self):
+        entry = cache.get(cards._key(cards.POST_CARD, self.post.id, False))
+        self.assertEqual(entry[0], cards.version(self.post))
+        self.assertIn('first<br>line', entry[1])
+        self.assertIsNotNone(
+            cache.get(cards._key(cards.GROUP_CARD, self.post.id, False))
+        )
+
+    def test_page_is_one_multi_get(self):
+        Post.objects.create(text='second', author=self.author)
+        posts = list(Post.objects.select_related('author'))
+        with mock.patch('posts.cards._render') as render, \
+                mock.patch.object(cache, 'get_many',
+                                  wraps=cache.get_many) as get_many:
+            html = cards.render_many(posts)
+        render.assert_not_called()
+        get_many.assert_called_once()
+        self.assertIn('second', html)
+        self.assertIn('first<br>line', html)
+
+    def test_stale_card_is_rendered_again(self):
+        Post.objects.filter(pk=self.post.pk).update(text='silent edit')
+        Comment.objects.create(post=self.post, author=self.author, text='c')
+        post = Post.objects.get(pk=self.post.pk)
+        html = cards.render_many([post])
+        self.assertIn('silent edit', html)
+        self.assertIn('Комментариев: 1', html)
+        self.assertEqual(
+            cache.get(cards._key(cards.POST_CARD, post.id, False))[0],
+            cards.version(post),
+        )
+
+    def test_edit_replaces_card(self):
+        self.post.text = 'edited'
+        self.post.save()
+        html = cards.render_many(Post.objects.all())
+        self.assertIn('edited', html)
+        self.assertNotIn('first', html)
+
+    def test_owner_gets_own_card(self):
+        client = Client()
+        client.force_login(self.author)
+        url = reverse('profile', kwargs={'username': 'author'})
+        self.assertContains(client.get(url), 'Редактировать')
+        self.assertNotContains(Client().get(url), 'Редактировать')
+        self.assertIsNotNone(
+            cache.get(cards._key(cards.POST_CARD, self.post.id, True))
+        )
+
+    def test_delete_forgets_cards(self):
+        post_id = self.post.id
+        self.post.delete()
+        self.assertIsNone(
+            cache.get(cards._key(cards.POST_CARD, post_id, False))
+        )
+        self.assertIsNone(
+            cache.get(cards._key(cards.GROUP_CARD, post_id, False))
+        )
+
+    def test_group_removal_changes_version(self):
+        version = cards.version(self.post)
+        self.group.delete()
+        self.post.refresh_from_db()
+        self.assertNotEqual(cards.version(self.post), version)
+
+    def test_author_rename_refreshes_cards(self):
+        index = reverse('index')
+        group = reverse('group', kwargs={'slug': 'group'})
+        self.assertContains(Client().get(index), '@author')
+        self.author.username = 'writer'
+        self.author.first_name = 'Лев'
+        self.author.save()
+        self.assertContains(Client().get(index), '@writer')
+        self.assertContains(Client().get(group), 'Лев')
+        post = Post.objects.select_related('author').get(pk=self.post.pk)
+        self.assertIn('@writer', cards.render_many([post]))
+
+    def test_login_does_not_touch_posts(self):
+        Client().force_login(self.author)
+        self.author.save()
+        self.assertEqual(
+            Post.objects.get(pk=self.post.pk).updated, self.post.updated
+        )
+
+    def test_group_rename_changes_version(self):
+        version = cards.version(self.post)
+        self.group.title = 'Renamed'
+        self.group.save()
+        self.post.refresh_from_db()
+        self.assertNotEqual(cards.version(self.post), version)
+
+    def test_group_removal_touches_posts(self):
+        updated = self.post.updated
+        self.group.delete()
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
@@ -0,0 +1,104 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import counters
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_ON_PAGE=3)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(text='text', author=cls.author)
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=cls.author, text=f'comment {n}')
+            for n in range(8)
+        )
+        counters.recount_posts([cls.post.id])
+        # У части комментариев одинаковое время — порядок решает id.
+        Comment.objects.filter(id__in=list(
+            Comment.objects.order_by('id').values_list('id', flat=True)[:5]
+        )).update(created=timezone.now())
+        cls.expected = list(Comment.objects.order_by(
+            'created', 'id').values_list('text', flat=True))
+        cls.kwargs = {'username': 'author', 'post_id': cls.post.id}
+
+    def test_post_page_renders_first_comments_only(self):
+        response = self.client.get(reverse('post', kwargs=self.kwargs))
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments], self.expected[:3]
+        )
+        self.assertNotContains(response, self.expected[3])
+        self.assertContains(
+            response,
+            reverse('post_comments', kwargs=self.kwargs)
+            + f'?after={response.context["next_cursor"]}',
+        )
+
+    def test_fragments_load_the_rest(self):
+        context = self.client.get(reverse('post', kwargs=self.kwargs)).context
+        seen = [comment.text for comment in context['comments']]
+        cursor = context['next_cursor']
+        while cursor:
+            with self.assertNumQueries(2):
+                response = self.client.get(
+                    reverse('post_comments', kwargs=self.kwargs),
+                    {'after': cursor},
+                )
+            seen.extend(
+                comment.text for comment in response.context['comments']
+            )
+            cursor = response.context['next_cursor']
+        self.assertEqual(seen, self.expected)
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_no_more_link_when_all_shown(self):
+        with self.settings(COMMENTS_ON_PAGE=8):
+            response = self.client.get(reverse('post', kwargs=self.kwargs))
+        self.assertEqual(len(response.context['comments']), 8)
+        self.assertNotContains(response, 'Показать ещё комментарии')
+
+    def test_drifted_counter(self):
+        for comments_count in (0, 100):
+            with self.subTest(comments_count=comments_count):
+                Post.objects.filter(pk=self.post.pk).update(
+                    comments_count=comments_count)
+                response = self.client.get(
+                    reverse('post', kwargs=self.kwargs))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [comment.text for comment in response.context['comments']],
+                    self.expected[:3],
+                )
+                self.assertIsNotNone(response.context['next_cursor'])
+
+    def test_json(self):
+        response = self.client.get(
+            reverse('post_comments', kwargs=self.kwargs), {'format': 'json'}
+        )
+        data = response.json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            self.expected[:3],
+        )
+        self.assertEqual(data['comments'][0]['author'], 'author')
+        data = self.client.get(
+            reverse('post_comments', kwargs=self.kwargs),
+            {'format': 'json', 'after': data['next']},
+        ).json()
+        self.assertEqual(
+            [comment['text'] for comment in data['comments']],
+            self.expected[3:6],
+        )
+
+    def test_unknown_post(self):
+        response = self.client.get(reverse(
+            'post_comments', kwargs={'username': 'nobody', 'post_id': 1}
+        ))
+        self.assertEqual(response.status_code, 404)
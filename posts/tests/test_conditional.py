@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import services
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM, PROXY_CACHE_SECONDS=10)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        self.client = Client()
+        self.urls = {
+            'index': reverse('index'),
+            'group': reverse('group', kwargs={'slug': 'group'}),
+            'profile': reverse('profile', kwargs={'username': 'author'}),
+            'post': reverse('post', kwargs={
+                'username': 'author', 'post_id': self.post.id}),
+        }
+
+    def revalidate(self, url, client=None):
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        return client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified(self):
+        for name, url in self.urls.items():
+            with self.subTest(name):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Cookie', response['Vary'])
+                self.assertIn('public', response['Cache-Control'])
+                self.assertIn('s-maxage=10', response['Cache-Control'])
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertIn('ETag', response)
+
+    def test_not_modified_skips_database(self):
+        etag = self.client.get(self.urls['index'])['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.urls['index'], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_invalidate_etag(self):
+        etags = {name: self.client.get(url)['ETag']
+                 for name, url in self.urls.items()}
+        Comment.objects.create(post=self.post, author=self.reader, text='c')
+        for name, url in self.urls.items():
+            with self.subTest(name):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+                self.assertEqual(response.status_code, 200)
+
+    def test_follow_changes_profile(self):
+        url = self.urls['profile']
+        etag = self.client.get(url)['ETag']
+        services.follow(self.reader.id, self.author.id)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_pages_of_logged_in_user_are_private(self):
+        anonymous = self.client.get(self.urls['index'])['ETag']
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(self.urls['index'])
+        self.assertNotEqual(response['ETag'], anonymous)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertEqual(
+            self.revalidate(self.urls['profile'], client).status_code, 304
+        )
+        # Своя подписка меняет кнопку на чужом профиле.
+        etag = client.get(self.urls['profile'])['ETag']
+        client.get(reverse('profile_follow', kwargs={'username': 'author'}))
+        response = client.get(self.urls['profile'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_page_of_logged_in_user_revalidates(self):
+        client = Client()
+        client.force_login(self.reader)
+        self.assertEqual(
+            self.revalidate(self.urls['post'], client).status_code, 304
+        )
+
+    def test_login_changes_etag(self):
+        client = Client()
+        client.force_login(self.reader)
+        etag = client.get(self.urls['post'])['ETag']
+        client.logout()
+        client.force_login(self.reader)
+        response = client.get(self.urls['post'], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
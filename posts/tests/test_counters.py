@@ -0,0 +1,111 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import counters
+from posts.models import Comment, Follow, Post
+from users.models import Profile
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.post = Post.objects.create(text='text', author=self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def profile(self, user):
+        return Profile.objects.get(user=user)
+
+    def test_comment_counter(self):
+        self.reader_client.post(reverse('add_comment', kwargs={
+            'username': self.author.username,
+            'post_id': self.post.id,
+        }), data={'text': 'Nice!'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+        Comment.objects.get().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+    def test_posts_counter(self):
+        self.assertEqual(self.profile(self.author).posts_count, 1)
+        self.post.delete()
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+
+    def test_follow_counters(self):
+        self.reader_client.get(reverse(
+            'profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.profile(self.author).followers_count, 1)
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+
+        self.reader_client.get(reverse(
+            'profile_unfollow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.profile(self.author).followers_count, 0)
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_recount_fixes_drift(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Comment.objects.create(post=self.post, author=self.reader, text='a')
+        Post.objects.update(comments_count=7)
+        Profile.objects.update(followers_count=5, posts_count=0)
+        Profile.objects.filter(user=self.reader).delete()
+
+        call_command('recount', stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        author = self.profile(self.author)
+        self.assertEqual(
+            (author.posts_count, author.followers_count,
+             author.following_count),
+            (1, 1, 0),
+        )
+        self.assertEqual(self.profile(self.reader).following_count, 1)
+
+    def test_profile_for_attaches_created_profile(self):
+        Profile.objects.filter(user=self.author).delete()
+        author = User.objects.get(pk=self.author.pk)
+        profile = counters.profile_for(author)
+        self.assertEqual(profile.posts_count, 1)
+        with self.assertNumQueries(0):
+            self.assertIs(author.profile, profile)
+
+    def test_deleted_user_keeps_no_profile(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        author_id = self.author.id
+        self.author.delete()
+        self.assertFalse(Profile.objects.filter(user_id=author_id).exists())
+        self.assertEqual(self.profile(self.reader).following_count, 0)
+
+    def test_feed_query_count_does_not_grow_with_comments(self):
+        client = Client()
+        with self.assertNumQueries(2):
+            client.get(reverse('index'))
+        for number in range(9):
+            post = Post.objects.create(text=str(number), author=self.reader)
+            Comment.objects.create(post=post, author=self.author, text='a')
+        with self.assertNumQueries(2):
+            client.get(reverse('index'))
+
+    def test_admin_author_change(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        client.post(
+            reverse('admin:posts_post_change', args=(self.post.id,)),
+            data={'text': 'text', 'author': self.reader.id, 'group': ''},
+        )
+        self.assertEqual(self.profile(self.author).posts_count, 0)
+        self.assertEqual(self.profile(self.reader).posts_count, 1)
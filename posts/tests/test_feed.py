@@ -0,0 +1,86 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_FEED_MODE='push', FOLLOW_FEED_FANOUT_LIMIT=None)
+class FollowFeedTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.old_post = Post.objects.create(text='old', author=self.author)
+        Post.objects.create(text='other', author=self.other)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def feed_texts(self):
+        response = self.reader_client.get(reverse('follow_index'))
+        return [post.text for post in response.context['page']]
+
+    def test_follow_backfills_inbox(self):
+        self.reader_client.get(reverse(
+            'profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user', 'post')),
+            [(self.reader.id, self.old_post.id)],
+        )
+        self.assertEqual(self.feed_texts(), ['old'])
+
+    def test_new_post_fans_out(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.author_client.post(reverse('new_post'), data={'text': 'new'})
+        self.assertEqual(self.feed_texts(), ['new', 'old'])
+
+    def test_unfollow_prunes_inbox(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client.get(reverse(
+            'profile_unfollow', kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_texts(), [])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_author_is_pulled_at_read_time(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.create(text='new', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_texts(), ['new', 'old'])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_author_stays_pulled_after_losing_followers(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        Post.objects.create(text='new', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post__text='new').exists())
+        Follow.objects.filter(user=self.other).delete()
+        self.assertEqual(self.feed_texts(), ['new', 'old'])
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_follow_index_counts_heavy_authors_once(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with mock.patch(
+            'posts.feed.heavy_author_ids', wraps=feed.heavy_author_ids
+        ) as heavy_author_ids:
+            self.feed_texts()
+        heavy_author_ids.assert_called_once_with(self.reader)
+
+    def test_rebuild_command(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.reader, author=self.other)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feeds', stdout=StringIO())
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.feed_texts(), ['other', 'old'])
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import generations
+from posts.models import Comment, Follow, Post
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM, FOLLOW_FEED_FANOUT_LIMIT=None)
+class FollowFeedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first_author = User.objects.create_user(username='first')
+        self.second_author = User.objects.create_user(username='second')
+        self.first_post = Post.objects.create(
+            text='first post', author=self.first_author
+        )
+        Post.objects.create(text='second post', author=self.second_author)
+        self.reader = User.objects.create_user(username='reader')
+        self.other_reader = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.first_author)
+        Follow.objects.create(
+            user=self.other_reader, author=self.second_author
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.other_client = Client()
+        self.other_client.force_login(self.other_reader)
+
+    def feed(self, client):
+        return client.get(reverse('follow_index')).content.decode()
+
+    def test_feed_is_cached_per_user(self):
+        self.assertIn('first post', self.feed(self.reader_client))
+        other_feed = self.feed(self.other_client)
+        self.assertIn('second post', other_feed)
+        self.assertNotIn('first post', other_feed)
+
+    def test_cached_until_generation_changes(self):
+        self.feed(self.reader_client)
+        Post.objects.filter(pk=self.first_post.pk).update(text='silent edit')
+        self.assertIn('first post', self.feed(self.reader_client))
+
+    def test_new_post_of_followed_author_invalidates(self):
+        self.feed(self.reader_client)
+        Post.objects.create(text='fresh post', author=self.first_author)
+        self.assertIn('fresh post', self.feed(self.reader_client))
+
+    def test_follow_and_unfollow_invalidate(self):
+        self.feed(self.reader_client)
+        self.reader_client.get(reverse(
+            'profile_follow', kwargs={'username': 'second'}
+        ))
+        self.assertIn('second post', self.feed(self.reader_client))
+        self.reader_client.get(reverse(
+            'profile_unfollow', kwargs={'username': 'first'}
+        ))
+        self.assertNotIn('first post', self.feed(self.reader_client))
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=0)
+    def test_heavy_author_post_invalidates(self):
+        self.feed(self.reader_client)
+        Post.objects.create(text='fresh post', author=self.first_author)
+        self.assertIn('fresh post', self.feed(self.reader_client))
+
+    def test_comment_invalidates(self):
+        self.feed(self.reader_client)
+        Comment.objects.create(
+            post=self.first_post, author=self.reader, text='a'
+        )
+        self.assertIn('Комментариев: 1', self.feed(self.reader_client))
+
+    def test_post_bumps_author_not_followers(self):
+        with mock.patch.object(
+            generations, 'bump', wraps=generations.bump
+        ) as bump:
+            Post.objects.create(text='fresh post', author=self.first_author)
+        scopes = [scope for call in bump.call_args_list for scope in call[0]]
+        self.assertIn(f'author:{self.first_author.id}', scopes)
+        self.assertNotIn(f'follow:{self.reader.id}', scopes)
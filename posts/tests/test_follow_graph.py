@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        for author in self.authors[:2]:
+            Follow.objects.create(user=self.reader, author=author)
+        Follow.objects.create(user=self.authors[0], author=self.reader)
+
+    def test_lookups(self):
+        first, second, third = (author.id for author in self.authors)
+        self.assertEqual(list(follow_graph.following(self.reader.id)),
+                         sorted([first, second]))
+        self.assertTrue(follow_graph.follows(self.reader.id, first))
+        self.assertFalse(follow_graph.follows(self.reader.id, third))
+        self.assertFalse(follow_graph.follows(None, first))
+        self.assertEqual(list(follow_graph.followers(self.reader.id)),
+                         [first])
+
+    def test_loaded_once(self):
+        follow_graph.following(self.reader.id)
+        with self.assertNumQueries(0):
+            follow_graph.follows(self.reader.id, self.authors[0].id)
+            follow_graph.follows(self.reader.id, self.authors[1].id)
+
+    def test_follow_and_unfollow_update_graph(self):
+        third = self.authors[2]
+        self.assertEqual(len(follow_graph.followers(third.id)), 0)
+        follow = Follow.objects.create(user=self.reader, author=third)
+        self.assertTrue(follow_graph.follows(self.reader.id, third.id))
+        self.assertEqual(len(follow_graph.followers(third.id)), 1)
+        follow.delete()
+        self.assertFalse(follow_graph.follows(self.reader.id, third.id))
+        self.assertEqual(len(follow_graph.followers(third.id)), 0)
+
+    def test_follow_updates_cached_arrays_in_place(self):
+        third = self.authors[2]
+        follow_graph.following(self.reader.id)
+        follow_graph.followers(third.id)
+        follow = Follow.objects.create(user=self.reader, author=third)
+        with self.assertNumQueries(0):
+            self.assertEqual(list(follow_graph.followers(third.id)),
+                             [self.reader.id])
+            self.assertTrue(follow_graph.follows(self.reader.id, third.id))
+        follow.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(list(follow_graph.followers(third.id)), [])
+
+    def test_array_loaded_before_follow_is_not_served(self):
+        third = self.authors[2]
+        load = follow_graph._load
+        stale = load(follow_graph.FOLLOWING, self.reader.id)
+
+        def racing_load(direction, user_id):
+            # Другой процесс подписался, пока этот читал базу.
+            Follow.objects.create(user=self.reader, author=third)
+            return stale
+
+        with mock.patch.object(follow_graph, '_load', racing_load):
+            follow_graph.following(self.reader.id)
+        self.assertTrue(follow_graph.follows(self.reader.id, third.id))
+
+    def test_profile_uses_graph(self):
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('profile', kwargs={'username': 'author0'})
+        self.assertTrue(client.get(url).context['follow'])
+        client.get(reverse('profile_unfollow',
+                           kwargs={'username': 'author0'}))
+        self.assertFalse(client.get(url).context['follow'])
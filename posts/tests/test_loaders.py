@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import loaders, thumbnails
+from posts.models import Group, Post, Thumbnail
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class PageLoaderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.post = Post.objects.create(
+            text='text', author=self.author, group=self.group
+        )
+        self.client = Client()
+
+    def add_image_post(self):
+        post = Post.objects.create(
+            text='image', author=self.author, group=self.group,
+            image='posts/image.jpg',
+        )
+        Thumbnail.objects.bulk_create(
+            Thumbnail(post=post, name='card', format=image_format, width=360,
+                      height=127, image=f'posts/thumbs/1.{image_format}')
+            for image_format in ('webp', 'jpeg')
+        )
+        thumbnails.thumbnails_changed.send(sender=Thumbnail, post_id=post.pk)
+        return post
+
+    def test_feeds_use_loader(self):
+        self.add_image_post()
+        for name, kwargs, context_name in (
+            ('index', {}, 'page'),
+            ('group', {'slug': 'group'}, 'posts'),
+            ('profile', {'username': 'author'}, 'posts'),
+        ):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, kwargs=kwargs))
+                loader = response.context[context_name].loader
+                # Посты с авторами и группами, затем превью.
+                self.assertEqual(loader.queries, 2)
+                self.assertContains(response, 'posts/thumbs/1.webp')
+
+    def test_no_thumbnail_query_without_images(self):
+        response = self.client.get(reverse('index'))
+        self.assertEqual(response.context['page'].loader.queries, 1)
+
+    def test_cached_feed_is_not_loaded(self):
+        self.client.get(reverse('index'))
+        response = self.client.get(reverse('index'))
+        self.assertIsNone(response.context['page'].loader.queries)
+
+    def test_follow_feed_uses_loader(self):
+        reader = User.objects.create_user(username='reader')
+        self.client.force_login(reader)
+        self.client.get(reverse(
+            'profile_follow', kwargs={'username': 'author'}
+        ))
+        response = self.client.get(reverse('follow_index'))
+        self.assertEqual(len(response.context['page'].loader), 1)
+        self.assertContains(response, 'text')
+
+    def test_hydrate_skips_prefetched_posts(self):
+        post = self.add_image_post()
+        posts = list(Post.objects.filter(pk=post.pk))
+        with self.assertNumQueries(1):
+            loaders.hydrate(posts)
+        with self.assertNumQueries(0):
+            loaders.hydrate(posts)
+            self.assertEqual(len(posts[0].card_image['sources']), 1)
+
+    def test_reports_queries(self):
+        with self.assertLogs('posts.loaders', 'DEBUG') as logs:
+            self.client.get(reverse('index'))
+        self.assertIn('index: 1 постов, 1 SQL-запросов', logs.output[0])
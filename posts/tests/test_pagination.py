@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post
+from posts.pagination import KeysetPage, decode_cursor, encode_cursor
+from yatube.settings import POST_ON_PAGE
+
+User = get_user_model()
+
+KEYSET_FEEDS = {
+    'index': 'keyset',
+    'group': 'keyset',
+    'profile': 'keyset',
+    'follow': 'keyset',
+}
+
+
+@override_settings(FEED_PAGINATION=KEYSET_FEEDS)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(title='Test', slug='test-slug')
+        Post.objects.bulk_create(
+            Post(text=f'post {number}', author=cls.user, group=cls.group)
+            for number in range(POST_ON_PAGE * 2 + 3)
+        )
+        # Половина постов с одинаковой датой — курсор должен различать их
+        # по id.
+        same_time = timezone.now()
+        ids = Post.objects.order_by('id').values_list('id', flat=True)
+        Post.objects.filter(id__in=list(ids)[:POST_ON_PAGE + 5]).update(
+            pub_date=same_time
+        )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def walk(self, url):
+        seen = []
+        response = self.client.get(url)
+        pages = [response.context['page']]
+        while pages[-1].has_next():
+            seen.extend(post.id for post in pages[-1])
+            response = self.client.get(
+                url, {'after': pages[-1].next_cursor}
+            )
+            pages.append(response.context['page'])
+        seen.extend(post.id for post in pages[-1])
+        return seen, pages
+
+    def test_walk_forward_covers_feed(self):
+        for url in (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.user.username}),
+        ):
+            with self.subTest(url=url):
+                seen, pages = self.walk(url)
+                self.assertIsInstance(pages[0], KeysetPage)
+                self.assertEqual(seen, self.expected)
+                self.assertFalse(pages[0].has_previous())
+                self.assertEqual(len(pages), 3)
+
+    def test_walk_backward_returns_same_pages(self):
+        url = reverse('index')
+        _, pages = self.walk(url)
+        response = self.client.get(
+            url, {'before': pages[-1].previous_cursor}
+        )
+        page = response.context['page']
+        self.assertEqual(
+            [post.id for post in page], [post.id for post in pages[-2]]
+        )
+        self.assertTrue(page.has_previous())
+        self.assertEqual(page.next_cursor, pages[-2].next_cursor)
+
+    def test_no_count_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('index'), {'page': 2})
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_broken_cursor_opens_first_page(self):
+        response = self.client.get(reverse('index'), {'after': '%%%'})
+        self.assertEqual(
+            [post.id for post in response.context['page']],
+            self.expected[:POST_ON_PAGE],
+        )
+
+    def test_paginator_links(self):
+        response = self.client.get(reverse('index'))
+        page = response.context['page']
+        self.assertContains(response, f'?after={page.next_cursor}')
+        self.assertNotContains(response, '?page=')
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        values = decode_cursor(encode_cursor([post.pub_date, post.id]))
+        self.assertEqual(values, [post.pub_date, post.id])
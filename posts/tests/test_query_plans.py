@@ -0,0 +1,138 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Полный проход по таблице (SCAN без индекса) в запросе с условием или
+# сортировка во временном B-дереве. Проход по индексу в нужном порядке
+# (SCAN ... USING INDEX) допустим: с LIMIT он читает только первые строки.
+FULL_SCAN = re.compile(r'^SCAN \S+$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+@override_settings(
+    CACHES=LOCMEM,
+    POST_ON_PAGE=2,
+    COMMENTS_ON_PAGE=2,
+    FEED_PAGINATION={
+        'index': 'keyset',
+        'group': 'keyset',
+        'profile': 'keyset',
+        # Лента подписок упорядочена по входящим (FeedEntry), а курсор —
+        # по полям поста; поэтому проверяется в режиме по умолчанию.
+        'follow': 'classic',
+    },
+    FOLLOW_FEED_MODE='push',
+)
+class QueryPlanTests(TestCase):
+    """
+    Выполняет запросы каждой ленты и проверяет их планы через
+    EXPLAIN QUERY PLAN (только SQLite).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Group', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for number in range(5):
+            post = Post.objects.create(
+                text=f'post {number}', author=cls.author, group=cls.group
+            )
+            for _ in range(3):
+                Comment.objects.create(
+                    post=post, author=cls.reader, text='comment'
+                )
+        cls.post = post
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN есть только в SQLite.')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def bad_plans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        bad = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                details = [row[-1] for row in cursor.fetchall()]
+                if any('VIRTUAL TABLE' in detail for detail in details):
+                    # Полнотекстовый поиск: ранжирование по bm25 всегда
+                    # сортирует найденное, это не регрессия.
+                    continue
+                if any(
+                    TEMP_SORT in detail
+                    or ' WHERE ' in sql and FULL_SCAN.search(detail)
+                    for detail in details
+                ):
+                    bad.append(f'{sql}\n    {details}')
+        return response, bad
+
+    def assert_plans(self, url, params=None):
+        response, bad = self.bad_plans(url, params)
+        self.assertEqual(bad, [], '\n'.join(bad))
+        return response
+
+    def test_feeds(self):
+        for url in (
+            reverse('index'),
+            reverse('group', kwargs={'slug': self.group.slug}),
+            reverse('profile', kwargs={'username': self.author.username}),
+            reverse('follow_index'),
+        ):
+            with self.subTest(url=url):
+                response = self.assert_plans(url)
+                page = response.context.get('page') or response.context[
+                    'posts']
+                if getattr(page, 'is_keyset', False):
+                    self.assert_plans(url, {'after': page.next_cursor})
+
+    def test_post_and_comments(self):
+        kwargs = {'username': self.author.username, 'post_id': self.post.id}
+        response = self.assert_plans(reverse('post', kwargs=kwargs))
+        self.assert_plans(
+            reverse('post_comments', kwargs=kwargs),
+            {'after': response.context['next_cursor']},
+        )
+
+    def test_search(self):
+        response = self.assert_plans(reverse('search'), {'q': 'post'})
+        self.assert_plans(reverse('search'), {
+            'q': 'post', 'group': self.group.slug,
+            'after': response.context['page'].next_cursor,
+        })
+
+    def test_detects_missing_index(self):
+        # Без индекса (group, pub_date, id) лента группы находится по
+        # индексу внешнего ключа, но сортируется отдельно.
+        name = next(
+            index.name for index in Post._meta.indexes
+            if index.fields[0] == 'group'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX "{name}"')
+        _, bad = self.bad_plans(
+            reverse('group', kwargs={'slug': self.group.slug})
+        )
+        self.assertTrue(bad)
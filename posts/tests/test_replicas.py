@@ -0,0 +1,103 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.conf import settings
+from django.test import (
+    RequestFactory, SimpleTestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+
+from posts import replicas
+from posts.middleware import ReplicaMiddleware
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(self.view)
+
+    def view(self, request):
+        # Вместо представления запоминаем, куда ушло бы чтение.
+        self.read_from = self.router.db_for_read(Post)
+        return HttpResponse()
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replicas.reading_from_replicas():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    @override_settings(FEED_CACHE_TIMEOUT=600, REPLICA_PIN_SECONDS=10)
+    def test_replica_fragments_expire_with_pin(self):
+        self.assertEqual(replicas.feed_cache_timeout(), 600)
+        with replicas.reading_from_replicas():
+            self.assertEqual(replicas.feed_cache_timeout(), 10)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+    def test_feed_views_read_from_replica(self):
+        self.middleware(self.factory.get(reverse('index')))
+        self.assertEqual(self.read_from, 'replica')
+        self.assertEqual(replicas.read_alias(), 'default')
+
+    def test_other_views_read_from_primary(self):
+        self.middleware(self.factory.get(reverse('new_post')))
+        self.assertEqual(self.read_from, 'default')
+
+    def test_write_pins_to_primary(self):
+        response = self.middleware(self.factory.post(reverse('new_post')))
+        self.assertEqual(self.read_from, 'default')
+        cookie = response.cookies['primary_pin']
+        self.assertEqual(cookie['max-age'], 10)
+
+        request = self.factory.get(reverse('index'))
+        request.COOKIES['primary_pin'] = cookie.value
+        self.middleware(request)
+        self.assertEqual(self.read_from, 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        response = self.middleware(self.factory.post(reverse('new_post')))
+        self.assertNotIn('primary_pin', response.cookies)
+        self.middleware(self.factory.get(reverse('index')))
+        self.assertEqual(self.read_from, 'default')
+
+
+class SyncReplicasTests(TransactionTestCase):
+    # backup API не видит данных незавершённой транзакции TestCase.
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.name = os.path.join(self.directory, 'replica.sqlite3')
+        user = User.objects.create_user(username='user')
+        Post.objects.create(text='text', author=user)
+
+    def test_copy(self):
+        replicas.copy(self.name)
+        with sqlite3.connect(self.name) as connection:
+            count = connection.execute(
+                'SELECT COUNT(*) FROM posts_post').fetchone()[0]
+        self.assertEqual(count, 1)
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_command(self):
+        with mock.patch.dict(settings.DATABASES,
+                             {'replica': {'NAME': self.name}}):
+            call_command('sync_replicas', stdout=StringIO())
+        self.assertTrue(os.path.exists(self.name))
@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(POST_ON_PAGE=2)
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.other = User.objects.create_user(username='other')
+        self.group = Group.objects.create(title='Море', slug='sea')
+        self.client = Client()
+
+    def found(self, **params):
+        response = self.client.get(reverse('search'), params)
+        return [post.text for post in response.context['page']]
+
+    def test_does_not_shadow_profile(self):
+        User.objects.create_user(username='search')
+        response = self.client.get(
+            reverse('profile', kwargs={'username': 'search'})
+        )
+        self.assertEqual(response.context['author'].username, 'search')
+
+    def test_ranked_by_relevance(self):
+        Post.objects.create(text='кофе и книга', author=self.author)
+        Post.objects.create(text='кофе кофе кофе', author=self.author)
+        Post.objects.create(text='про чай', author=self.author)
+        self.assertEqual(
+            self.found(q='кофе'), ['кофе кофе кофе', 'кофе и книга']
+        )
+
+    def test_prefix_and_all_words_required(self):
+        Post.objects.create(text='Утро в городе', author=self.author)
+        Post.objects.create(text='Город спит', author=self.author)
+        self.assertEqual(self.found(q='утро город'), ['Утро в городе'])
+
+    def test_query_syntax_is_not_interpreted(self):
+        Post.objects.create(text='NEAR AND OR', author=self.author)
+        self.assertEqual(self.found(q='"near" OR (*'), ['NEAR AND OR'])
+        self.assertEqual(self.found(q='***'), [])
+
+    def test_filters(self):
+        Post.objects.create(text='море', author=self.author, group=self.group)
+        Post.objects.create(text='море', author=self.other, group=self.group)
+        Post.objects.create(text='море', author=self.other)
+        self.assertEqual(len(self.found(q='море', group='sea')), 2)
+        self.assertEqual(
+            len(self.found(q='море', group='sea', author='other')), 1
+        )
+        response = self.client.get(
+            reverse('search'), {'q': 'море', 'author': 'nobody'}
+        )
+        self.assertIsNone(response.context['page'])
+
+    def test_index_follows_edit_and_delete(self):
+        post = Post.objects.create(text='старый текст', author=self.author)
+        post.text = 'новый текст'
+        post.save()
+        self.assertEqual(self.found(q='старый'), [])
+        self.assertEqual(self.found(q='новый'), ['новый текст'])
+        post.delete()
+        self.assertEqual(self.found(q='текст'), [])
+
+    def test_keyset_pagination(self):
+        for number in range(5):
+            Post.objects.create(
+                text='снег ' * (number + 1), author=self.author
+            )
+        seen = []
+        params = {'q': 'снег'}
+        while True:
+            response = self.client.get(reverse('search'), params)
+            page = response.context['page']
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            self.assertContains(response, f'after={page.next_cursor}')
+            params = {'q': 'снег', 'after': page.next_cursor}
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+        response = self.client.get(
+            reverse('search'), {'q': 'снег', 'before': page.previous_cursor}
+        )
+        self.assertEqual(
+            [post.id for post in response.context['page']], seen[2:4]
+        )
+
+    def test_rebuild_command(self):
+        Post.objects.create(text='лес', author=self.author)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        self.assertEqual(self.found(q='лес'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.found(q='лес'), ['лес'])
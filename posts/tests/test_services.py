@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph, services
+from posts.models import Comment, FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+@override_settings(FOLLOW_FEED_MODE='push', FOLLOW_FEED_FANOUT_LIMIT=None)
+class ServicesTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(text='text', author=self.author)
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_follow_is_idempotent(self):
+        self.assertTrue(services.follow(self.reader.id, self.author.id))
+        self.assertFalse(services.follow(self.reader.id, self.author.id))
+        self.assertEqual(Follow.objects.count(), 1)
+        # Обработчики post_save отработали, как при save().
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.followers_count, 1)
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertTrue(follow_graph.follows(self.reader.id, self.author.id))
+
+    def test_cannot_follow_self(self):
+        self.assertFalse(services.follow(self.reader.id, self.reader.id))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_unfollow_is_idempotent(self):
+        services.follow(self.reader.id, self.author.id)
+        self.assertTrue(services.unfollow(self.reader.id, self.author.id))
+        self.assertFalse(services.unfollow(self.reader.id, self.author.id))
+        self.author.profile.refresh_from_db()
+        self.assertEqual(self.author.profile.followers_count, 0)
+
+    def test_add_comment(self):
+        comment = services.add_comment(self.post.id, self.reader.id, 'hi')
+        self.assertEqual(comment.post_id, self.post.id)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        with self.assertRaises(Post.DoesNotExist):
+            services.add_comment(self.post.id + 1, self.reader.id, 'hi')
+
+    def test_views(self):
+        kwargs = {'username': 'author'}
+        for _ in range(2):
+            response = self.client.get(reverse('profile_follow',
+                                               kwargs=kwargs))
+            self.assertRedirects(response, reverse('profile', kwargs=kwargs))
+        self.assertEqual(Follow.objects.count(), 1)
+        for _ in range(2):
+            self.client.get(reverse('profile_unfollow', kwargs=kwargs))
+        self.assertFalse(Follow.objects.exists())
+        response = self.client.get(reverse('profile_follow',
+                                           kwargs={'username': 'nobody'}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_on_missing_post(self):
+        response = self.client.post(
+            reverse('add_comment',
+                    kwargs={'username': 'author', 'post_id': 999}),
+            {'text': 'hi'},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Comment.objects.exists())
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import QuerySet
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import cards
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+STREAMING = ('index', 'profile', 'post')
+
+
+@override_settings(CACHES=LOCMEM)
+class StreamingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        for number in range(5):
+            self.post = Post.objects.create(
+                text=f'post {number}', author=self.author
+            )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='first comment'
+        )
+        self.client = Client()
+
+    def urls(self):
+        return (
+            reverse('index'),
+            reverse('profile', kwargs={'username': 'author'}),
+            reverse('post', kwargs={
+                'username': 'author', 'post_id': self.post.id,
+            }),
+        )
+
+    def test_disabled_by_default(self):
+        self.assertEqual(settings.STREAMING_FEEDS, ())
+        for url in self.urls():
+            with self.subTest(url=url):
+                self.assertFalse(self.client.get(url).streaming)
+
+    def test_streamed_page_matches_rendered_page(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                cache.clear()
+                expected = self.client.get(url).content
+                cache.clear()
+                with self.settings(STREAMING_FEEDS=STREAMING):
+                    response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                self.assertEqual(
+                    b''.join(response.streaming_content), expected
+                )
+
+    @override_settings(STREAMING_FEEDS=STREAMING)
+    def test_head_comes_before_posts(self):
+        response = self.client.get(reverse('index'))
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('<nav', chunks[0])
+        self.assertNotIn('post 4', chunks[0])
+        # Вся страница — одна пачка карточек.
+        self.assertIn('post 4', chunks[1])
+        self.assertIn('post 0', chunks[1])
+
+    @override_settings(STREAMING_FEEDS=STREAMING, STREAMING_CHUNK_SIZE=2)
+    def test_posts_come_in_chunks(self):
+        response = self.client.get(reverse('index'))
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn('post 4', chunks[1])
+        self.assertNotIn('post 2', chunks[1])
+        self.assertIn('post 2', chunks[2])
+
+    @override_settings(STREAMING_FEEDS=STREAMING)
+    def test_one_cache_read_per_page(self):
+        with mock.patch.object(
+            cards, 'cache', mock.Mock(wraps=cache)
+        ) as card_cache:
+            response = self.client.get(reverse('index'))
+            b''.join(response.streaming_content)
+        card_cache.get_many.assert_called_once()
+
+    @override_settings(STREAMING_FEEDS=STREAMING)
+    def test_posts_are_read_with_iterator(self):
+        calls = []
+        iterator = QuerySet.iterator
+
+        def spy(queryset, *args, **kwargs):
+            calls.append(queryset.model)
+            return iterator(queryset, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'iterator', spy):
+            response = self.client.get(reverse('index'))
+            b''.join(response.streaming_content)
+        self.assertEqual(calls, [Post])
+
+    @override_settings(STREAMING_FEEDS=STREAMING)
+    def test_post_page_sets_csrf_cookie(self):
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('post', kwargs={
+            'username': 'author', 'post_id': self.post.id,
+        }))
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn('first comment', content)
+        self.assertIn('csrfmiddlewaretoken', content)
+
+    @override_settings(
+        STREAMING_FEEDS=STREAMING, FEED_PAGINATION={'index': 'keyset'}
+    )
+    def test_keyset_page(self):
+        self.assertContains(self.client.get(reverse('index')), 'post 0')
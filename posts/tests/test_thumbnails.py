@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, Thumbnail
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='image.png', size=(100, 50)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, (255, 0, 0, 128)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_ASYNC=False)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='user')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_thumbnail_generated_on_upload(self):
+        self.client.post(reverse('new_post'), data={
+            'text': 'text', 'image': make_image(size=(1200, 600)),
+        })
+        self.assertEqual(
+            sorted(Thumbnail.objects.values_list('format', 'width', 'height')),
+            [('jpeg', 360, 127), ('jpeg', 480, 170), ('jpeg', 720, 254),
+             ('jpeg', 960, 339), ('webp', 360, 127), ('webp', 480, 170),
+             ('webp', 720, 254), ('webp', 960, 339)],
+        )
+        for thumbnail in Thumbnail.objects.all():
+            with Image.open(thumbnail.image.path) as image:
+                self.assertEqual(
+                    (image.format, image.size),
+                    (thumbnail.format.upper(),
+                     (thumbnail.width, thumbnail.height)),
+                )
+                self.assertNotIn('exif', image.info)
+
+        response = self.client.get(reverse('index'))
+        card = response.context['page'][0].card_image
+        self.assertEqual(card['src'], Thumbnail.objects.get(
+            format='jpeg', width=960).image.url)
+        self.assertContains(response, f'srcset="{card["srcset"]}"')
+        webp = card['sources'][0]['srcset']
+        self.assertContains(
+            response, f'<source type="image/webp" srcset="{webp}"'
+        )
+
+    def test_small_image_is_not_upscaled_to_every_width(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image=make_image()
+        )
+        self.assertEqual(
+            sorted(post.thumbnails.values_list('format', 'width')),
+            [('jpeg', 360), ('webp', 360)],
+        )
+
+    def test_exif_stripped_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Повёрнуто на 90°.
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (600, 1200)).save(buffer, 'JPEG', exif=exif)
+        Post.objects.create(text='text', author=self.user, image=(
+            SimpleUploadedFile('photo.jpg', buffer.getvalue(), 'image/jpeg')
+        ))
+        # После поворота картинка шириной 1200 — хватает на все размеры.
+        thumbnail = Thumbnail.objects.get(format='jpeg', width=960)
+        with Image.open(thumbnail.image.path) as image:
+            self.assertEqual(len(image.getexif()), 0)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100 * 100)
+    def test_huge_upload_rejected(self):
+        response = self.client.post(reverse('new_post'), data={
+            'text': 'text', 'image': make_image(size=(200, 200)),
+        })
+        self.assertFormError(
+            response, 'form', 'image',
+            'Слишком большое изображение: не больше 0 мегапикселей.',
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_original_shown_until_thumbnail_ready(self):
+        with self.settings(POST_THUMBNAIL_SIZES={}):
+            post = Post.objects.create(
+                text='text', author=self.user, image=make_image()
+            )
+        self.assertFalse(Thumbnail.objects.exists())
+        self.assertEqual(post.card_image['src'], post.image.url)
+
+    def test_thumbnails_replaced_with_image(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image=make_image()
+        )
+        old_paths = {thumbnail.image.path
+                     for thumbnail in Thumbnail.objects.all()}
+        post.image = make_image('other.png')
+        post.save()
+        self.assertEqual(Thumbnail.objects.count(), 2)
+        for path in old_paths:
+            self.assertFalse(os.path.exists(path))
+
+        post.delete()
+        self.assertFalse(Thumbnail.objects.exists())
+
+    def test_missing_file_is_skipped(self):
+        post = Post.objects.create(
+            text='text', author=self.user, image='posts/missing.png'
+        )
+        self.assertFalse(post.thumbnails.exists())
+        self.assertEqual(post.card_image['src'], post.image.url)
+
+    def test_backfill_command(self):
+        with self.settings(POST_THUMBNAIL_SIZES={}):
+            Post.objects.create(
+                text='text', author=self.user, image=make_image()
+            )
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.assertEqual(Thumbnail.objects.count(), 2)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import Comment, FeedEntry, Follow, Group, Post
+from users.models import Profile
+
+User = get_user_model()
+
+OLD_DATE = datetime(2001, 2, 3, 4, 5, 6, 789012, tzinfo=timezone.utc)
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        author = User.objects.create_user(username='author')
+        reader = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Лес', slug='forest')
+        post = Post.objects.create(
+            text='Прогулка по лесу', author=author, group=group
+        )
+        Post.objects.filter(pk=post.pk).update(pub_date=OLD_DATE)
+        Comment.objects.create(post=post, author=reader, text='Красиво')
+        Follow.objects.create(user=reader, author=author)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def clear(self):
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.assertFalse(Post.objects.exists())
+
+    def assert_restored(self):
+        post = Post.objects.get()
+        self.assertEqual(post.pub_date, OLD_DATE)
+        self.assertEqual(post.group.slug, 'forest')
+        self.assertEqual(post.comments_count, 1)
+        author = Profile.objects.get(user__username='author')
+        self.assertEqual((author.posts_count, author.followers_count), (1, 1))
+        self.assertEqual(
+            FeedEntry.objects.get().user.username, 'reader'
+        )
+        self.assertEqual(
+            [found.pk for found in search.SearchPaginator(
+                'лесу', 10).get_page()],
+            [post.pk],
+        )
+
+    def test_ndjson_round_trip(self):
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stdout=StringIO())
+        with open(path, encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 6)
+        self.clear()
+        out = StringIO()
+        call_command('import_yatube', path, batch_size=1, stdout=out)
+        self.assertIn('строк/с', out.getvalue())
+        self.assert_restored()
+
+    def test_csv_round_trip(self):
+        path = os.path.join(self.directory, 'csv')
+        call_command('export_yatube', path, format='csv', stdout=StringIO())
+        self.clear()
+        call_command('import_yatube', path, stdout=StringIO())
+        self.assert_restored()
+        self.assertIsNone(User.objects.get(username='author').last_login)
+
+    def test_ignore_conflicts(self):
+        path = os.path.join(self.directory, 'dump.ndjson')
+        call_command('export_yatube', path, stdout=StringIO())
+        call_command(
+            'import_yatube', path, ignore_conflicts=True, stdout=StringIO()
+        )
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_import_legacy_dump(self):
+        self.clear()
+        call_command(
+            'import_yatube', os.path.join(settings.BASE_DIR, 'dump.json'),
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 42)
+        post = Post.objects.get(pk=2)
+        self.assertEqual(post.updated, post.pub_date)
@@ -17,6 +17,12 @@ User = get_user_model()
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
+LOCMEM = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostsViewsTests(TestCase):
@@ -162,21 +168,24 @@ class PostsViewsTests(TestCase):
         }))
         self.context_check(response.context['post'])
 
+    @override_settings(CACHES=LOCMEM)
     def test_cache_index_page(self):
+        cache.clear()
         response = self.authorized_client.get(reverse('index'))
+        Post.objects.filter(pk=self.post.pk).update(text='silent edit')
+
+        response_after_update = self.authorized_client.get(reverse('index'))
+        self.assertEqual(response.content, response_after_update.content)
+
         Post.objects.create(
             text='cache test',
             author=self.user
         )
-
         response_after_created = self.authorized_client.get(reverse('index'))
-        self.assertEqual(response.content, response_after_created.content)
-
-        cache.clear()
-        response_clear_cache = self.authorized_client.get(reverse('index'))
         self.assertNotEqual(
-            response_after_created.content, response_clear_cache.content
+            response_after_update.content, response_after_created.content
         )
+        self.assertContains(response_after_created, 'cache test')
 
     def test_authorized_follow(self):
         object_count = Follow.objects.count()
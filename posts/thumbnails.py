@@ -0,0 +1,157 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connection, transaction
+from django.dispatch import Signal
+from PIL import Image, ImageOps
+
+from yatube.instrumentation import timed_function
+
+from .models import Post, Thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после того, как превью поста подготовлены или удалены.
+thumbnails_changed = Signal(providing_args=['post_id'])
+
+SAVE_OPTIONS = {
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'webp': {'quality': 80, 'method': 4},
+}
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def variants(source_width):
+    """
+    Размеры превью для картинки шириной `source_width`: пары
+    (имя, (ширина, высота)). Ширины из POST_THUMBNAIL_WIDTHS больше
+    исходной не увеличиваются — кроме самой маленькой, чтобы у поста было
+    хотя бы одно превью.
+    """
+    result = []
+    for name, (width, height) in settings.POST_THUMBNAIL_SIZES.items():
+        widths = sorted(
+            {size for size in settings.POST_THUMBNAIL_WIDTHS if size < width}
+            | {width}
+        )
+        fitting = [size for size in widths if size <= source_width]
+        for size in fitting or widths[:1]:
+            result.append((name, (size, round(height * size / width))))
+    return result
+
+
+def _open(file):
+    """
+    Открывает картинку, не раскодируя больше, чем нужно для превью.
+    """
+    source = Image.open(file)
+    if source.width * source.height > settings.POST_IMAGE_MAX_PIXELS:
+        source.close()
+        raise ValueError(f'слишком много пикселей: {source.size}')
+    largest = max(
+        max(size) for _, size in variants(source.width)
+    ) if settings.POST_THUMBNAIL_SIZES else 0
+    # JPEG раскодируется сразу с уменьшением в 2–8 раз, если исходник
+    # намного больше самого крупного превью.
+    source.draft('RGB', (largest, largest))
+    # Поворот по EXIF; сами метаданные в превью не попадают.
+    image = ImageOps.exif_transpose(source)
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    return image
+
+
+def _render(source, size, image_format):
+    """
+    Обрезает картинку по центру до `size` и сохраняет в `image_format`.
+    """
+    image = ImageOps.fit(source, size, Image.LANCZOS, centering=(0.5, 0.5))
+    buffer = BytesIO()
+    image.save(buffer, image_format.upper(), **SAVE_OPTIONS[image_format])
+    return buffer.getvalue()
+
+
+def _create(post):
+    try:
+        with post.image.open('rb') as file:
+            source = _open(file)
+            rendered = [
+                (name, size, image_format,
+                 _render(source, size, image_format))
+                for name, size in variants(source.width)
+                for image_format in settings.POST_THUMBNAIL_FORMATS
+            ]
+    except (OSError, ValueError, SuspiciousFileOperation) as error:
+        logger.warning('Не удалось подготовить превью поста %s: %s',
+                       post.pk, error)
+        return 0
+    thumbnails = []
+    for name, (width, height), image_format, content in rendered:
+        thumbnail = Thumbnail(
+            post=post, name=name, format=image_format,
+            width=width, height=height,
+        )
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        thumbnail.image.save(
+            f'{post.pk}_{name}_{width}x{height}.{extension}',
+            ContentFile(content),
+            save=False,
+        )
+        thumbnails.append(thumbnail)
+    Thumbnail.objects.bulk_create(thumbnails)
+    return len(thumbnails)
+
+
+@timed_function('thumbnail')
+def generate(post):
+    """
+    Готовит превью поста всех размеров из `variants` во всех форматах из
+    POST_THUMBNAIL_FORMATS взамен прежних. Возвращает число созданных
+    превью.
+    """
+    deleted, _ = Thumbnail.objects.filter(post=post).delete()
+    created = _create(post) if post.image else 0
+    if deleted or created:
+        thumbnails_changed.send(sender=Thumbnail, post_id=post.pk)
+    return created
+
+
+def _generate_in_background(post_id):
+    close_old_connections()
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is not None:
+            generate(post)
+    except Exception:
+        logger.exception('Ошибка подготовки превью поста %s', post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """
+    Ставит подготовку превью в фоновый пул после фиксации транзакции,
+    при THUMBNAIL_ASYNC = False готовит их сразу.
+    """
+    if not settings.THUMBNAIL_ASYNC:
+        generate(post)
+        return
+    post_id = post.pk
+    transaction.on_commit(
+        lambda: _get_executor().submit(_generate_in_background, post_id)
+    )
@@ -0,0 +1,287 @@
+"""
+Потоковые выгрузка и загрузка данных Yatube (команды `export_yatube` и
+`import_yatube`).
+
+Формат NDJSON — по записи на строку, как у `dumpdata`:
+`{"model": "posts.post", "pk": 1, "fields": {...}}`. Формат CSV — каталог
+с файлом `<model>.csv` на каждую модель. Модели выгружаются в порядке
+MODELS, чтобы внешние ключи при загрузке уже существовали.
+"""
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import counters, feed, generations, search
+
+MODELS = (
+    'auth.user',
+    'posts.group',
+    'posts.post',
+    'posts.comment',
+    'posts.follow',
+)
+
+
+def get_model(label):
+    return apps.get_model(label)
+
+
+def fields(model):
+    """
+    Выгружаемые поля модели: все обычные поля, кроме первичного ключа.
+    """
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+
+
+def export_rows(model, chunk_size=2000, queryset=None):
+    """
+    Записи `model` в виде словарей формата dumpdata; читает базу пачками
+    по `chunk_size` строк.
+    """
+    label = model._meta.label_lower
+    columns = fields(model)
+    if queryset is None:
+        queryset = model._default_manager.all()
+    rows = queryset.order_by('pk').values_list(
+        'pk', *(field.attname for field in columns)
+    ).iterator(chunk_size=chunk_size)
+    for pk, *values in rows:
+        yield {
+            'model': label,
+            'pk': pk,
+            'fields': {
+                field.name: value for field, value in zip(columns, values)
+            },
+        }
+
+
+def _json_default(value):
+    # В отличие от DjangoJSONEncoder, время сохраняется с микросекундами.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, default=_json_default)
+
+
+def ndjson_line(row):
+    return _encoder.encode(row) + '\n'
+
+
+def write_ndjson(stream, models=MODELS, chunk_size=2000):
+    for label in models:
+        for row in export_rows(get_model(label), chunk_size):
+            stream.write(ndjson_line(row))
+            yield label
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_json(stream):
+    """
+    Старый формат `dumpdata` (один JSON-массив, как dump.json). Файл
+    читается целиком, поэтому годится только для небольших выгрузок;
+    записи переупорядочиваются по MODELS.
+    """
+    order = {label: position for position, label in enumerate(MODELS)}
+    yield from sorted(
+        json.load(stream),
+        key=lambda row: order.get(row['model'], len(MODELS)),
+    )
+
+
+def write_csv(directory, models=MODELS, chunk_size=2000):
+    os.makedirs(directory, exist_ok=True)
+    for label in models:
+        model = get_model(label)
+        names = [field.name for field in fields(model)]
+        path = os.path.join(directory, f'{label}.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(['pk', *names])
+            for row in export_rows(model, chunk_size):
+                writer.writerow([
+                    row['pk'],
+                    *(_csv_value(row['fields'][name]) for name in names),
+                ])
+                yield label
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    return _json_default(value) if hasattr(value, 'isoformat') else value
+
+
+def read_csv(directory):
+    for label in MODELS:
+        path = os.path.join(directory, f'{label}.csv')
+        if not os.path.exists(path):
+            continue
+        with open(path, newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                pk = row.pop('pk')
+                yield {'model': label, 'pk': pk, 'fields': row}
+
+
+def _build(model, columns, row, auto_fields=()):
+    values = {'pk': model._meta.pk.to_python(row['pk'])}
+    data = row['fields']
+    for field in columns:
+        if field.name not in data:
+            continue
+        value = data[field.name]
+        if value == '' and field.null:
+            # В CSV пустая строка — это NULL.
+            value = None
+        if value is not None:
+            target = field.target_field if field.is_relation else field
+            value = target.to_python(value)
+        values[field.attname] = value
+    missing = [
+        field for field in columns
+        if field in auto_fields and field.attname not in values
+    ]
+    if missing:
+        # Поля нет в файле (Post.updated в старом dump.json), а keep_dates()
+        # отключил его заполнение: берём дату из файла или текущее время.
+        date = next((
+            values[field.attname] for field in columns
+            if field in auto_fields and values.get(field.attname)
+        ), None) or timezone.now()
+        for field in missing:
+            values[field.attname] = date
+    return model(**values)
+
+
+@contextmanager
+def keep_dates():
+    """
+    Отключает auto_now_add/auto_now, чтобы даты из файла не заменились
+    текущим временем. Отдаёт множество отключённых полей.
+    """
+    changed = []
+    for label in MODELS:
+        for field in get_model(label)._meta.concrete_fields:
+            flags = (getattr(field, 'auto_now', False),
+                     getattr(field, 'auto_now_add', False))
+            if any(flags):
+                changed.append((field, flags))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield {field for field, flags in changed}
+    finally:
+        for field, (auto_now, auto_now_add) in changed:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Progress:
+    """
+    Печатает число строк и скорость не чаще раза в `interval` секунд.
+    """
+
+    def __init__(self, write, interval=1.0):
+        self.write = write
+        self.interval = interval
+        self.started = self.reported = time.monotonic()
+        self.counts = {}
+
+    def add(self, label, count=1):
+        self.counts[label] = self.counts.get(label, 0) + count
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self.write(self.line(label))
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.total() / elapsed if elapsed else 0.0
+
+    def line(self, label):
+        return (f'{label}: {self.counts[label]}, всего {self.total()} строк, '
+                f'{self.rate():.0f} строк/с')
+
+
+def load(rows, batch_size=1000, ignore_conflicts=False, progress=None):
+    """
+    Загружает записи `rows` через bulk_create пачками по `batch_size`,
+    каждая пачка — в своей транзакции. Сигналы моделей при bulk_create не
+    отправляются, поэтому счётчики, ленты и поиск нужно пересобрать после
+    загрузки — см. `rebuild`. Возвращает число строк по моделям;
+    записи неизвестных моделей (сессии, журнал админки) пропускаются.
+    """
+    loaded = {}
+    batch, model, columns = [], None, None
+
+    def flush():
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    batch, ignore_conflicts=ignore_conflicts
+                )
+            label = model._meta.label_lower
+            loaded[label] = loaded.get(label, 0) + len(batch)
+            if progress is not None:
+                progress.add(label, len(batch))
+            batch.clear()
+
+    with keep_dates() as auto_fields:
+        for row in rows:
+            label = row['model']
+            if label not in MODELS:
+                loaded.setdefault('skipped', 0)
+                loaded['skipped'] += 1
+                continue
+            if model is None or label != model._meta.label_lower:
+                flush()
+                model = get_model(label)
+                columns = fields(model)
+            batch.append(_build(model, columns, row, auto_fields))
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    _reset_sequences()
+    return loaded
+
+
+def _reset_sequences():
+    # На SQLite счётчик AUTOINCREMENT сдвигается сам, другим базам нужно
+    # явно продвинуть последовательности за загруженные id.
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [get_model(label) for label in MODELS]
+    )
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+def rebuild():
+    """
+    Пересчитывает всё, что сигналы поддерживают при обычной работе:
+    счётчики, входящие ленты, поисковый индекс и кеш лент. Превью картинок
+    готовит отдельная команда `generate_thumbnails`.
+    """
+    counters.recount_posts()
+    counters.recount_profiles()
+    feed.rebuild()
+    search.rebuild()
+    generations.bump_all()
@@ -6,6 +6,8 @@ urlpatterns = [
     path('new/', views.new_post, name='new_post'),
     path('', views.index, name='index'),
     path('follow/', views.follow_index, name='follow_index'),
+    # Не 'search/': этот адрес занял бы профиль пользователя search.
+    path('posts/search/', views.search_posts, name='search'),
     path(
         '<str:username>/follow/',
         views.profile_follow,
@@ -16,6 +18,11 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow'
     ),
+    path(
+        '<str:username>/export/',
+        views.profile_export,
+        name='profile_export'
+    ),
     path('<str:username>/', views.profile, name='profile'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path(
@@ -28,4 +35,9 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        '<str:username>/<int:post_id>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
 ]
@@ -1,37 +1,77 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 
 
-from .forms import CommentForm, PostForm
-from .models import Group, Post, Follow
-from yatube.settings import POST_ON_PAGE
+from . import (
+    archive, conditional, counters, feed, follow_graph, generations,
+    loaders, queries, replicas, search, services, streaming,
+)
+from .forms import CommentForm, PostForm, SearchForm
+from .models import Group, Post
+from .pagination import KeysetPaginator, encode_cursor, paginate
 
 
 User = get_user_model()
 
 
 def index(request):
-    posts = Post.objects.all().select_related(
-        'author', 'group'
-    ).prefetch_related('comments')
+    etag, not_modified = conditional.check(request, 'index')
+    if not_modified:
+        return not_modified
+    posts = queries.index_posts()
 
-    paginator = Paginator(posts, POST_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'index.html', {'page': page})
+    page = loaders.load_page(paginate(request, posts, 'index'), 'index')
+    response = streaming.render(request, 'index.html', {
+        'page': page,
+        'generation': generations.get('index'),
+        'cache_timeout': replicas.feed_cache_timeout(),
+    }, 'index')
+    return conditional.finish(request, response, etag)
 
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all().select_related('author')
+    etag, not_modified = conditional.check(request, f'group:{group.id}')
+    if not_modified:
+        return not_modified
+    posts = queries.group_posts(group)
+
+    page = loaders.load_page(paginate(request, posts, 'group'), 'group')
+    return conditional.finish(request, render(request, 'group.html', {
+        'group': group,
+        'posts': page,
+        'generation': generations.get(f'group:{group.id}'),
+        'cache_timeout': replicas.feed_cache_timeout(),
+    }), etag)
+
 
-    paginator = Paginator(posts, POST_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'group.html', {'group': group, 'posts': page})
+def search_posts(request):
+    form = SearchForm(request.GET or None)
+    page = None
+    if form.is_valid():
+        paginator = search.paginator(
+            form.cleaned_data['q'],
+            group=form.cleaned_data['group'],
+            author=form.cleaned_data['author'],
+        )
+        page = paginator.get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+    query = request.GET.copy()
+    query.pop('after', None)
+    query.pop('before', None)
+    return render(request, 'search.html', {
+        'form': form,
+        'page': page,
+        'query': query.urlencode(),
+    })
 
 
 @login_required
@@ -46,38 +86,107 @@ def new_post(request):
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.all().prefetch_related('comments')
-
-    follow = False
-    if request.user.is_authenticated:
-        follow = Follow.objects.filter(
-            user=request.user,
-            author=author,
-        ).exists()
-
-    paginator = Paginator(user_posts, POST_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'profile.html', {
+    author = get_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    etag, not_modified = conditional.check(
+        request, f'profile:{author.id}', f'user:{author.id}'
+    )
+    if not_modified:
+        return not_modified
+    counters.profile_for(author)
+    user_posts = queries.profile_posts(author)
+
+    follow = follow_graph.follows(request.user.id, author.id)
+
+    page = loaders.load_page(
+        paginate(request, user_posts, 'profile'), 'profile'
+    )
+    response = streaming.render(request, 'profile.html', {
         'posts': page,
         'author': author,
         'follow': follow,
-    }
-    )
+        'is_owner': request.user == author,
+        'generation': generations.get(f'profile:{author.id}'),
+        'cache_timeout': replicas.feed_cache_timeout(),
+    }, 'profile')
+    return conditional.finish(request, response, etag)
 
 
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id, author__username=username)
-    comments = post.comments.all().select_related('author')
+    post = get_object_or_404(
+        Post.objects.select_related('author__profile'),
+        id=post_id,
+        author__username=username,
+    )
+    scopes = [f'post:{post.id}', f'profile:{post.author_id}',
+              f'user:{post.author_id}']
+    if post.group_id:
+        scopes.append(f'group:{post.group_id}')
+    etag, not_modified = conditional.check(request, *scopes)
+    if not_modified:
+        return not_modified
+    counters.profile_for(post.author)
+    # Первая страница комментариев; остальные догружает post_comments.
+    # Шаблон получает QuerySet страницы, а есть ли продолжение, решает
+    # EXISTS по ключу после последней строки: счётчик в посте может
+    # разойтись с таблицей.
+    per_page = settings.COMMENTS_ON_PAGE
+    ordered = queries.post_comments(post).order_by('created', 'id')
+    comments = ordered[:per_page]
+    next_cursor = None
+    if len(comments) == per_page:
+        last = comments[per_page - 1]
+        if ordered.filter(
+            Q(created__gt=last.created)
+            | Q(created=last.created, id__gt=last.id)
+        ).exists():
+            next_cursor = encode_cursor([last.created, last.id])
     form = CommentForm()
-    return render(request, 'post.html', {
+    response = streaming.render(request, 'post.html', {
         'post': post,
         'author': post.author,
+        'is_owner': request.user == post.author,
         'comments': comments,
-        'form': form
-    }
+        'next_cursor': next_cursor,
+        'form': form,
+    }, 'post')
+    return conditional.finish(request, response, etag)
+
+
+def post_comments(request, username, post_id):
+    """
+    Следующая страница комментариев: HTML-фрагмент для кнопки «Показать
+    ещё» или JSON при ?format=json.
+    """
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        id=post_id,
+        author__username=username,
     )
+    comments = KeysetPaginator(
+        queries.post_comments(post),
+        settings.COMMENTS_ON_PAGE,
+        ordering=('created', 'id'),
+    ).get_page(after=request.GET.get('after'))
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created': comment.created.isoformat(),
+                }
+                for comment in comments
+            ],
+            'next': comments.next_cursor,
+        })
+    return render(request, 'mini_templates/comment_list.html', {
+        'post': post,
+        'comments': comments,
+        'next_cursor': comments.next_cursor,
+    })
 
 
 def post_edit(request, username, post_id):
@@ -104,13 +213,14 @@ def post_edit(request, username, post_id):
 
 @login_required()
 def add_comment(request, username, post_id):
-    post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
-        comment_object = form.save(commit=False)
-        comment_object.author = request.user
-        comment_object.post = post
-        comment_object.save()
+        try:
+            services.add_comment(
+                post_id, request.user.id, form.cleaned_data['text']
+            )
+        except Post.DoesNotExist:
+            raise Http404
     return redirect(reverse(
         'post', kwargs={'username': username, 'post_id': post_id}
     ))
@@ -118,35 +228,54 @@ def add_comment(request, username, post_id):
 
 @login_required()
 def follow_index(request):
-    posts = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group').prefetch_related('comments')
+    heavy = feed.heavy_author_ids(request.user)
+    posts = queries.follow_posts(request.user, heavy)
 
-    paginator = Paginator(posts, POST_ON_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {'page': page})
+    page = loaders.load_page(paginate(request, posts, 'follow'), 'follow')
+    return render(request, 'follow.html', {
+        'page': page,
+        'generation': feed.generation(request.user),
+        'cache_timeout': replicas.feed_cache_timeout(),
+    })
+
+
+def _user_id(username):
+    user_id = User.objects.filter(username=username).values_list(
+        'id', flat=True).first()
+    if user_id is None:
+        raise Http404
+    return user_id
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    follow = Follow.objects.filter(user=request.user, author=author).exists()
-    if request.user != author and not follow:
-        Follow.objects.create(
-            user=request.user,
-            author=author,
-        )
+    services.follow(request.user.id, _user_id(username))
     return redirect(reverse('profile', kwargs={'username': username}))
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    get_object_or_404(Follow, user=request.user, author=author).delete()
+    services.unfollow(request.user.id, _user_id(username))
     return redirect(reverse('profile', kwargs={'username': username}))
 
 
+@login_required
+def profile_export(request, username):
+    if request.user.username != username:
+        raise PermissionDenied
+    format = request.GET.get('format', archive.ZIP)
+    if format not in archive.FORMATS:
+        format = archive.ZIP
+    response = StreamingHttpResponse(
+        archive.stream(request.user, format),
+        content_type=archive.CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{archive.filename(request.user, format)}"'
+    )
+    return response
+
+
 def page_not_found(request, exception):
     return render(request, 'misc/404.html', {'path': request.path}, status=404)
 
@@ -1,4 +1,28 @@
+import pytest
+
+from yatube.test_runner import (
+    isolated_caches, isolated_instrumentation, isolated_media,
+)
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _isolated_caches(django_test_environment):
+    with isolated_caches():
+        yield
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _isolated_media(django_test_environment):
+    with isolated_media():
+        yield
+
+
+@pytest.fixture(autouse=True, scope='session')
+def _isolated_instrumentation(django_test_environment):
+    with isolated_instrumentation():
+        yield
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='feed_pull',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Посты в ленты при чтении'),
+        ),
+    ]
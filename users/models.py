@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.db import models
+
+User = get_user_model()
+
+
+class Profile(models.Model):
+    """
+    Денормализованные счётчики автора, чтобы карточка профиля не делала
+    COUNT-запросов. Поддерживаются сигналами приложения posts, расхождения
+    исправляет команда `recount`.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Автор хотя бы раз превысил FOLLOW_FEED_FANOUT_LIMIT: его посты того
+    # времени есть не во всех входящих, поэтому ленты подписок и дальше
+    # подмешивают их при чтении.
+    feed_pull = models.BooleanField(
+        'Посты в ленты при чтении', default=False, editable=False,
+    )
+
+    def __str__(self):
+        return str(self.user)
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
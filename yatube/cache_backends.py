@@ -0,0 +1,451 @@
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.cache.backends import filebased
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from .instrumentation import timed_function
+
+# Методы, время которых попадает в часть `cache` инструментовки.
+TIMED_METHODS = (
+    'add', 'get', 'get_many', 'set', 'set_many', 'touch', 'incr', 'delete',
+    'delete_many', 'has_key', 'clear',
+)
+
+
+def _timed(cls):
+    for name in TIMED_METHODS:
+        setattr(cls, name, timed_function('cache')(getattr(cls, name)))
+    return cls
+
+
+def _create(config):
+    config = dict(config)
+    backend = import_string(config.pop('BACKEND'))
+    return backend(config.pop('LOCATION', ''), config)
+
+
+@_timed
+class FileBasedCache(filebased.FileBasedCache):
+    """
+    Файловый кеш с атомарным add(): стандартный проверяет наличие файла и
+    только потом пишет его, поэтому два процесса могут одновременно взять
+    одну и ту же блокировку TieredCache.
+
+    Стандартный кеш на каждой записи обходит каталог, чтобы проверить
+    MAX_ENTRIES; здесь — раз в CULL_EVERY записей процесса.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._cull_every = params.get('OPTIONS', {}).get('CULL_EVERY', 100)
+        self._writes = 0
+
+    def _cull(self):
+        self._writes += 1
+        if self._writes < self._cull_every:
+            return
+        self._writes = 0
+        super()._cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as file:
+                self._write_content(file, timeout, value)
+            for _ in range(2):
+                try:
+                    # link() не перезаписывает существующий файл.
+                    os.link(tmp_path, fname)
+                    return True
+                except FileExistsError:
+                    if self.has_key(key, version):
+                        return False
+                    # Истёкшая запись уже удалена has_key(), пробуем ещё раз.
+            return False
+        finally:
+            os.remove(tmp_path)
+
+
+@_timed
+class SQLiteCache(BaseCache):
+    """
+    Кеш в отдельном файле SQLite (LOCATION — путь к файлу) для поколений,
+    графа подписок и счётчиков: запись — одна строка по первичному ключу,
+    add() и incr() атомарны, в отличие от файлового кеша, который на
+    каждой записи обходит весь каталог ради MAX_ENTRIES.
+
+    Целые числа хранятся как есть, чтобы incr() выполнялся одним UPDATE;
+    остальное — pickle. Просроченные строки и лишние сверх MAX_ENTRIES
+    удаляются раз в CULL_EVERY записей процесса.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.cull_every = options.get('CULL_EVERY', 1000)
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=10, isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'key TEXT PRIMARY KEY, value BLOB, expires REAL'
+                ') WITHOUT ROWID'
+            )
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    @staticmethod
+    def _dump(value):
+        if type(value) is int:
+            return value
+        return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def _load(value):
+        if isinstance(value, int):
+            return value
+        return pickle.loads(value)
+
+    def _written(self, count=1):
+        self._writes += count
+        if self._writes >= self.cull_every:
+            self._writes = 0
+            self._cull()
+
+    def _cull(self):
+        connection = self._connection()
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (time.time(),)
+        )
+        count = connection.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if count > self._max_entries:
+            if self._cull_frequency:
+                count //= self._cull_frequency
+            connection.execute(
+                'DELETE FROM cache WHERE key IN '
+                '(SELECT key FROM cache ORDER BY key LIMIT ?)', (count,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        expires = self._expires(timeout)
+        if expires is not None and expires <= time.time():
+            return False
+        # Заменяется только просроченная запись.
+        cursor = self._connection().execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires <= ?',
+            (key, self._dump(value), expires, time.time()),
+        )
+        self._written()
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        row = self._connection().execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        if row is None:
+            return default
+        return self._load(row[0])
+
+    def get_many(self, keys, version=None):
+        names = {self._key(key, version): key for key in keys}
+        found = {}
+        items = list(names)
+        # Не больше 999 параметров в одном запросе.
+        for start in range(0, len(items), 900):
+            chunk = items[start:start + 900]
+            rows = self._connection().execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))),
+                (*chunk, time.time()),
+            )
+            for name, value in rows:
+                found[names[name]] = self._load(value)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expires(timeout)
+        rows = [
+            (self._key(key, version), self._dump(value), expires)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache (key, value, expires) '
+                'VALUES (?, ?, ?)', rows,
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._written(len(rows))
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._connection().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expires(timeout), self._key(key, version), time.time()),
+        )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        row = self._connection().execute(
+            'UPDATE cache SET value = value + ? WHERE key = ? '
+            "AND typeof(value) = 'integer' "
+            'AND (expires IS NULL OR expires > ?) RETURNING value',
+            (delta, self._key(key, version), time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError("Key '%s' not found" % key)
+        return row[0]
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        self._connection().executemany(
+            'DELETE FROM cache WHERE key = ?', [(key,) for key in keys]
+        )
+
+    def has_key(self, key, version=None):
+        return self._connection().execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Соединение живёт всё время работы потока: открывать файл заново
+        # на каждый запрос дороже, чем держать его.
+        pass
+
+
+@_timed
+class TieredCache(BaseCache):
+    """
+    Двухуровневый кеш: LRU в памяти процесса (LocMemCache) перед общим
+    для всех процессов хранилищем — файлами, memcached или любым другим
+    бэкендом Django, указанным в OPTIONS['SHARED'].
+
+    Защита от «стада» (stampede): в общем хранилище значение живёт на
+    STALE_TIMEOUT секунд дольше своего срока. Первый процесс, увидевший
+    устаревшее значение, берёт блокировку и получает промах —
+    пересчитывает и записывает фрагмент; остальные до этого момента
+    получают старое значение. Если задан LOCK_WAIT, то и при полном
+    отсутствии ключа остальные процессы ждут пересчёта до LOCK_WAIT
+    секунд — это имеет смысл только для кеша, где за каждым промахом
+    следует запись (например, кеш фрагментов).
+
+    Копия в памяти процесса живёт не дольше LOCAL_TIMEOUT секунд: столько
+    другие процессы могут видеть старое значение после перезаписи ключа.
+    Поэтому в двухуровневом кеше стоит хранить неизменяемые по ключу
+    значения (фрагменты с поколением в ключе), а сами поколения — в
+    отдельном кеше без локального уровня.
+
+    Пример настройки::
+
+        'default': {
+            'BACKEND': 'yatube.cache_backends.TieredCache',
+            'OPTIONS': {
+                'LOCAL': {
+                    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                    'OPTIONS': {'MAX_ENTRIES': 1000},
+                },
+                'SHARED': {
+                    'BACKEND': 'django.core.cache.backends.memcached.'
+                               'PyLibMCCache',
+                    'LOCATION': '127.0.0.1:11211',
+                },
+            },
+        }
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.local = _create(options.get('LOCAL', {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': location,
+        }))
+        self.shared = _create(options['SHARED'])
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 30)
+        self.stale_timeout = options.get('STALE_TIMEOUT', 60)
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 10)
+        self.lock_wait = options.get('LOCK_WAIT', 0)
+
+    def _lock_key(self, key):
+        return f'{key}:lock'
+
+    def _pack(self, value, timeout):
+        expires = self.get_backend_timeout(timeout)
+        return (value, expires), self._shared_timeout(expires)
+
+    def _shared_timeout(self, expires):
+        if expires is None:
+            return None
+        return max(expires - time.time(), 0) + self.stale_timeout
+
+    def _remember(self, key, value, expires, version):
+        timeout = self.local_timeout
+        if expires is not None:
+            timeout = min(timeout, expires - time.time())
+        if timeout > 0:
+            self.local.set(key, (value, expires), timeout, version=version)
+
+    def _unpack(self, key, entry, default, version):
+        """
+        Разворачивает запись из общего хранилища с учётом блокировки
+        пересчёта.
+        """
+        value, expires = entry
+        if expires is not None and expires <= time.time():
+            if self.shared.add(self._lock_key(key), 1, self.lock_timeout,
+                               version=version):
+                return default
+            return value
+        self._remember(key, value, expires, version)
+        return value
+
+    def _wait(self, key, default, version):
+        if not self.lock_wait:
+            return default
+        if self.shared.add(self._lock_key(key), 1, self.lock_timeout,
+                           version=version):
+            return default
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.02)
+            entry = self.shared.get(key, version=version)
+            if entry is not None:
+                return self._unpack(key, entry, default, version)
+        return default
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.validate_key(key)
+        entry, shared_timeout = self._pack(value, timeout)
+        if shared_timeout is not None and shared_timeout <= self.stale_timeout:
+            return False
+        return self.shared.add(key, entry, shared_timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        self.validate_key(key)
+        entry = self.local.get(key, version=version)
+        if entry is not None:
+            return entry[0]
+        entry = self.shared.get(key, version=version)
+        if entry is None:
+            return self._wait(key, default, version)
+        return self._unpack(key, entry, default, version)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key, entry in self.local.get_many(keys, version=version).items():
+            found[key] = entry[0]
+        missing = [key for key in keys if key not in found]
+        if missing:
+            entries = self.shared.get_many(missing, version=version)
+            for key, entry in entries.items():
+                value = self._unpack(key, entry, None, version)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.validate_key(key)
+        entry, shared_timeout = self._pack(value, timeout)
+        self.local.delete(key, version=version)
+        if shared_timeout is not None and shared_timeout <= self.stale_timeout:
+            # Нулевой или отрицательный срок: значение не кешируется.
+            self.shared.delete(key, version=version)
+        else:
+            self.shared.set(key, entry, shared_timeout, version=version)
+        self.shared.delete(self._lock_key(key), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, version=version)
+        if value is None:
+            return False
+        self.set(key, value, timeout, version=version)
+        return True
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(key, version=version)
+        entry = self.shared.get(key, version=version)
+        if entry is None:
+            raise ValueError("Key '%s' not found" % key)
+        value, expires = entry
+        value += delta
+        self.shared.set(
+            key, (value, expires), self._shared_timeout(expires),
+            version=version,
+        )
+        return value
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return (self.local.has_key(key, version=version)
+                or self.shared.has_key(key, version=version))
+
+    def clear(self):
+        self.local.clear()
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.local.close(**kwargs)
+        self.shared.close(**kwargs)
@@ -0,0 +1,413 @@
+"""
+Лёгкая инструментовка запросов вместо debug_toolbar.
+
+InstrumentationMiddleware меряет каждый запрос и делит его время на части:
+`db` (SQL), `template` (рендеринг), `cache` и `thumbnail`. Всё, что не
+попало в части, — `python`. Части не пересекаются: время запроса к базе
+из шаблона считается базой, а не шаблоном.
+
+Итоги по представлениям копятся в памяти процесса и раз в FLUSH_SECONDS
+сохраняются в METRICS_DIR/<pid>.json; `admin_panel/metrics/` складывает
+файлы всех процессов и отдаёт их в текстовом формате Prometheus — только
+персоналу или с METRICS_TOKEN в заголовке `Authorization: Bearer`.
+Заголовок Server-Timing тоже видят только персонал и запросы при DEBUG
+(или все, если SERVER_TIMING включён). У потокового ответа тело
+рендерится после выхода из представления, поэтому его замер завершается,
+когда тело прочитано, а Server-Timing не ставится.
+
+Каждый PROFILE_SAMPLE_RATE-й запрос (или запрос с заголовком
+PROFILE_HEADER, равным PROFILE_TOKEN) выполняется под cProfile; самые
+дорогие функции пишутся в PROFILE_DIR, где хранятся последние
+PROFILE_KEEP файлов.
+"""
+import cProfile
+import functools
+import itertools
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+PARTS = ('db', 'template', 'cache', 'thumbnail')
+
+# Границы корзин гистограммы длительности запроса, сек.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DEFAULTS = {
+    'METRICS_DIR': None,
+    'FLUSH_SECONDS': 5,
+    'METRICS_TOKEN': None,
+    'SERVER_TIMING': False,
+    'PROFILE_SAMPLE_RATE': 0,
+    'PROFILE_HEADER': 'X-Yatube-Profile',
+    'PROFILE_TOKEN': None,
+    'PROFILE_DIR': None,
+    'PROFILE_KEEP': 50,
+    'PROFILE_TOP': 30,
+}
+
+_state = threading.local()
+
+
+def option(name):
+    return getattr(settings, 'INSTRUMENTATION', {}).get(
+        name, DEFAULTS[name]
+    )
+
+
+class Timings:
+    """
+    Время частей одного запроса в секундах.
+    """
+
+    def __init__(self):
+        self.parts = dict.fromkeys(PARTS, 0.0)
+        self.counts = dict.fromkeys(PARTS, 0)
+        # Время вложенных замеров для каждого открытого замера.
+        self._children = []
+
+    def start(self):
+        self._children.append(0.0)
+        return time.perf_counter()
+
+    def stop(self, part, started):
+        elapsed = time.perf_counter() - started
+        children = self._children.pop()
+        self.parts[part] += elapsed - children
+        self.counts[part] += 1
+        if self._children:
+            self._children[-1] += elapsed
+
+
+class timed:
+    """
+    Засекает часть `part` текущего запроса; вне запроса ничего не делает.
+    Класс, а не @contextmanager, чтобы замер стоил как можно меньше.
+    """
+    __slots__ = ('part', 'timings', 'started')
+
+    def __init__(self, part):
+        self.part = part
+
+    def __enter__(self):
+        self.timings = getattr(_state, 'timings', None)
+        if self.timings is not None:
+            self.started = self.timings.start()
+
+    def __exit__(self, *exc_info):
+        if self.timings is not None:
+            self.timings.stop(self.part, self.started)
+
+
+def timed_function(part):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(part):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _execute(execute, sql, params, many, context):
+    # Обёртка для connection.execute_wrapper.
+    with timed('db'):
+        return execute(sql, params, many, context)
+
+
+class Metrics:
+    """
+    Накопленные итоги по представлениям в памяти процесса.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.profiles = 0
+        self.flushed = time.monotonic()
+
+    def record(self, view, seconds, timings):
+        with self.lock:
+            row = self.views.get(view)
+            if row is None:
+                row = self.views[view] = {
+                    'count': 0,
+                    'seconds': 0.0,
+                    'buckets': [0] * len(BUCKETS),
+                    'parts': dict.fromkeys(PARTS + ('python',), 0.0),
+                }
+            row['count'] += 1
+            row['seconds'] += seconds
+            for position, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    row['buckets'][position] += 1
+            for part, value in timings.parts.items():
+                row['parts'][part] += value
+            row['parts']['python'] += max(
+                seconds - sum(timings.parts.values()), 0.0
+            )
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {'views': json.loads(json.dumps(self.views)),
+                    'profiles': self.profiles}
+
+    def maybe_flush(self):
+        directory = option('METRICS_DIR')
+        if not directory:
+            return
+        now = time.monotonic()
+        if now - self.flushed < option('FLUSH_SECONDS'):
+            return
+        self.flushed = now
+        self.flush(directory)
+
+    def flush(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with open(fd, 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+metrics = Metrics()
+
+
+def collect():
+    """
+    Итоги всех процессов: файлы из METRICS_DIR и живые данные этого.
+    """
+    snapshots = [metrics.snapshot()]
+    directory = option('METRICS_DIR')
+    own = f'{os.getpid()}.json'
+    if directory and os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json') and name != own:
+                try:
+                    with open(os.path.join(directory, name)) as file:
+                        snapshots.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+    views = {}
+    profiles = 0
+    for snapshot in snapshots:
+        profiles += snapshot['profiles']
+        for view, row in snapshot['views'].items():
+            total = views.setdefault(view, {
+                'count': 0,
+                'seconds': 0.0,
+                'buckets': [0] * len(BUCKETS),
+                'parts': {},
+            })
+            total['count'] += row['count']
+            total['seconds'] += row['seconds']
+            total['buckets'] = [
+                a + b for a, b in zip(total['buckets'], row['buckets'])
+            ]
+            for part, value in row['parts'].items():
+                total['parts'][part] = total['parts'].get(part, 0.0) + value
+    return views, profiles
+
+
+def render_prometheus(views, profiles):
+    lines = [
+        '# HELP yatube_request_seconds Длительность запросов по '
+        'представлениям.',
+        '# TYPE yatube_request_seconds histogram',
+    ]
+    for view, row in sorted(views.items()):
+        for bound, value in zip(BUCKETS, row['buckets']):
+            lines.append(
+                f'yatube_request_seconds_bucket{{view="{view}",'
+                f'le="{bound}"}} {value}'
+            )
+        lines.append(
+            f'yatube_request_seconds_bucket{{view="{view}",le="+Inf"}} '
+            f'{row["count"]}'
+        )
+        lines.append(
+            f'yatube_request_seconds_sum{{view="{view}"}} {row["seconds"]}'
+        )
+        lines.append(
+            f'yatube_request_seconds_count{{view="{view}"}} {row["count"]}'
+        )
+    lines += [
+        '# HELP yatube_request_part_seconds_total Время запросов по частям.',
+        '# TYPE yatube_request_part_seconds_total counter',
+    ]
+    for view, row in sorted(views.items()):
+        for part, value in sorted(row['parts'].items()):
+            lines.append(
+                f'yatube_request_part_seconds_total{{view="{view}",'
+                f'part="{part}"}} {value}'
+            )
+    lines += [
+        '# HELP yatube_profiles_total Запросов, снятых под cProfile.',
+        '# TYPE yatube_profiles_total counter',
+        f'yatube_profiles_total {profiles}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def _is_staff(request):
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_staff
+
+
+def metrics_view(request):
+    token = option('METRICS_TOKEN')
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = _is_staff(request) or bool(token) and constant_time_compare(
+        header, f'Bearer {token}'
+    )
+    if not allowed:
+        raise PermissionDenied
+    return HttpResponse(
+        render_prometheus(*collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
+
+
+def _profile_rows(profiler, limit):
+    stats = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, name), (_, calls, total, cumulative, _) in (
+            stats.stats.items()):
+        rows.append({
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'total_ms': total * 1000,
+            'cumulative_ms': cumulative * 1000,
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    return rows[:limit]
+
+
+def save_profile(profiler, request, view, seconds, timings):
+    directory = option('PROFILE_DIR')
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    name = f'{time.time_ns()}-{os.getpid()}-{view}.json'
+    path = os.path.join(directory, name)
+    with open(path, 'w') as file:
+        json.dump({
+            'view': view,
+            'path': request.get_full_path(),
+            'ms': seconds * 1000,
+            'parts_ms': {
+                part: value * 1000 for part, value in timings.parts.items()
+            },
+            'top': _profile_rows(profiler, option('PROFILE_TOP')),
+        }, file, ensure_ascii=False, indent=1)
+    # Храним только последние PROFILE_KEEP файлов.
+    names = sorted(
+        name for name in os.listdir(directory) if name.endswith('.json')
+    )
+    for old in names[:-option('PROFILE_KEEP')]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass
+    return path
+
+
+class InstrumentationMiddleware:
+    """
+    Меряет запросы (см. описание модуля). Ставится первым в MIDDLEWARE,
+    чтобы учитывать и остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.counter = itertools.count(1)
+
+    def should_profile(self, request):
+        header = request.META.get(
+            'HTTP_' + option('PROFILE_HEADER').upper().replace('-', '_')
+        )
+        token = option('PROFILE_TOKEN')
+        if header and (settings.DEBUG or token and header == token):
+            return True
+        rate = option('PROFILE_SAMPLE_RATE')
+        return bool(rate) and next(self.counter) % rate == 0
+
+    def measure(self, timings, profiler, func):
+        """
+        Вызывает `func()`, засекая SQL и части в `timings`.
+        """
+        _state.timings = timings
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_execute))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    return func()
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _state.timings = None
+
+    def stream(self, content, timings, profiler, elapsed, finish):
+        """
+        Тело потокового ответа, генерация которого тоже меряется.
+        Ожидание клиента между кусками не считается. Когда тело прочитано
+        (или ответ закрыт раньше), вызывает `finish(seconds)`.
+        """
+        iterator = iter(content)
+        try:
+            while True:
+                started = time.perf_counter()
+                chunk = self.measure(
+                    timings, profiler, lambda: next(iterator, None)
+                )
+                elapsed += time.perf_counter() - started
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            finish(elapsed)
+
+    def finish(self, request, timings, profiler, seconds):
+        match = request.resolver_match
+        view = match.url_name if match and match.url_name else 'other'
+        metrics.record(view, seconds, timings)
+        if profiler is not None:
+            with metrics.lock:
+                metrics.profiles += 1
+            save_profile(profiler, request, view, seconds, timings)
+
+    def __call__(self, request):
+        timings = Timings()
+        profiler = cProfile.Profile() if self.should_profile(request) else None
+        started = time.perf_counter()
+        response = self.measure(
+            timings, profiler, lambda: self.get_response(request)
+        )
+        seconds = time.perf_counter() - started
+        if getattr(response, 'streaming', False):
+            response.streaming_content = self.stream(
+                response.streaming_content, timings, profiler, seconds,
+                lambda total: self.finish(request, timings, profiler, total),
+            )
+            return response
+        self.finish(request, timings, profiler, seconds)
+        if settings.DEBUG or option('SERVER_TIMING') or _is_staff(request):
+            response['Server-Timing'] = ', '.join(
+                f'{part};dur={value * 1000:.1f}'
+                for part, value in timings.parts.items() if value
+            ) + f', total;dur={seconds * 1000:.1f}'
+        return response
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -34,30 +35,36 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'yatube.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'posts.middleware.QueryBudgetMiddleware',
+    'posts.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# debug_toolbar слишком тяжёл для боевого сервера: только при отладке.
+if DEBUG:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга.
+        'BACKEND': 'yatube.template_backends.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
+        'APP_DIRS': DEBUG,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -71,25 +78,100 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # В продакшене шаблоны читаются и разбираются один раз на процесс.
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+# yatube.sqlite3 включает WAL и остальные PRAGMA из yatube/sqlite3/base.py,
+# чтобы параллельные запросы на запись не получали `database is locked`.
+# Соединение живёт CONN_MAX_AGE секунд и переиспользуется между запросами.
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Реплика для чтения лент: копия основной базы, которую обновляет
+    # `python manage.py sync_replicas --interval 5`. Чтобы включить,
+    # раскомментируйте и добавьте 'replica' в DATABASE_REPLICAS.
+    # 'replica': {
+    #     'ENGINE': 'yatube.sqlite3',
+    #     'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+    #     'CONN_MAX_AGE': 60,
+    # },
 }
 
+DATABASE_ROUTERS = ['posts.replicas.ReplicaRouter']
+
+# Алиасы реплик, с которых читаются страницы из REPLICA_VIEWS.
+DATABASE_REPLICAS = []
+
+REPLICA_VIEWS = ('index', 'group', 'profile', 'post', 'follow_index')
+
+# Сколько секунд после запроса на запись пользователь читает только из
+# основной базы — должно быть больше отставания реплик.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
 # Cache
+# Фрагменты лент кешируются в двух уровнях: LRU в памяти процесса перед
+# общим для всех воркеров файловым кешем. Вместо файлового кеша в SHARED
+# можно подключить любой бэкенд Django, например memcached
+# ('django.core.cache.backends.memcached.PyLibMCCache'). Для отключения
+# кеша — 'django.core.cache.backends.dummy.DummyCache' в 'default'.
+
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+
+# Тесты работают с копией кешей и MEDIA_ROOT во временных каталогах.
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
 
 CACHES = {
     'default': {
-        # 'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
-    }
+        'BACKEND': 'yatube.cache_backends.TieredCache',
+        'OPTIONS': {
+            'LOCAL': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'OPTIONS': {'MAX_ENTRIES': 1000},
+            },
+            'SHARED': {
+                'BACKEND': 'yatube.cache_backends.FileBasedCache',
+                'LOCATION': os.path.join(CACHE_DIR, 'default'),
+                'OPTIONS': {'MAX_ENTRIES': 10000},
+            },
+            # Сколько секунд копия живёт в памяти процесса.
+            'LOCAL_TIMEOUT': 30,
+            # Сколько секунд после истечения срока отдаётся старое значение,
+            # пока один из воркеров пересчитывает фрагмент.
+            'STALE_TIMEOUT': 60,
+            'LOCK_TIMEOUT': 10,
+            # Сброс поколения делает ключи фрагментов новыми, то есть
+            # отсутствующими: пока один воркер рендерит фрагмент, остальные
+            # ждут его до стольких секунд, а не рендерят тот же фрагмент.
+            'LOCK_WAIT': 3,
+        },
+    },
+    # Поколения кеша, граф подписок и статистика: без локального уровня,
+    # чтобы сброс был сразу виден всем воркерам. Отдельный файл SQLite:
+    # запись одного ключа не зависит от числа ключей.
+    'generations': {
+        'BACKEND': 'yatube.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(CACHE_DIR, 'generations.sqlite3'),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 1000000},
+    },
 }
 
 # Password validation
@@ -146,3 +228,106 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 # Количество постов на странице.
 POST_ON_PAGE = 10
+# Комментариев на странице поста и в каждой догрузке.
+COMMENTS_ON_PAGE = 20
+
+# Режим пагинации лент: 'classic' (?page=N, COUNT + OFFSET) или
+# 'keyset' (?after=/?before= по ключу (pub_date, id), без COUNT).
+FEED_PAGINATION = {
+    'index': 'classic',
+    'group': 'classic',
+    'profile': 'classic',
+    'follow': 'classic',
+}
+
+# Лента подписок: 'push' — посты раскладываются по входящим подписчиков
+# при публикации (таблица FeedEntry), 'pull' — собираются при чтении.
+FOLLOW_FEED_MODE = 'push'
+# Посты авторов, у которых подписчиков больше, не раскладываются по
+# входящим, а подмешиваются при чтении. None — без ограничения.
+FOLLOW_FEED_FANOUT_LIMIT = 10000
+# Сколько секунд живут закешированные массивы графа подписок
+# (posts/follow_graph.py). Подписка и отписка меняют их на месте, срок лишь
+# ограничивает жизнь массива, записанного в гонке.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+# Время жизни закешированных лент, сек. Кеш сбрасывается поколениями при
+# публикации, комментировании и подписке, поэтому может жить долго.
+FEED_CACHE_TIMEOUT = 60 * 60 * 6
+# Счётчики попаданий в кеш лент копятся в памяти процесса и сбрасываются
+# в общий кеш не чаще раза в столько секунд (см. posts/cache_stats.py).
+CACHE_STATS_FLUSH_SECONDS = 5
+
+# Страницы (имена URL), которые отдаются потоком: head и навигация уходят
+# сразу, карточки постов — по мере рендеринга (posts/streaming.py).
+# Поддерживаются 'index', 'profile' и 'post'.
+STREAMING_FEEDS = ()
+# По сколько постов читать курсором и отдавать за раз. На каждую пачку —
+# одно чтение карточек из кеша и один запрос превью, поэтому по умолчанию
+# вся страница идёт одной пачкой сразу после head.
+STREAMING_CHUNK_SIZE = POST_ON_PAGE
+
+# Время жизни готового HTML карточек постов (posts.cards), сек. Версия
+# карточки сверяется при каждом чтении, поэтому срок нужен только для
+# вытеснения карточек старых постов.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Сколько секунд обратный прокси может отдавать анонимные страницы лент и
+# постов без проверки (Cache-Control: s-maxage). Браузеры всегда
+# переспрашивают сервер по ETag.
+PROXY_CACHE_SECONDS = 10
+
+# Превью картинок постов: имя -> (ширина, высота). Готовятся один раз
+# после загрузки картинки, а не при отрисовке страницы.
+POST_THUMBNAIL_SIZES = {
+    'card': (960, 339),
+}
+# Уменьшенные копии для srcset: ширины не больше ширины превью, высота
+# по тем же пропорциям.
+POST_THUMBNAIL_WIDTHS = (360, 480, 720)
+# Форматы превью; последний — запасной для браузеров без поддержки
+# остальных.
+POST_THUMBNAIL_FORMATS = ('webp', 'jpeg')
+# Атрибут sizes у картинки карточки: ширина карточки в разметке.
+POST_THUMBNAIL_SIZES_ATTR = '(max-width: 1200px) 100vw, 1110px'
+# Загрузки с большим числом пикселей отклоняются: распакованная картинка
+# занимала бы сотни мегабайт памяти.
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+# Готовить превью в фоновом пуле потоков (иначе — прямо в запросе).
+THUMBNAIL_ASYNC = not DEBUG
+THUMBNAIL_WORKERS = 2
+
+# Бюджеты страниц по имени URL: число SQL-запросов и время ответа, мс
+# (без кеша лент). Превышение пишет предупреждение в лог posts.budgets и
+# роняет posts/tests/test_budgets.py.
+VIEW_BUDGETS = {
+    'index': {'queries': 5, 'ms': 250},
+    'group': {'queries': 6, 'ms': 250},
+    'profile': {'queries': 7, 'ms': 250},
+    'post': {'queries': 5, 'ms': 250},
+    'follow_index': {'queries': 7, 'ms': 250},
+}
+
+# Инструментовка запросов (yatube/instrumentation.py): время по частям,
+# метрики Prometheus на admin_panel/metrics/ и выборочный cProfile.
+# Метрики и профили пишутся вне каталога проекта; тесты подменяют оба
+# каталога временными.
+INSTRUMENTATION_DIR = os.path.join(tempfile.gettempdir(), 'yatube')
+INSTRUMENTATION = {
+    # Куда процессы сбрасывают свои итоги, чтобы метрики учли все.
+    'METRICS_DIR': os.path.join(INSTRUMENTATION_DIR, 'metrics'),
+    'FLUSH_SECONDS': 5,
+    # Кроме персонала, метрики отдаются по `Authorization: Bearer <токен>`.
+    'METRICS_TOKEN': None,
+    # Server-Timing всем, а не только персоналу и при DEBUG.
+    'SERVER_TIMING': False,
+    # Профилировать каждый N-й запрос; 0 — только по заголовку.
+    'PROFILE_SAMPLE_RATE': 1000,
+    # Заголовок с этим значением профилирует запрос (при DEBUG — любое
+    # значение). None отключает профилирование по заголовку.
+    'PROFILE_HEADER': 'X-Yatube-Profile',
+    'PROFILE_TOKEN': None,
+    'PROFILE_DIR': os.path.join(INSTRUMENTATION_DIR, 'profiles'),
+    'PROFILE_KEEP': 50,
+    'PROFILE_TOP': 30,
+}
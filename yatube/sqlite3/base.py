@@ -0,0 +1,67 @@
+from django.db.backends.sqlite3 import base
+
+# Значения по умолчанию; в OPTIONS['pragmas'] любую можно переопределить
+# или отключить, указав None.
+PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот.
+    'journal_mode': 'wal',
+    # В режиме WAL fsync только на контрольных точках: коммит не теряет
+    # целостность, но может потеряться при отключении питания.
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах.
+    'cache_size': -64 * 1024,
+    # Сколько миллисекунд ждать занятой базы перед `database is locked`.
+    'busy_timeout': 5000,
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite с настройками для нескольких процессов и потоков сервера:
+    PRAGMA из `PRAGMAS` на каждом новом соединении и, при
+    OPTIONS['transaction_mode'] = 'IMMEDIATE', транзакции, которые сразу
+    берут блокировку записи.
+
+    Блокировка в начале транзакции нужна потому, что отложенная
+    транзакция, прочитавшая данные, в режиме WAL не может дождаться
+    писателя: busy_timeout на неё не действует, и она сразу получает
+    `database is locked`.
+
+    Пример настройки::
+
+        'default': {
+            'ENGINE': 'yatube.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            'CONN_MAX_AGE': 60,
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                'pragmas': {'mmap_size': 0},
+            },
+        }
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def pragmas(self):
+        options = self.settings_dict['OPTIONS']
+        pragmas = dict(PRAGMAS, **options.get('pragmas', {}))
+        return {name: value for name, value in pragmas.items()
+                if value is not None}
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas().items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode:
+            self.cursor().execute(f'BEGIN {mode}')
+        else:
+            super()._start_transaction_under_autocommit()
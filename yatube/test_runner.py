@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def _move(config, location):
+    config = dict(config)
+    path = config.get('LOCATION')
+    if isinstance(path, str) and path.startswith(settings.CACHE_DIR):
+        config['LOCATION'] = os.path.join(
+            location, os.path.relpath(path, settings.CACHE_DIR)
+        )
+    if 'OPTIONS' in config:
+        config['OPTIONS'] = {
+            name: _move(value, location) if isinstance(value, dict) else value
+            for name, value in config['OPTIONS'].items()
+        }
+    return config
+
+
+@contextmanager
+def isolated_caches():
+    """
+    Переносит кеши из CACHE_DIR во временный каталог: тесты не видят кеш
+    запущенного сайта и не пишут в него.
+    """
+    location = tempfile.mkdtemp(prefix='yatube-cache-')
+    try:
+        with override_settings(CACHES={
+            alias: _move(config, location)
+            for alias, config in settings.CACHES.items()
+        }):
+            yield location
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+@contextmanager
+def isolated_media():
+    """
+    MEDIA_ROOT во временном каталоге: загруженные в тестах картинки и их
+    превью не попадают в media/ сайта.
+    """
+    location = tempfile.mkdtemp(prefix='yatube-media-')
+    try:
+        with override_settings(MEDIA_ROOT=location):
+            yield location
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+@contextmanager
+def isolated_instrumentation():
+    """
+    Метрики и профили тестовых запросов — во временном каталоге.
+    """
+    location = tempfile.mkdtemp(prefix='yatube-instrumentation-')
+    try:
+        with override_settings(INSTRUMENTATION=dict(
+            settings.INSTRUMENTATION,
+            METRICS_DIR=os.path.join(location, 'metrics'),
+            PROFILE_DIR=os.path.join(location, 'profiles'),
+        )):
+            yield location
+    finally:
+        shutil.rmtree(location, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.isolation = ExitStack()
+        self.isolation.enter_context(isolated_caches())
+        self.isolation.enter_context(isolated_media())
+        self.isolation.enter_context(isolated_instrumentation())
+
+    def teardown_test_environment(self, **kwargs):
+        self.isolation.close()
+        super().teardown_test_environment(**kwargs)
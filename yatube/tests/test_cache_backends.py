@@ -0,0 +1,182 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase
+
+from yatube.cache_backends import FileBasedCache, SQLiteCache, TieredCache
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return TieredCache('', {'OPTIONS': {
+            'SHARED': {
+                'BACKEND': 'yatube.cache_backends.FileBasedCache',
+                'LOCATION': self.location,
+            },
+            'STALE_TIMEOUT': 60,
+            **options,
+        }})
+
+    def test_set_get_between_processes(self):
+        self.cache.set('key', 'value')
+        other_process = self.make_cache()
+        self.assertEqual(other_process.get('key'), 'value')
+        self.assertEqual(other_process.get_many(['key', 'missing']),
+                         {'key': 'value'})
+
+    def test_local_tier_serves_repeated_reads(self):
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.shared.clear()
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_zero_timeout_is_not_cached(self):
+        self.cache.set('key', 'value', 0)
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_incr_keeps_value_type(self):
+        self.cache.set('counter', 1, None)
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(self.make_cache().get('counter'), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_single_recompute_per_expired_key(self):
+        self.cache.set('key', 'old', 1)
+        time.sleep(1.1)
+        workers = [self.make_cache() for _ in range(8)]
+        with ThreadPoolExecutor(len(workers)) as pool:
+            results = list(pool.map(lambda cache: cache.get('key'), workers))
+        self.assertEqual(results.count(None), 1)
+        self.assertEqual(results.count('old'), 7)
+
+        self.cache.set('key', 'new', 60)
+        self.assertEqual(self.make_cache().get('key'), 'new')
+
+    def test_single_recompute_per_missing_key(self):
+        workers = [self.make_cache(LOCK_WAIT=2) for _ in range(8)]
+
+        def render(cache):
+            value = cache.get('fragment')
+            if value is None:
+                time.sleep(0.2)
+                cache.set('fragment', 'computed')
+                return 'recomputed'
+            return value
+
+        with ThreadPoolExecutor(len(workers)) as pool:
+            results = list(pool.map(render, workers))
+        self.assertEqual(results.count('recomputed'), 1)
+        self.assertEqual(results.count('computed'), 7)
+
+    def test_cold_miss_waits_for_recompute(self):
+        waiting = self.make_cache(LOCK_WAIT=2)
+        self.assertIsNone(waiting.get('key'))
+        with ThreadPoolExecutor(1) as pool:
+            result = pool.submit(self.make_cache(LOCK_WAIT=2).get, 'key')
+            time.sleep(0.1)
+            waiting.set('key', 'computed')
+            self.assertEqual(result.result(), 'computed')
+
+
+class FileBasedCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def test_add_is_atomic(self):
+        caches = [FileBasedCache(self.location, {}) for _ in range(8)]
+        with ThreadPoolExecutor(len(caches)) as pool:
+            added = list(pool.map(
+                lambda cache: cache.add('lock', 1, 10), caches
+            ))
+        self.assertEqual(added.count(True), 1)
+
+    def test_add_replaces_expired_entry(self):
+        cache = FileBasedCache(self.location, {})
+        cache.set('lock', 1, 1)
+        time.sleep(1.1)
+        self.assertTrue(cache.add('lock', 2, 10))
+        self.assertEqual(cache.get('lock'), 2)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.location, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(os.path.join(self.location, 'cache.sqlite3'), {
+            'TIMEOUT': None, 'OPTIONS': options,
+        })
+
+    def test_set_get_between_processes(self):
+        self.cache.set_many({'key': {'value'}, 'other': 1})
+        other_process = self.make_cache()
+        self.assertEqual(other_process.get('key'), {'value'})
+        self.assertEqual(other_process.get_many(['key', 'missing']),
+                         {'key': {'value'}})
+        other_process.delete_many(['key'])
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_is_atomic(self):
+        workers = [self.make_cache() for _ in range(8)]
+        with ThreadPoolExecutor(len(workers)) as pool:
+            added = list(pool.map(
+                lambda cache: cache.add('lock', 1, 10), workers
+            ))
+        self.assertEqual(added.count(True), 1)
+
+    def test_add_replaces_expired_entry(self):
+        self.cache.set('lock', 1, 1)
+        time.sleep(1.1)
+        self.assertFalse(self.cache.has_key('lock'))
+        self.assertTrue(self.cache.add('lock', 2, 10))
+        self.assertFalse(self.cache.add('lock', 3, 10))
+        self.assertEqual(self.cache.get('lock'), 2)
+
+    def test_incr(self):
+        self.cache.set('counter', 1)
+        workers = [self.make_cache() for _ in range(8)]
+        with ThreadPoolExecutor(len(workers)) as pool:
+            list(pool.map(lambda cache: cache.incr('counter', 2), workers))
+        self.assertEqual(self.cache.get('counter'), 17)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_cull(self):
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_EVERY=5)
+        for number in range(30):
+            cache.set(f'key{number}', number)
+        self.assertLessEqual(len(cache.get_many(
+            [f'key{number}' for number in range(30)]
+        )), 15)
+
+
+class IsolatedCachesTests(SimpleTestCase):
+    def test_tests_do_not_use_site_cache(self):
+        for cache in (caches['default'].shared, caches['generations']):
+            location = getattr(cache, '_dir', None) or cache.path
+            self.assertFalse(location.startswith(settings.CACHE_DIR))
+
+    def test_tests_do_not_use_site_media(self):
+        self.assertNotEqual(
+            settings.MEDIA_ROOT, os.path.join(settings.BASE_DIR, 'media')
+        )
@@ -0,0 +1,181 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import reverse
+
+from yatube import instrumentation
+from yatube.instrumentation import InstrumentationMiddleware, timed
+
+
+def make_settings(directory, **options):
+    return dict(instrumentation.DEFAULTS, **{
+        'METRICS_DIR': os.path.join(directory, 'metrics'),
+        'FLUSH_SECONDS': 0,
+        'PROFILE_DIR': os.path.join(directory, 'profiles'),
+        **options,
+    })
+
+
+class TimingsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.factory = RequestFactory()
+
+    def view(self, request):
+        with timed('template'):
+            time.sleep(0.02)
+            with timed('db'):
+                time.sleep(0.03)
+        return HttpResponse()
+
+    def test_parts_do_not_overlap(self):
+        options = make_settings(self.directory, SERVER_TIMING=True)
+        with self.settings(INSTRUMENTATION=options):
+            middleware = InstrumentationMiddleware(self.view)
+            response = middleware(self.factory.get('/'))
+        parts = dict(
+            item.split(';dur=')
+            for item in response['Server-Timing'].split(', ')
+        )
+        self.assertAlmostEqual(float(parts['template']), 20, delta=10)
+        self.assertAlmostEqual(float(parts['db']), 30, delta=10)
+        self.assertGreaterEqual(float(parts['total']), 50)
+
+    @override_settings(DEBUG=False)
+    def test_server_timing_is_hidden_from_anonymous(self):
+        with self.settings(INSTRUMENTATION=make_settings(self.directory)):
+            response = InstrumentationMiddleware(self.view)(
+                self.factory.get('/')
+            )
+        self.assertNotIn('Server-Timing', response)
+
+    def test_streamed_body_is_measured(self):
+        def body():
+            yield b'head'
+            with timed('db'):
+                time.sleep(0.03)
+            yield b'posts'
+
+        def view(request):
+            return StreamingHttpResponse(body())
+
+        options = make_settings(self.directory, SERVER_TIMING=True)
+        with self.settings(INSTRUMENTATION=options):
+            before = instrumentation.metrics.snapshot()['views'].get(
+                'other', {'count': 0, 'parts': {'db': 0.0}}
+            )
+            response = InstrumentationMiddleware(view)(self.factory.get('/'))
+            # Пока тело не прочитано, запрос не записан.
+            self.assertEqual(
+                instrumentation.metrics.snapshot()['views'].get(
+                    'other', {'count': 0})['count'],
+                before['count'],
+            )
+            self.assertEqual(b''.join(response.streaming_content),
+                             b'headposts')
+        after = instrumentation.metrics.snapshot()['views']['other']
+        self.assertEqual(after['count'], before['count'] + 1)
+        self.assertGreaterEqual(
+            after['parts']['db'] - before['parts']['db'], 0.03
+        )
+        self.assertNotIn('Server-Timing', response)
+
+    def test_outside_request_is_noop(self):
+        with timed('db'):
+            pass
+
+    def test_sampled_profiles_are_rotated(self):
+        options = make_settings(self.directory, PROFILE_SAMPLE_RATE=2,
+                                PROFILE_KEEP=2)
+        with self.settings(INSTRUMENTATION=options):
+            middleware = InstrumentationMiddleware(self.view)
+            for _ in range(6):
+                middleware(self.factory.get('/'))
+        names = os.listdir(os.path.join(self.directory, 'profiles'))
+        self.assertEqual(len(names), 2)
+        with open(os.path.join(self.directory, 'profiles', names[0])) as f:
+            profile = json.load(f)
+        self.assertTrue(profile['top'])
+        self.assertIn('db', profile['parts_ms'])
+
+    @override_settings(DEBUG=False)
+    def test_profile_by_header_needs_token(self):
+        options = make_settings(self.directory, PROFILE_TOKEN='secret')
+        with self.settings(INSTRUMENTATION=options):
+            middleware = InstrumentationMiddleware(self.view)
+            middleware(self.factory.get('/', HTTP_X_YATUBE_PROFILE='wrong'))
+            self.assertFalse(
+                os.path.exists(os.path.join(self.directory, 'profiles'))
+            )
+            middleware(self.factory.get('/', HTTP_X_YATUBE_PROFILE='secret'))
+        self.assertEqual(
+            len(os.listdir(os.path.join(self.directory, 'profiles'))), 1
+        )
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = get_user_model().objects.create_user(
+            'staff', is_staff=True
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.client = Client()
+        self.client.force_login(self.staff)
+
+    def test_metrics_endpoint(self):
+        with self.settings(INSTRUMENTATION=make_settings(self.directory)):
+            response = self.client.get(reverse('index'))
+            self.assertIn('template;dur=', response['Server-Timing'])
+            # Файл другого процесса тоже учитывается.
+            with open(os.path.join(self.directory, 'metrics', '1.json'),
+                      'w') as file:
+                json.dump({'profiles': 1, 'views': {'index': {
+                    'count': 2, 'seconds': 0.5, 'buckets': [0] * 10,
+                    'parts': {'db': 0.1},
+                }}}, file)
+            own = instrumentation.metrics.snapshot()['views']['index']
+            response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        content = response.content.decode()
+        self.assertIn(
+            'yatube_request_seconds_count{view="index"} '
+            f'{own["count"] + 2}', content
+        )
+        self.assertIn('part="template"', content)
+
+    def test_metrics_need_staff_or_token(self):
+        get_user_model().objects.create_user('user')
+        user = Client()
+        user.force_login(get_user_model().objects.get(username='user'))
+        for client in (Client(), user):
+            with self.subTest(client=client):
+                response = client.get(reverse('metrics'))
+                self.assertEqual(response.status_code, 403)
+        options = make_settings(self.directory, METRICS_TOKEN='secret')
+        with self.settings(INSTRUMENTATION=options):
+            self.assertEqual(Client().get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code, 403)
+            self.assertEqual(Client().get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+            ).status_code, 200)
+
+    def test_does_not_shadow_profile(self):
+        get_user_model().objects.create_user('metrics')
+        response = Client().get(
+            reverse('profile', kwargs={'username': 'metrics'})
+        )
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, transaction
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+class SqliteBackendTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.handler = ConnectionHandler({
+            'default': self.database(),
+            'second': self.database(pragmas={'busy_timeout': 0}),
+            'plain': self.database(transaction_mode=None),
+        })
+        # transaction.atomic() берёт соединения из django.db.connections.
+        patcher = mock.patch('django.db.transaction.connections',
+                             self.handler)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.handler.close_all()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def database(self, **options):
+        options.setdefault('transaction_mode', 'IMMEDIATE')
+        return {
+            'ENGINE': 'yatube.sqlite3',
+            'NAME': os.path.join(self.directory, 'db.sqlite3'),
+            'OPTIONS': options,
+        }
+
+    def pragma(self, alias, name):
+        with self.handler[alias].cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_on_connect(self):
+        self.assertEqual(self.pragma('default', 'journal_mode'), 'wal')
+        # synchronous=NORMAL
+        self.assertEqual(self.pragma('default', 'synchronous'), 1)
+        self.assertEqual(self.pragma('default', 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma('default', 'cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma('second', 'busy_timeout'), 0)
+
+    def test_none_disables_pragma(self):
+        self.handler.databases['plain']['OPTIONS']['pragmas'] = {
+            'journal_mode': None,
+        }
+        self.assertEqual(self.pragma('plain', 'journal_mode'), 'delete')
+
+    def test_immediate_transaction_takes_write_lock(self):
+        with self.handler['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        with transaction.atomic(using='default'):
+            with self.assertRaisesMessage(OperationalError, 'locked'):
+                with self.handler['second'].cursor() as cursor:
+                    cursor.execute('INSERT INTO item VALUES (1)')
+
+    def test_deferred_transaction_by_default(self):
+        with self.handler['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer)')
+        with transaction.atomic(using='plain'):
+            with self.handler['second'].cursor() as cursor:
+                cursor.execute('INSERT INTO item VALUES (1)')
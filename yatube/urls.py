@@ -4,12 +4,17 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from yatube import instrumentation
+
 handler404 = 'posts.views.page_not_found'
 handler500 = 'posts.views.server_error'
 
 urlpatterns = [
     path('auth/', include('users.urls')),
     path('auth/', include('django.contrib.auth.urls')),
+    # Под admin_panel/, чтобы не закрывать профиль пользователя metrics.
+    path('admin_panel/metrics/', instrumentation.metrics_view,
+         name='metrics'),
     path('admin_panel/', admin.site.urls),
     path('about/', include('about.urls', namespace='about')),
     path('', include('posts.urls')),